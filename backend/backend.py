@@ -1,13 +1,36 @@
+import logging
+import threading
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
-from routers import execution, configuration, infos, validate, files 
+from routers import execution, configuration, infos, validate, files, jobs, quarantine
 from log import set_logging
 
 
+def warm_up():
+    """
+    Carica in background i moduli pesanti (albero di digital_twin, manager di Kathara), importati solo
+    al primo utilizzo dai router, così le API accettano richieste subito e la prima build non li attende
+    """
+    start = time.perf_counter()
+    try:
+        import start_lab  # noqa: F401
+        import reload_lab  # noqa: F401
+        from digital_twin.ixp.quarantine.action_manager import ActionManager  # noqa: F401
+        from Kathara.manager.Kathara import Kathara
+
+        Kathara.get_instance()
+        logging.info(f"Warm-up completed in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logging.warning(f"Warm-up failed, modules will be loaded on first use: {e}")
+
+
 def app_startup():
     set_logging()
     execution.startup()
+    quarantine.startup()
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
 
 
 app = FastAPI(title="IXP Digital Twin API", version="1.0.0")
@@ -19,6 +42,8 @@ app.include_router(configuration.router)
 app.include_router(infos.router)
 app.include_router(validate.router)
 app.include_router(files.router)
+app.include_router(jobs.router)
+app.include_router(quarantine.router)
 
 
 app.add_event_handler('startup', app_startup)
@@ -49,6 +74,8 @@ async def index_route():
         "version": "1.0.0",
         "endpoints": {
             "ixp": "/ixp",
+            "jobs": "/ixp/jobs",
+            "quarantine": "/ixp/quarantine",
             "configs": "/configs",
             "resources": "/resources",
             "info": "/ixp/info"
@@ -0,0 +1,146 @@
+"""
+Benchmark del parser dei RIB dei route server BIRD (`show route ... all`)
+
+Genera un output sintetico con prefissi IPv4/IPv6 e path aggiuntivi per lo stesso prefisso, poi confronta
+il parser a regex precedente con `BirdVendorDevice.parse_bgp_neighbor_routes`: tempo, rotte e prefissi trovati.
+Il parser precedente perde l'ultimo record e i path aggiuntivi, la differenza viene riportata.
+
+Uso: python bird_rib_benchmark.py [--prefixes N] [--extra-paths N] [--repeat N]
+"""
+import argparse
+import ipaddress
+import random
+import re
+import sys
+import time
+
+# Regex del parser precedente
+LEGACY_BIRD_RIB_PREFIX = re.compile(r"(\S+) +via")
+LEGACY_BIRD_RIB_NEXTHOP = re.compile(r"BGP.next_hop: +(\S+)")
+LEGACY_BIRD_RIB_AS_PATH = re.compile(r"BGP.as_path: +(.+?)\n")
+
+
+def synthetic_bird_output(prefixes: int, extra_paths: int = 0, seed: int = 0) -> str:
+    """
+    Output di `show route protocol <neighbor> all` nel formato di BIRD 1.x, senza riga vuota finale
+
+    Args:
+        prefixes: Numero di prefissi, uno ogni dieci è IPv6 con next hop link-local
+        extra_paths: Numero di prefissi con un secondo path, con l'header indentato senza prefisso
+        seed: Seed del generatore di numeri casuali
+    """
+    rng = random.Random(seed)
+    extra = set(rng.sample(range(prefixes), min(extra_paths, prefixes)))
+    lines = []
+
+    def append_path(header: str, next_hop: str, as_path: str) -> None:
+        lines.extend([
+            f"{header} on eth0 [peer_{next_hop.replace(':', '_').replace('.', '_')} 12:00:00] * (100) [AS{as_path.split()[-1]}i]",
+            "\tType: BGP unicast univ",
+            "\tBGP.origin: IGP",
+            f"\tBGP.as_path: {as_path}",
+            f"\tBGP.next_hop: {next_hop}",
+            "\tBGP.local_pref: 100",
+            "\tBGP.community: (65000,1) (65000,2)",
+        ])
+
+    for i in range(prefixes):
+        if i % 10 == 9:
+            prefix = f"2001:db8:{i >> 16:x}:{i & 0xffff:x}::/64"
+            next_hop = f"2001:db8::{rng.randint(1, 50):x} fe80::{rng.randint(1, 50):x}"
+        else:
+            prefix = f"{10 + (i >> 16)}.{(i >> 8) & 0xff}.{i & 0xff}.0/24"
+            next_hop = f"192.0.2.{rng.randint(1, 50)}"
+        as_path = " ".join(str(rng.randint(1, 400000)) for _ in range(rng.randint(1, 6)))
+
+        via = next_hop.split()[0]
+        append_path(f"{prefix:<24} via {via}", next_hop, as_path)
+        if i in extra:
+            append_path(f"{'':<24} via {via}", next_hop, f"65000 {as_path}")
+
+    return "\n".join(lines)
+
+
+def legacy_parse_bgp_neighbor_rib(bgp_output: str) -> dict:
+    # Parser precedente, invariato: l'ultimo record dopo `BGP.local_pref:` viene scartato
+    entries = bgp_output.strip().split("BGP.local_pref:")
+    rib = {}
+
+    for entry in entries[:-1]:
+        prefix_match = LEGACY_BIRD_RIB_PREFIX.search(entry)
+        nexthop_match = LEGACY_BIRD_RIB_NEXTHOP.search(entry)
+
+        matches = LEGACY_BIRD_RIB_AS_PATH.search(entry)
+        as_path = tuple()
+        if matches:
+            as_path = tuple(map(int, matches.group(1).strip().split()))
+
+        prefix = ipaddress.ip_network(prefix_match.group(1)) if prefix_match else None
+        nexthop = ipaddress.ip_address(nexthop_match.group(1)) if nexthop_match else None
+
+        if prefix is None or nexthop is None:
+            continue
+
+        if prefix not in rib:
+            rib[prefix] = {}
+        if nexthop not in rib[prefix]:
+            rib[prefix][nexthop] = set()
+
+        rib[prefix][nexthop].add(as_path)
+
+    return rib
+
+
+def count_routes(rib: dict) -> int:
+    return sum(len(as_paths) for next_hops in rib.values() for as_paths in next_hops.values())
+
+
+def timed(func, repeat: int):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main() -> int:
+    from digital_twin.ixp.configuration.rs.bird_vendor_device import BirdVendorDevice
+
+    parser = argparse.ArgumentParser(description="Benchmark the BIRD neighbor RIB parser against the previous one")
+    parser.add_argument("--prefixes", type=int, default=100_000, help="Number of prefixes")
+    parser.add_argument("--extra-paths", type=int, default=10_000, help="Prefixes with an additional path")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each parser, the best one is reported")
+    args = parser.parse_args()
+
+    output = synthetic_bird_output(args.prefixes, args.extra_paths)
+    expected_routes = args.prefixes + min(args.extra_paths, args.prefixes)
+    print(f"Synthetic output: {args.prefixes} prefixes, {expected_routes} routes, {len(output) / 2 ** 20:.1f} MiB")
+
+    device = BirdVendorDevice()
+    results = {
+        "legacy": timed(lambda: legacy_parse_bgp_neighbor_rib(output), args.repeat),
+        "records": timed(lambda: sum(1 for _ in device.parse_bgp_neighbor_routes(output)), args.repeat),
+        "rib": timed(lambda: device.parse_bgp_neighbor_rib(output), args.repeat),
+    }
+
+    print(f"{'parser':<10}{'seconds':>10}{'prefixes':>12}{'routes':>12}")
+    for name, (result, elapsed) in results.items():
+        if isinstance(result, dict):
+            (prefixes, routes) = (len(result), count_routes(result))
+        else:
+            (prefixes, routes) = ("-", result)
+        print(f"{name:<10}{elapsed:>10.2f}{prefixes:>12}{routes:>12}")
+
+    legacy_rib = results["legacy"][0]
+    rib = results["rib"][0]
+    print(f"Routes missed by the legacy parser: {count_routes(rib) - count_routes(legacy_rib)}, "
+          f"prefixes missed: {len(rib.keys() - legacy_rib.keys())}")
+
+    return 0 if count_routes(rib) == expected_routes else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Profilo della build del lab con l'intera lista dei membri di `config_peerings.json`
+
+Esegue la build nel processo worker come `build_lab_in_worker`, misura la durata di ogni fase, il picco di memoria
+(RSS) del worker e del processo che riceve il lab, la dimensione della descrizione trasferita tra i processi.
+Termina con codice 1 se viene superato il budget di tempo o di memoria.
+Il deploy dipende da Docker e non viene eseguito, la sua durata è riportata nelle fasi del job di deploy.
+
+Uso: python build_profile.py [--config ixp.conf] [--time-budget SECONDI] [--memory-budget MIB]
+"""
+import argparse
+import pickle
+import resource
+import sys
+import time
+
+# Budget della build completa (worker e ricostruzione del lab nel processo API)
+BUILD_TIME_BUDGET = 20
+BUILD_MEMORY_BUDGET_MIB = 512
+
+
+def _peak_rss_mib(who: int = resource.RUSAGE_SELF) -> float:
+    # Su Linux `ru_maxrss` è in KiB
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def profile_build(ixp_configs_filename: str) -> dict:
+    """
+    Entry point del processo worker: build del lab con i tempi di ogni fase
+
+    Returns:
+        dict: descrizione serializzata del lab, durata delle fasi, numero di membri e dispositivi, picco RSS
+    """
+    from digital_twin.ixp.configuration.frr_scenario_configuration_applier import FrrScenarioConfigurationApplier
+    from digital_twin.ixp.network_scenario.network_scenario_manager import NetworkScenarioManager
+    from digital_twin.ixp.network_scenario.rs_manager import RouteServerManager
+    from log import set_logging
+    from start_lab import load_lab_settings, load_table_dump
+    from utils.lab_serialization import serialize_lab
+
+    set_logging()
+    timings = {}
+
+    def run_phase(name: str, func, *args):
+        phase_start = time.perf_counter()
+        result = func(*args)
+        timings[name] = round(time.perf_counter() - phase_start, 2)
+        return result
+
+    settings = run_phase("load_settings", load_lab_settings, ixp_configs_filename)
+    table_dump = run_phase("load_dumps", load_table_dump, settings)
+
+    def build():
+        net_scenario_manager = NetworkScenarioManager()
+        net_scenario = net_scenario_manager.build(table_dump)
+        FrrScenarioConfigurationApplier(table_dump).apply_to_network_scenario(net_scenario)
+        RouteServerManager().apply_to_network_scenario(net_scenario)
+        net_scenario_manager.interconnect(table_dump)
+        return net_scenario
+
+    lab = run_phase("build", build)
+    description = run_phase("serialize", serialize_lab, lab)
+
+    return {
+        "description": description,
+        "timings": timings,
+        "members": len(table_dump.entries),
+        "devices": len(lab.machines),
+        "peak_rss_mib": round(_peak_rss_mib(), 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Profile the lab build with the full member list")
+    parser.add_argument("--config", default="ixp.conf", help="Config file in the ixpconfigs folder")
+    parser.add_argument("--time-budget", type=float, default=BUILD_TIME_BUDGET, help="Build budget in seconds")
+    parser.add_argument("--memory-budget", type=float, default=BUILD_MEMORY_BUDGET_MIB, help="Peak RSS budget in MiB")
+    args = parser.parse_args()
+
+    from start_lab import load_lab_settings, run_in_worker
+    from utils.lab_serialization import deserialize_lab
+
+    start = time.perf_counter()
+    result = run_in_worker(profile_build, args.config)
+    worker_elapsed = time.perf_counter() - start
+
+    timings = result["timings"]
+    # Avvio del processo, import e trasferimento della descrizione
+    timings["worker_overhead"] = round(worker_elapsed - sum(timings.values()), 2)
+    description_size = len(pickle.dumps(result["description"], protocol=pickle.HIGHEST_PROTOCOL))
+
+    phase_start = time.perf_counter()
+    load_lab_settings(args.config)
+    deserialize_lab(result["description"])
+    timings["deserialize"] = round(time.perf_counter() - phase_start, 2)
+    total = round(time.perf_counter() - start, 2)
+    peak_rss = max(result["peak_rss_mib"], _peak_rss_mib())
+
+    print(f"Members: {result['members']}, devices: {result['devices']}, "
+          f"description: {description_size / 2 ** 20:.1f} MiB")
+    for name, elapsed in timings.items():
+        print(f"  {name:<16}{elapsed:>8.2f}s")
+    print(f"Total: {total:.2f}s (budget {args.time_budget}s)")
+    print(f"Peak RSS: worker {result['peak_rss_mib']:.0f} MiB, API process {_peak_rss_mib():.0f} MiB "
+          f"(budget {args.memory_budget:.0f} MiB)")
+
+    return 0 if total <= args.time_budget and peak_rss <= args.memory_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
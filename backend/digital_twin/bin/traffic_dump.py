@@ -1,18 +1,33 @@
 import argparse
+import heapq
 import ipaddress
 import json
 import logging
+import sys
+import threading
+import time
 
 from scapy.all import sniff
 from scapy.arch import get_if_hwaddr
-from scapy.layers.inet import IP, ICMP, TCP
+from scapy.layers.inet import IP, ICMP, TCP, UDP
 from scapy.layers.inet6 import IPv6, ICMPv6ND_NA, ICMPv6ND_NS, ICMPv6EchoRequest, ICMPv6EchoReply
-from scapy.layers.l2 import Ether, ARP, STP
+from scapy.layers.l2 import Ether, Dot3, ARP, STP
 from scapy.packet import Packet
 from scapy.sessions import IPSession
 
 logging.getLogger("scapy.runtime").setLevel(logging.ERROR)
 
+# Destination MAC of STP BPDUs
+STP_MAC = "01:80:c2:00:00:00"
+# Above this size the whitelist is only applied in Python, to keep the BPF program within the kernel limits
+MAX_BPF_WHITELIST_MACS = 256
+# Number of unauthorized packets kept as samples, the others are only counted per flow
+MAX_SAMPLES = 20
+# Number of flows counted separately, packets of further flows are only counted as `other`
+MAX_FLOWS = 1000
+# Number of flows (by packet count) in the incremental reports, the final one has all the counted flows
+REPORT_TOP_FLOWS = 20
+
 
 def get_packet_layers(packet):
     counter = 0
@@ -70,6 +85,86 @@ def is_unauthorized_pkt(
     return True
 
 
+def packet_summary(pkt: Packet) -> str:
+    return " / ".join([layer.mysummary() for layer in get_packet_layers(pkt)])
+
+
+def flow_signature(pkt: Packet) -> tuple:
+    l2 = pkt[Ether] if Ether in pkt else pkt[Dot3]
+    ethertype = getattr(l2, "type", None)
+
+    proto = None
+    if IP in pkt:
+        proto = pkt[IP].proto
+    elif IPv6 in pkt:
+        proto = pkt[IPv6].nh
+
+    port = None
+    if TCP in pkt:
+        port = pkt[TCP].dport
+    elif UDP in pkt:
+        port = pkt[UDP].dport
+
+    return l2.src, l2.dst, ethertype, proto, port
+
+
+class TrafficAggregator:
+    __slots__ = ['flows', 'other', 'samples', 'total', 'start_time', '_lock']
+
+    def __init__(self) -> None:
+        self.flows: dict[tuple, int] = {}
+        # Packets of the flows seen after reaching MAX_FLOWS (e.g. spoofed MACs or port scans)
+        self.other: int = 0
+        self.samples: list[str] = []
+        self.total: int = 0
+        self.start_time: float = time.monotonic()
+        self._lock: threading.Lock = threading.Lock()
+
+    def add(self, pkt: Packet) -> None:
+        signature = flow_signature(pkt)
+        with self._lock:
+            self.total += 1
+            if signature in self.flows:
+                self.flows[signature] += 1
+            elif len(self.flows) < MAX_FLOWS:
+                self.flows[signature] = 1
+            else:
+                self.other += 1
+            if len(self.samples) < MAX_SAMPLES:
+                self.samples.append(packet_summary(pkt))
+
+    def emit(self, final: bool = False) -> None:
+        with self._lock:
+            flows = self.flows.items() if final else heapq.nlargest(
+                REPORT_TOP_FLOWS, self.flows.items(), key=lambda x: x[1]
+            )
+            report = {
+                "final": final,
+                "elapsed": round(time.monotonic() - self.start_time, 1),
+                "total": self.total,
+                "flow_count": len(self.flows),
+                "flows": [
+                    {"src": src, "dst": dst, "ethertype": ethertype, "proto": proto, "port": port, "count": count}
+                    for (src, dst, ethertype, proto, port), count in flows
+                ],
+                "other": self.other,
+                "samples": list(self.samples),
+            }
+
+        # One JSON report per line, read incrementally by the parent
+        sys.stdout.write(json.dumps(report) + "\n")
+        sys.stdout.flush()
+
+
+def build_bpf_filter(macs_whitelist: set, mac: str) -> str:
+    # Only STP frames and frames involving the participant's MAC can be unauthorized
+    participant_filter = f"ether host {mac}"
+    if len(macs_whitelist) <= MAX_BPF_WHITELIST_MACS:
+        participant_filter += "".join(f" and not ether host {x}" for x in sorted(macs_whitelist) if x != mac)
+
+    return f"(ether dst {STP_MAC}) or ({participant_filter})"
+
+
 def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument('iface', nargs=1, type=str)
@@ -78,6 +173,9 @@ def parse_args():
     parser.add_argument('mac', nargs=1, type=str)
     parser.add_argument('ip', nargs=1, type=str)
     parser.add_argument('version', nargs=1, type=int)
+    parser.add_argument('--no-ip-session', dest='ip_session', action='store_false', default=True)
+    parser.add_argument('--report-interval', type=int, default=10)
+    parser.add_argument('--stop-on-violation', action='store_true', default=False)
 
     return parser.parse_args()
 
@@ -94,21 +192,35 @@ def main(args):
     local_iface_mac = get_if_hwaddr(iface)
     macs_whitelist.add(local_iface_mac)
 
-    unauthorized_pkts: list[Packet] = []
+    aggregator = TrafficAggregator()
+    stop_event = threading.Event()
+
+    def report_loop():
+        while not stop_event.wait(args.report_interval):
+            aggregator.emit()
 
-    def packet_callback(pkt):
+    def stop_filter(pkt):
         if is_unauthorized_pkt(pkt, macs_whitelist, mac, ip, version):
-            unauthorized_pkts.append(pkt)
+            aggregator.add(pkt)
+            return args.stop_on_violation
+
+        return False
+
+    reporter = threading.Thread(target=report_loop, daemon=True)
+    reporter.start()
 
     sniff(
         iface=iface,
-        session=IPSession,
-        prn=packet_callback,
+        filter=build_bpf_filter(macs_whitelist, mac),
+        session=IPSession if args.ip_session else None,
+        stop_filter=stop_filter,
         store=False,
         timeout=sniff_time
     )
 
-    print(json.dumps([" / ".join([layer.mysummary() for layer in get_packet_layers(x)]) for x in unauthorized_pkts]))
+    stop_event.set()
+    reporter.join()
+    aggregator.emit(final=True)
     exit(0)
 
 
@@ -32,6 +32,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('--ipv6', type=ipaddress.IPv6Address, required=False)
     parser.add_argument('--exclude_checks', type=str, required=False, default="")
     parser.add_argument('--result-level', type=int, required=False, default=WARNING)
+    parser.add_argument('--deadline', type=float, required=False, default=None)
 
     return parser.parse_args()
 
@@ -56,9 +57,9 @@ if __name__ == "__main__":
         exit(1)
 
     action_manager = ActionManager(exclude=args.exclude_checks.split(','))
-    kwargs = {k: v for k, v in vars(args).items()}
-    results = action_manager.check(net_scenario, entries, **kwargs)
-    all_passed = all([x.passed() for x in results])
-
-    for result in results:
+    kwargs = {k: v for k, v in vars(args).items() if k != "deadline"}
+    results = []
+    for result in action_manager.check_iter(net_scenario, entries, deadline=args.deadline, **kwargs):
         result.print(level=args.result_level)
+        results.append(result)
+    all_passed = all([x.passed() for x in results])
@@ -54,15 +54,29 @@ BGPD_NEIGHBOR_IPV6_ROUTE_MAP_IN = "  neighbor {ip} route-map PREFER_IPV6_GLOBAL
 
 BGPD_NETWORK_ANNOUNCEMENT = "  network {net}"
 
-
 # ---------------------------  End of BGP configuration templates -----------------------------------------------
 
+BGPD_CONFIG_PATH = "/etc/frr/bgpd.conf"
+FRR_RESTART_COMMAND = "systemctl restart frr"
+# Only the delta between the running and the new configuration is pushed through vtysh, so BGP sessions towards the
+# route servers are kept up. If the script is not available in the image, fall back to a full restart.
+FRR_RELOAD_SCRIPT = "/usr/lib/frr/frr-reload.py"
+# `--stdout` sends the script log to stdout instead of its log file, `--daemon` is needed for a per-daemon config.
+# The exit code of the script is propagated, so a failed reload is also caught by `copy_and_exec_by_device_info`.
+FRR_INCREMENTAL_RELOAD_COMMAND = (
+    f'/bin/bash -c "if [ -x {FRR_RELOAD_SCRIPT} ]; then '
+    f'{FRR_RELOAD_SCRIPT} --reload --stdout --daemon bgpd {BGPD_CONFIG_PATH}; '
+    f'else {FRR_RESTART_COMMAND}; fi"'
+)
+
 
 class FrrScenarioConfigurationApplier(ScenarioConfigurationApplier):
-    __slots__ = ["_table_dump"]
+    __slots__ = ["_table_dump", "_incremental_reload"]
 
-    def __init__(self, table_dump: TableDump) -> None:
-        self._table_dump: TableDump = table_dump
+    def __init__(self, table_dump: TableDump | None, incremental_reload: bool = False) -> None:
+        # Without a table dump, only the configurations already rendered in the network scenario can be applied
+        self._table_dump: TableDump | None = table_dump
+        self._incremental_reload: bool = incremental_reload
 
     def apply_to_network_scenario(self, net_scenario: Lab) -> None:
         for as_num, neighbour in self._table_dump.entries.items():
@@ -87,15 +101,59 @@ class FrrScenarioConfigurationApplier(ScenarioConfigurationApplier):
                 bgpd_configuration = self._write_device_configuration(neigh_router)
                 bgpd_configuration_io = io.StringIO("\n".join(bgpd_configuration))
                 device_info[device] = (
-                    {"/etc/frr/bgpd.conf": bgpd_configuration_io},
-                    "systemctl restart frr",
-                    lambda stdout, stderr: False
+                    {BGPD_CONFIG_PATH: bgpd_configuration_io},
+                    self.command_config_reload(),
+                    self.config_has_errors
                 )
 
                 logging.info(f"Configuration information retrieved for device `{device_name}`: {device_info[device]}")
 
         return device_info
 
+    def get_rendered_device_info(
+            self, net_scenario: Lab, device_names: set[str]
+    ) -> dict[Machine, (dict[str, str], str)]:
+        device_info = {}
+        for device_name in sorted(device_names):
+            device: Machine = net_scenario.get_machine(device_name)
+            bgpd_configuration_io = io.StringIO(net_scenario.fs.readtext(f"{device_name}{BGPD_CONFIG_PATH}"))
+            device_info[device] = (
+                {BGPD_CONFIG_PATH: bgpd_configuration_io},
+                self.command_config_reload(),
+                self.config_has_errors
+            )
+
+        return device_info
+
+    def render_configurations(self, net_scenario: Lab, exclude: set[str]) -> None:
+        # Only bgpd.conf is written, the devices are already running with the other FRR files
+        for as_num, neighbour in self._table_dump.entries.items():
+            for neigh_router in neighbour.routers.values():
+                device_name = f"{as_num}_{neigh_router.router_id}"
+                if net_scenario.has_machine(device_name) and device_name not in exclude:
+                    device: Machine = net_scenario.get_machine(device_name)
+                    device.create_file_from_list(self._write_device_configuration(neigh_router), BGPD_CONFIG_PATH)
+
+    @staticmethod
+    def read_configurations(net_scenario: Lab) -> dict[str, str]:
+        configurations = {}
+        for device_name in net_scenario.machines.keys():
+            path = f"{device_name}{BGPD_CONFIG_PATH}"
+            if net_scenario.fs.exists(path):
+                configurations[device_name] = net_scenario.fs.readtext(path)
+
+        return configurations
+
+    def command_config_reload(self) -> str:
+        return FRR_INCREMENTAL_RELOAD_COMMAND if self._incremental_reload else FRR_RESTART_COMMAND
+
+    def config_has_errors(self, stdout: str, stderr: str) -> bool:
+        if not self._incremental_reload:
+            return False
+
+        # frr-reload.py logs the vtysh commands of the delta that were rejected, even when it exits with 0
+        return any(output is not None and "Failed to" in output for output in (stdout, stderr))
+
     def apply_to_devices(self, devices: dict[str, Machine]) -> None:
         for as_num, neighbour in self._table_dump.entries.items():
             for neigh_router in neighbour.routers.values():
@@ -115,7 +173,7 @@ class FrrScenarioConfigurationApplier(ScenarioConfigurationApplier):
         device.create_file_from_list(zebra_config, "/etc/frr/zebra.conf")
 
         bgpd_configuration = self._write_device_configuration(router)
-        device.create_file_from_list(bgpd_configuration, "/etc/frr/bgpd.conf")
+        device.create_file_from_list(bgpd_configuration, BGPD_CONFIG_PATH)
 
         with device.lab.fs.open(f"{device.name}.startup", "a") as startup:
             startup.write("systemctl start frr\n")
@@ -2,13 +2,15 @@ import ipaddress
 import logging
 import os
 from datetime import datetime
-from typing import Callable
+from typing import Callable, Generator, Iterable
 
 from Kathara.model.Machine import Machine
 
 from ... import utils
+from ...foundation.configuration.vendor_commands_mixin import NEIGHBOR_RIB_SEPARATOR
 from ...foundation.configuration.vendor_device import VendorDevice
-from ...regex import BIRD_SESSION_REMOTE_AS, BIRD_SESSION_UPTIME, BIRD_RIB_NEXTHOP, BIRD_RIB_PREFIX, BIRD_RIB_AS_PATH
+from ...model.rib_route import RibRoute, pack_address, pack_prefix, parse_as_path, routes_to_rib
+from ...regex import BIRD_SESSION_REMOTE_AS, BIRD_SESSION_UPTIME
 
 
 class BirdVendorDevice(VendorDevice):
@@ -69,6 +71,23 @@ class BirdVendorDevice(VendorDevice):
                 f'awk \'BEGIN{{RS = \\"\\n\\n\\"}} /Neighbor address: {session_ip}\\n/ {{print $1}}\'); '
                 f'{bird_bin} \\"show route protocol $name all\\" | tail -n +2"')
 
+    def command_neighbor_info_and_rib(
+            self, device: Machine, session_ip: ipaddress.IPv4Address | ipaddress.IPv6Address
+    ) -> str:
+        bird_bin = self.get_birdc_bin(device)
+        return (f'/bin/bash -c "name=$({bird_bin} \\"show protocols all\\" | '
+                f'awk \'BEGIN{{RS = \\"\\n\\n\\"}} /Neighbor address: {session_ip}\\n/ {{print $1}}\'); '
+                f'{bird_bin} \\"show protocols all $name\\" | tail -n +2; '
+                f'echo {NEIGHBOR_RIB_SEPARATOR}; '
+                f'{bird_bin} \\"show route protocol $name all\\" | tail -n +2"')
+
+    def command_rib(self, device: Machine, version: int) -> str:
+        bird_bin = self.get_birdc_bin(device)
+        # BIRD 2 and 3 keep both address families in the same daemon, one table each
+        image = device.get_image()
+        table = f" table master{version}" if "bird2" in image or "bird3" in image else ""
+        return f'/bin/bash -c "{bird_bin} \\"show route{table} all\\" | tail -n +2"'
+
     def parse_bgp_neighbor_state(self, bgp_output: str) -> dict:
         matches = BIRD_SESSION_REMOTE_AS.search(bgp_output)
         remote_as = matches.group(1) if matches else None
@@ -82,32 +101,61 @@ class BirdVendorDevice(VendorDevice):
         return {"remote_as": int(remote_as) if remote_as else None, "uptime": uptime}
 
     def parse_bgp_neighbor_rib(self, bgp_output: str) -> dict:
-        entries = bgp_output.strip().split("BGP.local_pref:")
-        rib = {}
+        return routes_to_rib(self.parse_bgp_neighbor_routes(bgp_output))
+
+    def parse_bgp_neighbor_routes(self, bgp_output: str | Iterable[str]) -> Generator[RibRoute, None, None]:
+        lines = bgp_output.splitlines() if isinstance(bgp_output, str) else bgp_output
+        as_paths = {}
+        next_hops = {}
+
+        prefix = None
+        next_hop = None
+        as_path = tuple()
+        for line in lines:
+            if line.startswith("\t"):
+                # Route attributes
+                if line.startswith("\tBGP.next_hop:"):
+                    # IPv6 routes also carry the link-local next hop, a truncated line has none
+                    raw_next_hop = (line[14:].split(maxsplit=1) or [""])[0]
+                    if raw_next_hop not in next_hops:
+                        try:
+                            next_hops[raw_next_hop] = pack_address(raw_next_hop)
+                        except (OSError, ValueError):
+                            next_hops[raw_next_hop] = None
+                    next_hop = next_hops[raw_next_hop]
+                elif line.startswith("\tBGP.as_path:"):
+                    raw_as_path = line[13:]
+                    if raw_as_path not in as_paths:
+                        # Use tuples since they are hashable in set, equal paths share the same object
+                        as_paths[raw_as_path] = parse_as_path(raw_as_path)
+                    as_path = as_paths[raw_as_path]
 
-        for entry in entries[:-1]:
-            prefix_match = BIRD_RIB_PREFIX.search(entry)
-            nexthop_match = BIRD_RIB_NEXTHOP.search(entry)
+                continue
 
-            matches = BIRD_RIB_AS_PATH.search(entry)
-            as_path = tuple()
-            if matches:
-                as_path = tuple(map(int, matches.group(1).strip().split()))  # Use tuples since they are hashable in set
+            if not line.strip() or line.startswith("Table "):
+                continue
 
-            prefix = ipaddress.ip_network(prefix_match.group(1)) if prefix_match else None
-            nexthop = ipaddress.ip_address(nexthop_match.group(1)) if nexthop_match else None
+            # A route header, additional paths of the same prefix are indented and do not repeat it
+            if prefix is not None and next_hop is not None:
+                yield RibRoute(prefix, next_hop, as_path)
 
-            if prefix is None or nexthop is None:
-                continue
+            if not line[0].isspace():
+                try:
+                    prefix = pack_prefix(line.split(maxsplit=1)[0])
+                except (OSError, ValueError):
+                    prefix = None
+            next_hop = None
+            as_path = tuple()
 
-            if prefix not in rib:
-                rib[prefix] = {}
-            if nexthop not in rib[prefix]:
-                rib[prefix][nexthop] = set()
+        if prefix is not None and next_hop is not None:
+            yield RibRoute(prefix, next_hop, as_path)
 
-            rib[prefix][nexthop].add(as_path)
+    # BIRD has no JSON output, its `command_*_json` return None so these are never used
+    def parse_bgp_neighbor_state_json(self, bgp_output: dict) -> dict | None:
+        return None
 
-        return rib
+    def parse_bgp_neighbor_routes_json(self, bgp_output: dict) -> Generator[RibRoute, None, None] | None:
+        return None
 
     @staticmethod
     def get_bird_bin(device: Machine) -> str:
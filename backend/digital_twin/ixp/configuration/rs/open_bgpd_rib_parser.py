@@ -0,0 +1,101 @@
+from typing import Generator, Iterable
+
+from ...model.rib_route import RibRoute, pack_address, pack_prefix, parse_as_path
+
+RIB_ENTRY_HEADER = "BGP routing table entry for "
+NEXTHOP_LINE = "Nexthop "
+
+# Parser states for `bgpctl show rib in detail` output
+STATE_IDLE = 0
+STATE_AS_PATH = 1
+STATE_ATTRIBUTES = 2
+
+
+def iter_detail_routes(lines: str | Iterable[str]) -> Generator[RibRoute, None, None]:
+    lines = lines.splitlines() if isinstance(lines, str) else lines
+    as_paths = {}
+    next_hops = {}
+
+    state = STATE_IDLE
+    prefix = None
+    next_hop = None
+    as_path = tuple()
+    for line in lines:
+        line = line.strip()
+
+        if line.startswith(RIB_ENTRY_HEADER):
+            if prefix is not None and next_hop is not None:
+                yield RibRoute(prefix, next_hop, as_path)
+
+            try:
+                prefix = pack_prefix(line[len(RIB_ENTRY_HEADER):].split(maxsplit=1)[0])
+            except (OSError, ValueError, IndexError):
+                prefix = None
+            next_hop = None
+            as_path = tuple()
+            state = STATE_AS_PATH if prefix is not None else STATE_IDLE
+        elif not line:
+            # Entries are separated by blank lines
+            if prefix is not None and next_hop is not None:
+                yield RibRoute(prefix, next_hop, as_path)
+
+            prefix = None
+            state = STATE_IDLE
+        elif state == STATE_AS_PATH:
+            # The line after the header is the AS Path, "empty" for locally originated routes
+            if line not in as_paths:
+                # Use tuples since they are hashable in set, equal paths share the same object
+                as_paths[line] = parse_as_path(line)
+            as_path = as_paths[line]
+            state = STATE_ATTRIBUTES
+        elif state == STATE_ATTRIBUTES and line.startswith(NEXTHOP_LINE):
+            raw_next_hop = line[len(NEXTHOP_LINE):].split(maxsplit=1)[0]
+            if raw_next_hop not in next_hops:
+                try:
+                    next_hops[raw_next_hop] = pack_address(raw_next_hop)
+                except (OSError, ValueError):
+                    next_hops[raw_next_hop] = None
+            next_hop = next_hops[raw_next_hop]
+
+        # Any other line (origin, communities and their continuation lines, ...) is ignored
+
+    if prefix is not None and next_hop is not None:
+        yield RibRoute(prefix, next_hop, as_path)
+
+
+def iter_json_routes(result: dict) -> Generator[RibRoute, None, None]:
+    # Output of `bgpctl -j show rib`, the same attributes of the detailed output are already split into fields
+    entries = result.get("rib", None) if isinstance(result, dict) else None
+    if not isinstance(entries, list):
+        return
+
+    as_paths = {}
+    next_hops = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+
+        raw_prefix = entry.get("prefix", None)
+        raw_next_hop = entry.get("exit_nexthop", None)
+        raw_as_path = entry.get("aspath", "")
+        if not isinstance(raw_prefix, str) or not isinstance(raw_next_hop, str) or not isinstance(raw_as_path, str):
+            continue
+
+        try:
+            prefix = pack_prefix(raw_prefix)
+        except (OSError, ValueError):
+            continue
+
+        if raw_next_hop not in next_hops:
+            try:
+                next_hops[raw_next_hop] = pack_address(raw_next_hop)
+            except (OSError, ValueError):
+                next_hops[raw_next_hop] = None
+        next_hop = next_hops[raw_next_hop]
+        if next_hop is None:
+            continue
+
+        if raw_as_path not in as_paths:
+            as_paths[raw_as_path] = parse_as_path(raw_as_path)
+
+        yield RibRoute(prefix, next_hop, as_paths[raw_as_path])
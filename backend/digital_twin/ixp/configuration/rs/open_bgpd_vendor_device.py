@@ -1,11 +1,14 @@
 import ipaddress
 import logging
-from typing import Callable
+from typing import Callable, Generator, Iterable
 
 from Kathara.model.Machine import Machine
 
+from ...foundation.configuration.vendor_commands_mixin import NEIGHBOR_RIB_SEPARATOR
 from ...foundation.configuration.vendor_device import VendorDevice
-from ...regex import OPENBGPD_SESSION_REMOTE_AS, OPENBGPD_SESSION_UPTIME, OPENBGPD_RIB_PREFIX, OPENBGPD_RIB_NEXTHOP
+from ...model.rib_route import RibRoute, routes_to_rib
+from ...regex import OPENBGPD_SESSION_REMOTE_AS, OPENBGPD_SESSION_UPTIME
+from .open_bgpd_rib_parser import iter_detail_routes, iter_json_routes
 
 
 class OpenBgpdVendorDevice(VendorDevice):
@@ -37,6 +40,25 @@ class OpenBgpdVendorDevice(VendorDevice):
     ) -> str:
         return f"/usr/sbin/bgpctl show rib in detail neighbor {session_ip}"
 
+    def command_neighbor_info_and_rib(
+            self, device: Machine, session_ip: ipaddress.IPv4Address | ipaddress.IPv6Address
+    ) -> str:
+        return (f'/bin/sh -c "/usr/sbin/bgpctl show neighbor {session_ip}; echo {NEIGHBOR_RIB_SEPARATOR}; '
+                f'/usr/sbin/bgpctl show rib in detail neighbor {session_ip}"')
+
+    def command_rib(self, device: Machine, version: int) -> str:
+        return f"/usr/sbin/bgpctl show rib in detail {'inet' if version == 4 else 'inet6'}"
+
+    def command_neighbor_info_and_rib_json(
+            self, device: Machine, session_ip: ipaddress.IPv4Address | ipaddress.IPv6Address
+    ) -> str | None:
+        # Chained with && so that a `bgpctl` without `-j` support fails right away
+        return (f'/bin/sh -c "/usr/sbin/bgpctl -j show neighbor {session_ip} && echo {NEIGHBOR_RIB_SEPARATOR} && '
+                f'/usr/sbin/bgpctl -j show rib in neighbor {session_ip}"')
+
+    def command_rib_json(self, device: Machine, version: int) -> str | None:
+        return f"/usr/sbin/bgpctl -j show rib in {'inet' if version == 4 else 'inet6'}"
+
     def parse_bgp_neighbor_state(self, bgp_output: str) -> dict:
         matches = OPENBGPD_SESSION_REMOTE_AS.search(bgp_output)
         remote_as = matches.group(1) if matches else None
@@ -47,25 +69,24 @@ class OpenBgpdVendorDevice(VendorDevice):
         return {"remote_as": int(remote_as) if remote_as else None, "uptime": uptime}
 
     def parse_bgp_neighbor_rib(self, bgp_output: str) -> dict:
-        entries = bgp_output.strip().split("\n\n")
-        rib = {}
+        return routes_to_rib(self.parse_bgp_neighbor_routes(bgp_output))
 
-        for entry in entries:
-            prefix_match = OPENBGPD_RIB_PREFIX.search(entry)
-            nexthop_match = OPENBGPD_RIB_NEXTHOP.search(entry)
+    def parse_bgp_neighbor_routes(self, bgp_output: str | Iterable[str]) -> Generator[RibRoute, None, None]:
+        return iter_detail_routes(bgp_output)
 
-            lines = entry.split("\n")
-            as_number_line = lines[1].strip()  # First line is the AS Path
-            as_path = tuple(map(int, as_number_line.split()))  # Use tuples since they are hashable in set
+    def parse_bgp_neighbor_state_json(self, bgp_output: dict) -> dict:
+        neighbors = bgp_output.get("neighbors", [])
+        neighbor = neighbors[0] if neighbors else {}
 
-            prefix = ipaddress.ip_network(prefix_match.group(1)) if prefix_match else None
-            nexthop = ipaddress.ip_address(nexthop_match.group(1)) if nexthop_match else None
+        try:
+            remote_as = int(neighbor["remote_as"])
+        except (KeyError, TypeError, ValueError):
+            remote_as = None
 
-            if prefix not in rib:
-                rib[prefix] = {}
-            if nexthop not in rib[prefix]:
-                rib[prefix][nexthop] = set()
+        # As in the text output, the uptime is only reported for established sessions
+        uptime = neighbor.get("last_updown", None) if neighbor.get("state", None) == "Established" else None
 
-            rib[prefix][nexthop].add(as_path)
+        return {"remote_as": remote_as, "uptime": uptime}
 
-        return rib
+    def parse_bgp_neighbor_routes_json(self, bgp_output: dict) -> Generator[RibRoute, None, None]:
+        return iter_json_routes(bgp_output)
@@ -3,6 +3,9 @@ from abc import ABC, abstractmethod
 
 from Kathara.model.Machine import Machine
 
+# Printed between the neighbor information and the neighbor RIB in `command_neighbor_info_and_rib` output
+NEIGHBOR_RIB_SEPARATOR = "---IXP-NEIGHBOR-RIB---"
+
 
 class VendorCommandsMixin(ABC):
     @abstractmethod
@@ -16,3 +19,23 @@ class VendorCommandsMixin(ABC):
     @abstractmethod
     def command_neighbor_rib(self, device: Machine, session_ip: ipaddress.IPv4Address | ipaddress.IPv6Address) -> str:
         raise NotImplementedError("You must implement `command_neighbor_rib` method.")
+
+    @abstractmethod
+    def command_neighbor_info_and_rib(
+            self, device: Machine, session_ip: ipaddress.IPv4Address | ipaddress.IPv6Address
+    ) -> str:
+        raise NotImplementedError("You must implement `command_neighbor_info_and_rib` method.")
+
+    @abstractmethod
+    def command_rib(self, device: Machine, version: int) -> str:
+        raise NotImplementedError("You must implement `command_rib` method.")
+
+    def command_neighbor_info_and_rib_json(
+            self, device: Machine, session_ip: ipaddress.IPv4Address | ipaddress.IPv6Address
+    ) -> str | None:
+        # Same as `command_neighbor_info_and_rib` with machine-readable output, None if the vendor has no JSON mode
+        return None
+
+    def command_rib_json(self, device: Machine, version: int) -> str | None:
+        # Same as `command_rib` with machine-readable output, None if the vendor has no JSON mode
+        return None
@@ -1,4 +1,8 @@
 from abc import ABC, abstractmethod
+from typing import Generator, Iterable
+
+from .vendor_commands_mixin import NEIGHBOR_RIB_SEPARATOR
+from ...model.rib_route import RibRoute
 
 
 class VendorFormatParserMixin(ABC):
@@ -9,3 +13,22 @@ class VendorFormatParserMixin(ABC):
     @abstractmethod
     def parse_bgp_neighbor_rib(self, result: str) -> dict:
         raise NotImplementedError("You must implement `parse_bgp_neighbor_rib` method.")
+
+    @abstractmethod
+    def parse_bgp_neighbor_routes(self, result: str | Iterable[str]) -> Generator[RibRoute, None, None]:
+        raise NotImplementedError("You must implement `parse_bgp_neighbor_routes` method.")
+
+    # Parsers of the JSON commands output, vendors without JSON commands (returning None) implement them returning None
+    @abstractmethod
+    def parse_bgp_neighbor_state_json(self, result: dict) -> dict | None:
+        raise NotImplementedError("You must implement `parse_bgp_neighbor_state_json` method.")
+
+    @abstractmethod
+    def parse_bgp_neighbor_routes_json(self, result: dict) -> Generator[RibRoute, None, None] | None:
+        raise NotImplementedError("You must implement `parse_bgp_neighbor_routes_json` method.")
+
+    @staticmethod
+    def split_neighbor_info_and_rib(result: str) -> (str, str):
+        (info, _, rib) = result.partition(f"{NEIGHBOR_RIB_SEPARATOR}\n")
+
+        return info, rib
@@ -1,7 +1,15 @@
+import random
 from abc import ABC, abstractmethod
 
+from ....foundation.exceptions import TableDumpError
 from ....model.bgp_neighbour import BGPNeighbour
 
+SELECTION_ALL: str = "all"
+SELECTION_FIRST: str = "first"
+SELECTION_TOP_ROUTES: str = "top_routes"
+SELECTION_RANDOM: str = "random"
+SELECTION_ASN_LIST: str = "asn_list"
+
 
 class TableDump(ABC):
     __slots__ = ["entries"]
@@ -12,3 +20,30 @@ class TableDump(ABC):
     @abstractmethod
     def load_from_file(self, path: str) -> None:
         raise NotImplementedError("You must implement `load_from_file` method.")
+
+    def select_entries(
+            self, strategy: str = SELECTION_ALL, limit: int | None = None, asns: list[int] | None = None,
+            seed: int | None = None
+    ) -> None:
+        if strategy in [SELECTION_ALL, SELECTION_FIRST]:
+            selected = list(self.entries.keys())
+        elif strategy == SELECTION_TOP_ROUTES:
+            selected = sorted(self.entries.keys(), key=lambda x: self._count_routes(self.entries[x]), reverse=True)
+        elif strategy == SELECTION_RANDOM:
+            selected = list(self.entries.keys())
+            random.Random(seed).shuffle(selected)
+        elif strategy == SELECTION_ASN_LIST:
+            if not asns:
+                raise TableDumpError(f"Selection strategy `{strategy}` requires a list of ASNs.")
+            selected = [name for name in (f"as{asn}" for asn in asns) if name in self.entries]
+        else:
+            raise TableDumpError(f"Unknown members selection strategy `{strategy}`.")
+
+        if limit is not None and strategy != SELECTION_ALL:
+            selected = selected[:limit]
+
+        self.entries = {name: self.entries[name] for name in selected}
+
+    @staticmethod
+    def _count_routes(neighbour: BGPNeighbour) -> int:
+        return sum(len(router.routes[4]) + len(router.routes[6]) for router in neighbour.routers.values())
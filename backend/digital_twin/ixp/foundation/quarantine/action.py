@@ -1,9 +1,20 @@
+import logging
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
 
 from Kathara.model.Lab import Lab
+from Kathara.model.Machine import Machine
 
 from ...model.bgp_neighbour import BGPNeighbour
 from ...network_scenario.rs_manager import RouteServerManager
+from ...settings.settings import Settings
+
+T = TypeVar('T')
+
+# Keyword argument carrying the event set by the ActionManager when the deadline of the run expires
+STOP_EVENT_ARG = "stop_event"
 
 
 class Action(ABC):
@@ -18,6 +29,14 @@ class Action(ABC):
     ) -> None:
         pass
 
+    def depends_on(self) -> list[str]:
+        return []
+
+    @staticmethod
+    def get_stop_event(kwargs: dict) -> threading.Event | None:
+        # Long-running verifications must return as soon as it is set, `clean` is called only afterwards
+        return kwargs.get(STOP_EVENT_ARG, None)
+
     @abstractmethod
     def name(self) -> str:
         raise NotImplementedError("You must implement `name` method.")
@@ -25,3 +44,24 @@ class Action(ABC):
     @abstractmethod
     def display_name(self) -> str:
         raise NotImplementedError("You must implement `display_name` method.")
+
+    @staticmethod
+    def run_on_route_servers(net_scenario: Lab, verify_rs: Callable[[str, dict, Machine], T]) -> dict[str, T]:
+        route_servers = {}
+        for rs_name, rs_config in Settings.get_instance().route_servers.items():
+            if not net_scenario.has_machine(rs_name):
+                logging.warning(f"Skipping RS `{rs_name}` since not in the network scenario...")
+                continue
+
+            route_servers[rs_name] = (rs_config, net_scenario.get_machine(rs_name))
+
+        if not route_servers:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=len(route_servers)) as executor:
+            futures = {
+                rs_name: executor.submit(verify_rs, rs_name, rs_config, rs_device)
+                for rs_name, (rs_config, rs_device) in route_servers.items()
+            }
+
+        return {rs_name: future.result() for rs_name, future in futures.items()}
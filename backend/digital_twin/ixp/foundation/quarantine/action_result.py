@@ -17,6 +17,9 @@ class ActionResult:
     def add_result(self, status: int, reason: str | None = None, data: str | None = None) -> None:
         self.results.append({'status': status, 'reason': reason, 'data': data})
 
+    def extend(self, other: 'ActionResult') -> None:
+        self.results.extend(other.results)
+
     def passed(self) -> bool:
         return len(self.results) == 0 or not any([x['status'] == ERROR for x in self.results])
 
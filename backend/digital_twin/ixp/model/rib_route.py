@@ -0,0 +1,71 @@
+import ipaddress
+import socket
+from functools import lru_cache
+from typing import Iterable
+
+
+class RibRoute:
+    __slots__ = ["prefix", "next_hop", "as_path"]
+
+    def __init__(self, prefix: bytes, next_hop: bytes, as_path: tuple[int, ...]) -> None:
+        # Packed address followed by the prefix length
+        self.prefix: bytes = prefix
+        self.next_hop: bytes = next_hop
+        self.as_path: tuple[int, ...] = as_path
+
+    def __hash__(self) -> int:
+        return hash((self.prefix, self.next_hop, self.as_path))
+
+    def __eq__(self, other: "RibRoute") -> bool:
+        return self.prefix == other.prefix and self.next_hop == other.next_hop and self.as_path == other.as_path
+
+    def __str__(self) -> str:
+        return (f"RibRoute (prefix={unpack_prefix(self.prefix)}, next_hop={unpack_address(self.next_hop)}, "
+                f"as_path={self.as_path})")
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+def pack_address(address: str) -> bytes:
+    return socket.inet_pton(socket.AF_INET6 if ":" in address else socket.AF_INET, address)
+
+
+def parse_as_path(raw_as_path: str) -> tuple[int, ...]:
+    # AS sets and other tokens are skipped, `isdigit` alone also accepts characters like superscripts
+    return tuple(int(x) for x in raw_as_path.split() if x.isascii() and x.isdigit())
+
+
+def pack_prefix(prefix: str) -> bytes:
+    (address, _, prefix_len) = prefix.partition("/")
+    packed = pack_address(address)
+    max_prefix_len = len(packed) * 8
+    prefix_len = int(prefix_len) if prefix_len else max_prefix_len
+    if not 0 <= prefix_len <= max_prefix_len:
+        raise ValueError(f"Invalid prefix length in `{prefix}`")
+
+    return packed + bytes((prefix_len,))
+
+
+@lru_cache(maxsize=1024)
+def unpack_address(packed: bytes) -> ipaddress.IPv4Address | ipaddress.IPv6Address:
+    return ipaddress.ip_address(packed)
+
+
+def unpack_prefix(packed: bytes) -> ipaddress.IPv4Network | ipaddress.IPv6Network:
+    return ipaddress.ip_network((packed[:-1], packed[-1]), strict=False)
+
+
+def routes_to_rib(routes: Iterable[RibRoute]) -> dict:
+    # prefix -> next hop -> set of AS paths, next hops are usually shared so they are unpacked once
+    rib = {}
+    prefixes = {}
+    for route in routes:
+        if route.prefix not in prefixes:
+            prefixes[route.prefix] = unpack_prefix(route.prefix)
+        prefix = prefixes[route.prefix]
+
+        next_hops = rib.setdefault(prefix, {})
+        next_hops.setdefault(unpack_address(route.next_hop), set()).add(route.as_path)
+
+    return rib
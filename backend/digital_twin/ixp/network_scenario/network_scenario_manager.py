@@ -1,6 +1,9 @@
+import hashlib
 import itertools
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 
 from Kathara.manager.Kathara import Kathara
 from Kathara.model.ExternalLink import ExternalLink
@@ -17,12 +20,40 @@ from ..model.collision_domain import CollisionDomain
 from ..settings.settings import Settings
 from ..utils import chunk_list
 
+ARP_ENTRY_PREFIX: str = "ip neigh add"
+SHARED_FILES: tuple[str, ...] = ("shared", "shared.startup", "shared.shutdown")
+ARP_REFRESH_WORKERS: int = 8
+
+
+class ScenarioDiff:
+    __slots__ = ['kept', 'reconfigured', 'recreated', 'added', 'removed', 'arp_outdated']
+
+    def __init__(self) -> None:
+        self.kept: set[str] = set()
+        # Devices whose only change is in configuration files that can be reloaded in place
+        self.reconfigured: set[str] = set()
+        self.recreated: set[str] = set()
+        self.added: set[str] = set()
+        self.removed: set[str] = set()
+        # Running devices (not recreated) whose ARP entries changed
+        self.arp_outdated: set[str] = set()
+
+    def to_dict(self) -> dict[str, list[str]]:
+        return {name: sorted(getattr(self, name)) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return "ScenarioDiff(" + ", ".join(f"{name}={len(getattr(self, name))}" for name in self.__slots__) + ")"
+
 
 class NetworkScenarioManager:
     __slots__ = ['_net_scenario']
 
-    def __init__(self) -> None:
-        self._net_scenario: Lab = Lab(Settings.get_instance().scenario_name)
+    def __init__(self, net_scenario: Lab | None = None) -> None:
+        self._net_scenario: Lab = net_scenario if net_scenario else Lab(Settings.get_instance().scenario_name)
+
+    @property
+    def net_scenario(self) -> Lab:
+        return self._net_scenario
 
     def build(self, table_dump: TableDump) -> Lab:
         if not table_dump.entries:
@@ -78,8 +109,97 @@ class NetworkScenarioManager:
 
         return self._net_scenario
 
+    def diff(self, previous: Lab, running_machines: set[str], reconfigurable: set[str] | None = None) -> ScenarioDiff:
+        """
+        Compares the scenario with a previously built one (same hash) whose devices are partially running.
+        ARP entries are excluded from the device definitions, since they change whenever a member is added.
+        """
+        if reconfigurable is None:
+            reconfigurable = set()
+
+        (previous_shared, previous_fingerprints) = self._fingerprint(previous)
+        (shared, fingerprints) = self._fingerprint(self._net_scenario)
+
+        diff = ScenarioDiff()
+        diff.removed = running_machines - fingerprints.keys()
+        diff.added = fingerprints.keys() - running_machines
+
+        for name in fingerprints.keys() & running_machines:
+            (definition, files, arp_entries) = fingerprints[name]
+            previous_fingerprint = previous_fingerprints.get(name, None)
+            if previous_fingerprint is None or previous_shared != shared or previous_fingerprint[0] != definition:
+                diff.recreated.add(name)
+                continue
+
+            if previous_fingerprint[1] == files:
+                diff.kept.add(name)
+            elif name in reconfigurable:
+                diff.reconfigured.add(name)
+            else:
+                diff.recreated.add(name)
+                continue
+
+            if previous_fingerprint[2] != arp_entries:
+                diff.arp_outdated.add(name)
+
+        return diff
+
+    @staticmethod
+    def _fingerprint(lab: Lab) -> tuple[bytes, dict[str, tuple[bytes, bytes, frozenset[str]]]]:
+        files = {}
+        for path in lab.fs.walk.files():
+            files.setdefault(path.lstrip("/").split("/", 1)[0], []).append(path)
+
+        def files_digest(paths: list[str]) -> bytes:
+            digest = hashlib.sha256()
+            for path in sorted(paths):
+                digest.update(path.encode("utf-8"))
+                digest.update(lab.fs.readbytes(path))
+            return digest.digest()
+
+        shared = files_digest([path for name in SHARED_FILES for path in files.get(name, [])])
+
+        fingerprints = {}
+        for name, device in lab.machines.items():
+            definition = hashlib.sha256(repr((
+                sorted(device.meta.items(), key=lambda x: x[0]),
+                [(num, iface.link.name, iface.mac_address) for num, iface in sorted(device.interfaces.items())],
+            )).encode("utf-8"))
+
+            arp_entries = set()
+            for path in sorted(files.get(f"{name}.startup", []) + files.get(f"{name}.shutdown", [])):
+                definition.update(path.encode("utf-8"))
+                for line in lab.fs.readtext(path).splitlines():
+                    if line.startswith(ARP_ENTRY_PREFIX):
+                        arp_entries.add(line)
+                    else:
+                        definition.update(line.encode("utf-8") + b"\n")
+
+            fingerprints[name] = (definition.digest(), files_digest(files.get(name, [])), frozenset(arp_entries))
+
+        return shared, fingerprints
+
+    @staticmethod
+    def get_fabric_collision_domains(lab: Lab) -> dict[str, list[str]]:
+        if not lab.has_machine(SWITCH_DEVICE_NAME):
+            return {}
+
+        return {
+            interface.link.name: sorted(interface.link.machines.keys())
+            for interface in lab.get_machine(SWITCH_DEVICE_NAME).interfaces.values()
+            if interface.link.name not in [EXTERNAL_FABRIC_CD_NAME, BACKBONE_CD_NAME]
+        }
+
+    @staticmethod
+    def restore_collision_domains(fabric_collision_domains: dict[str, list[str]]) -> None:
+        # Devices get the same fabric collision domain of a previous scenario, so their interfaces do not change
+        for cd_name, device_names in fabric_collision_domains.items():
+            for device_name in device_names:
+                if device_name != SWITCH_DEVICE_NAME:
+                    CollisionDomain.get_instance().update_assignment(device_name, L2_FABRIC_CD_NAME, cd_name)
+
     def interconnect(self, table_dump: TableDump) -> None:
-        arp_entries_cmd = self._generate_arp_entries(table_dump)
+        arp_entries_cmd = self.generate_arp_entries(table_dump)
 
         switch_cds = set()
         for device in self._net_scenario.machines.values():
@@ -104,25 +224,29 @@ class NetworkScenarioManager:
         self._net_scenario.create_file_from_list(switch_startup_cmds, "switch.startup")
 
     def update_interconnection(
-            self, table_dump: TableDump, new_devices: dict[str, Machine], del_devices: set[str]
+            self, arp_entries: list[str], new_devices: dict[str, Machine], del_devices: set[str]
     ) -> None:
         logging.info("Updating network interconnections...")
 
-        arp_entries_cmd = "/bin/bash -c '" + "; ".join(self._generate_arp_entries(table_dump, del_devices)) + "'"
+        arp_entries_cmd = "/bin/bash -c '" + "; ".join(arp_entries) + "'"
 
         switch_cds = set()
         for device in new_devices.values():
             for interface in device.interfaces.values():
                 switch_cds.add(interface.link)
 
-        # Update arp entries in all the devices
-        for device in self._net_scenario.machines.values():
-            if device.name in [SWITCH_DEVICE_NAME, GATEWAY_DEVICE_NAME]:
-                continue
-
+        # Update arp entries in all the devices, except the ones removed from the scenario
+        def update_arp_entries(device: Machine) -> None:
             Kathara.get_instance().exec_obj(machine=device, command="ip neigh flush all dev eth0", stream=False)
             Kathara.get_instance().exec_obj(machine=device, command=arp_entries_cmd, stream=False)
 
+        devices = [
+            device for device in self._net_scenario.machines.values()
+            if device.name not in [SWITCH_DEVICE_NAME, GATEWAY_DEVICE_NAME] and device.name not in del_devices
+        ]
+        with ThreadPoolExecutor(max_workers=ARP_REFRESH_WORKERS) as executor:
+            list(executor.map(update_arp_entries, devices))
+
         switch = self._net_scenario.get_machine(SWITCH_DEVICE_NAME)
         switch_cmds = []
         for cd in switch_cds:
@@ -190,21 +314,31 @@ class NetworkScenarioManager:
 
         return peering_cd
 
-    def deploy_chunks(self) -> None:
+    def deploy_chunks(
+            self, progress_callback: Callable[[int, int], None] | None = None, selected_machines: set[str] | None = None
+    ) -> None:
         logging.info("Deploying network scenario...")
 
-        machines = set(self._net_scenario.machines.keys())
-        main_chunk = set(filter(lambda x: "rs" in x, machines))
-        main_chunk.add(SWITCH_DEVICE_NAME)
+        machines = set(self._net_scenario.machines.keys()) if selected_machines is None else set(selected_machines)
+        main_chunk = set(filter(lambda x: "rs" in x or x == SWITCH_DEVICE_NAME, machines))
+        if selected_machines is None:
+            main_chunk.add(SWITCH_DEVICE_NAME)
 
-        Kathara.get_instance().deploy_lab(self._net_scenario, selected_machines=main_chunk)
-        deployed_machines = len(main_chunk)
-        logging.info(f"Deployed devices: {deployed_machines}/{len(machines)}")
+        deployed_machines = 0
+        # An empty selection would deploy the whole scenario
+        if main_chunk:
+            Kathara.get_instance().deploy_lab(self._net_scenario, selected_machines=main_chunk)
+            deployed_machines = len(main_chunk)
+            logging.info(f"Deployed devices: {deployed_machines}/{len(machines)}")
+        if progress_callback:
+            progress_callback(deployed_machines, len(machines))
 
         for chunk in chunk_list(list(machines - main_chunk), 5):
             Kathara.get_instance().deploy_lab(self._net_scenario, selected_machines=set(chunk))
             deployed_machines += len(chunk)
             logging.info(f"Deployed devices: {deployed_machines}/{len(machines)}")
+            if progress_callback:
+                progress_callback(deployed_machines, len(machines))
 
         self.on_deploy()
 
@@ -281,7 +415,10 @@ class NetworkScenarioManager:
             stdout = stdout.decode("utf-8") if stdout else None
             stderr = stderr.decode("utf-8") if stderr else None
             if exit_code != 0:
-                logging.warning(f"Error while updating configuration in device `{device.name}`:\n{stderr}")
+                logging.warning(
+                    f"Error while updating configuration in device `{device.name}` (exit code {exit_code}):\n"
+                    f"{stderr or stdout}"
+                )
                 return 1
             else:
                 if not has_errors(stdout, stderr):
@@ -292,6 +429,41 @@ class NetworkScenarioManager:
 
         return 0
 
+    def undeploy_machines(self, machine_names: set[str]) -> None:
+        if not machine_names:
+            return
+
+        logging.info(f"Undeploying {len(machine_names)} devices...")
+        # Selected by name, devices removed from the scenario are not in `self._net_scenario` anymore
+        Kathara.get_instance().undeploy_lab(lab_hash=self._net_scenario.hash, selected_machines=machine_names)
+        logging.success("Devices undeployed!")
+
+    def refresh_arp_entries(self, machine_names: set[str]) -> None:
+        logging.info(f"Refreshing ARP entries in {len(machine_names)} devices...")
+
+        def refresh(device: Machine) -> None:
+            arp_entries = [
+                line for line in self._net_scenario.fs.readtext(f"{device.name}.startup").splitlines()
+                if line.startswith(ARP_ENTRY_PREFIX)
+            ]
+            Kathara.get_instance().exec_obj(machine=device, command="ip neigh flush all dev eth0", stream=False)
+            if arp_entries:
+                Kathara.get_instance().exec_obj(
+                    machine=device, command="/bin/bash -c '" + "; ".join(arp_entries) + "'", stream=False
+                )
+
+        with ThreadPoolExecutor(max_workers=ARP_REFRESH_WORKERS) as executor:
+            list(executor.map(refresh, [self._net_scenario.get_machine(name) for name in sorted(machine_names)]))
+
+        logging.success("ARP entries refreshed!")
+
+    def attach_api_objects(self) -> None:
+        # Devices of a scenario rebuilt from its description have no API object, needed to copy files and add links
+        for container in Kathara.get_instance().get_machines_api_objects(lab_hash=self._net_scenario.hash):
+            device_name = container.labels["name"]
+            if self._net_scenario.has_machine(device_name):
+                self._net_scenario.get_machine(device_name).api_object = container
+
     def undeploy(self, except_machines: set = None) -> None:
         if except_machines is None:
             except_machines = set()
@@ -304,7 +476,7 @@ class NetworkScenarioManager:
         logging.success("Network scenario undeployed!")
 
     @staticmethod
-    def _generate_arp_entries(table_dump: TableDump, exclude: set[str] | None = None) -> list[str]:
+    def generate_arp_entries(table_dump: TableDump, exclude: set[str] | None = None) -> list[str]:
         if exclude is None:
             exclude = set()
 
@@ -75,6 +75,7 @@ class RPKIManager(ScenarioConfigurationApplier):
                 logging.warning(
                     f"Skipping updating `external` RPKI since {GATEWAY_DEVICE_NAME} is not in the network scenario..."
                 )
+                return device_info
 
             gateway_device = net_scenario.get_machine(GATEWAY_DEVICE_NAME)
 
@@ -1,7 +1,11 @@
+import ipaddress
 import logging
 import os
-from typing import Callable
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable
 
+from Kathara.manager.Kathara import Kathara
 from Kathara.model.Lab import Lab
 from Kathara.model.Machine import Machine
 
@@ -10,16 +14,65 @@ from ..foundation.configuration.vendor_device import VendorDevice
 from ..globals import RESOURCES_FOLDER, L2_FABRIC_CD_NAME, BACKBONE_CD_NAME, BACKBONE_IP_PREFIX
 from ..model.collision_domain import CollisionDomain
 from ..model.ipam import IPAM, IPv4Pool
+from ..model.rib_route import RibRoute, routes_to_rib
+from ..regex import CLI_OPTION_REJECTED
 from ..settings.settings import Settings
-from ..utils import class_for_name
+from ..utils import class_for_name, json_loads
+
+
+class NeighborQueryResult:
+    __slots__ = ['exit_code', 'structured', '_conf', '_info_output', '_rib_output', '_state', '_rib', '_lock']
+
+    def __init__(self, conf: VendorDevice, exit_code: int, output: str | None, structured: bool = False) -> None:
+        self.exit_code: int = exit_code
+        # Whether the output is the JSON one of `command_neighbor_info_and_rib_json`, decoded right away so that
+        # a malformed output raises a ValueError here and can be queried again in text mode
+        self.structured: bool = structured
+        self._conf: VendorDevice = conf
+        (info_output, rib_output) = conf.split_neighbor_info_and_rib(output) if output else (None, None)
+        if structured:
+            (info_output, rib_output) = (json_loads(info_output), json_loads(rib_output))
+        self._info_output: str | dict | None = info_output
+        self._rib_output: str | dict | None = rib_output
+        self._state: dict | None = None
+        self._rib: dict | None = None
+        self._lock: threading.Lock = threading.Lock()
+
+    def has_output(self) -> bool:
+        return self._info_output is not None and self.exit_code == 0
+
+    # Outputs are parsed on first access, only by the actions that need them
+    def neighbor_state(self) -> dict:
+        with self._lock:
+            if self._state is None:
+                if self.structured:
+                    self._state = self._conf.parse_bgp_neighbor_state_json(self._info_output)
+                else:
+                    self._state = self._conf.parse_bgp_neighbor_state(self._info_output)
+
+            return self._state
+
+    def rib(self) -> dict:
+        with self._lock:
+            if self._rib is None:
+                if self.structured:
+                    self._rib = routes_to_rib(self._conf.parse_bgp_neighbor_routes_json(self._rib_output))
+                else:
+                    self._rib = self._conf.parse_bgp_neighbor_rib(self._rib_output)
+
+            return self._rib
 
 
 class RouteServerManager(ScenarioConfigurationApplier):
-    __slots__ = ["_configurations", "_ip_pool"]
+    __slots__ = ["_configurations", "_ip_pool", "_neighbor_queries", "_queries_lock", "_json_unsupported"]
 
     def __init__(self) -> None:
         self._configurations: dict[str, VendorDevice] = {}
         self._ip_pool: IPv4Pool = IPAM.get_instance().pool(BACKBONE_IP_PREFIX)
+        self._neighbor_queries: dict[tuple[str, str], Future] = {}
+        self._queries_lock: threading.Lock = threading.Lock()
+        # Vendors whose daemon in the lab does not support the JSON output mode
+        self._json_unsupported: set[str] = set()
 
     def apply_to_network_scenario(self, net_scenario: Lab) -> None:
         for name, rs in Settings.get_instance().route_servers.items():
@@ -86,3 +139,86 @@ class RouteServerManager(ScenarioConfigurationApplier):
             self._configurations[config_name] = class_for_name(module_name, class_name)()
 
         return self._configurations[config_name]
+
+    def query_neighbor(
+            self, rs_device: Machine, config_name: str, session_ip: ipaddress.IPv4Address | ipaddress.IPv6Address
+    ) -> NeighborQueryResult:
+        # Session information and RIB are fetched with a single exec, shared until `reset_neighbor_queries`
+        key = (rs_device.name, str(session_ip))
+        with self._queries_lock:
+            future = self._neighbor_queries.get(key, None)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._neighbor_queries[key] = future
+
+        if is_owner:
+            try:
+                future.set_result(self._query_neighbor(rs_device, config_name, session_ip))
+            except Exception as e:
+                future.set_exception(e)
+
+        return future.result()
+
+    def _query_neighbor(
+            self, rs_device: Machine, config_name: str, session_ip: ipaddress.IPv4Address | ipaddress.IPv6Address
+    ) -> NeighborQueryResult:
+        conf = self.get_config(config_name)
+
+        (result, exit_code, structured) = self._exec_json_or_text(
+            rs_device, config_name,
+            conf.command_neighbor_info_and_rib_json(rs_device, session_ip),
+            conf.command_neighbor_info_and_rib(rs_device, session_ip),
+            lambda output: NeighborQueryResult(conf, 0, output, structured=True)
+        )
+
+        return result if structured else NeighborQueryResult(conf, exit_code, result)
+
+    def query_rib(self, rs_device: Machine, config_name: str, version: int) -> (int, Iterable[RibRoute]):
+        """
+        Routes of the RS RIB for one address family, with the same JSON/text fallback of `query_neighbor`.
+        Routes are parsed while iterating, so the caller can aggregate them without building the whole RIB.
+        """
+        conf = self.get_config(config_name)
+
+        (result, exit_code, structured) = self._exec_json_or_text(
+            rs_device, config_name,
+            conf.command_rib_json(rs_device, version), conf.command_rib(rs_device, version), json_loads
+        )
+        if structured:
+            return exit_code, conf.parse_bgp_neighbor_routes_json(result)
+
+        return exit_code, conf.parse_bgp_neighbor_routes(result or "")
+
+    def _exec_json_or_text(
+            self, rs_device: Machine, config_name: str, json_cmd: str | None, cmd: str, decode: Callable[[str], Any]
+    ) -> (Any, int, bool):
+        """
+        Runs the JSON command, if the vendor has one and it was not rejected before, then the text one if it fails.
+        `decode` raises a ValueError on a malformed JSON output, which is then queried again in text mode.
+
+        Returns:
+            (Any, int, bool): decoded JSON output or text output, exit code, whether the output is the JSON one
+        """
+        if json_cmd is not None and config_name not in self._json_unsupported:
+            (stdout, stderr, exit_code) = Kathara.get_instance().exec_obj(rs_device, json_cmd, stream=False)
+            if exit_code == 0 and stdout:
+                try:
+                    return decode(stdout.decode("utf-8")), exit_code, True
+                except ValueError as e:
+                    logging.warning(f"Cannot decode JSON output on `{rs_device.name}`, using text: {e}")
+            elif CLI_OPTION_REJECTED.search(b"\n".join(x for x in (stderr, stdout) if x).decode("utf-8", "replace")):
+                # Only a rejected JSON option proves the lack of support, a missing neighbor also fails the query
+                logging.info(f"JSON output not supported by `{config_name}` on `{rs_device.name}`, using text...")
+                with self._queries_lock:
+                    self._json_unsupported.add(config_name)
+            else:
+                logging.debug(f"JSON query failed on `{rs_device.name}` (exit code {exit_code}), using text...")
+
+        (stdout, _, exit_code) = Kathara.get_instance().exec_obj(rs_device, cmd, stream=False)
+
+        return stdout.decode("utf-8") if stdout else None, exit_code, False
+
+    def reset_neighbor_queries(self) -> None:
+        with self._queries_lock:
+            self._neighbor_queries.clear()
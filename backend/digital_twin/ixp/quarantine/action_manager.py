@@ -1,12 +1,17 @@
 import logging
 import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Generator
 
 from Kathara.model.Lab import Lab
 
-from ..foundation.quarantine.action import Action
-from ..foundation.quarantine.action_result import ActionResult
+from ..foundation.quarantine.action import Action, STOP_EVENT_ARG
+from ..foundation.quarantine.action_result import ActionResult, ERROR
 from ..model.bgp_neighbour import BGPNeighbour
 from ..network_scenario.rs_manager import RouteServerManager
+from .connectivity.connectivity_prober import ConnectivityProber
 from ..settings.settings import Settings
 from ..utils import class_for_name
 
@@ -20,27 +25,93 @@ class ActionManager:
 
         self._load_actions(exclude)
 
-    def check(self, net_scenario: Lab, members: dict[str, BGPNeighbour], **kwargs) -> list[ActionResult]:
-        if 'asn' not in kwargs:
-            raise ValueError("No participant ASN specified.")
-        if 'mac' not in kwargs:
-            raise ValueError("No participant MAC address specified.")
-        if 'ipv4' not in kwargs and 'ipv6' not in kwargs:
-            raise ValueError("No participant IPv4 or IPv6 address specified.")
-
-        results = []
+    def check(
+            self, net_scenario: Lab, members: dict[str, BGPNeighbour], deadline: float | None = None, **kwargs
+    ) -> list[ActionResult]:
+        results = dict((result.action.name(), result) for result in
+                       self.check_iter(net_scenario, members, deadline=deadline, **kwargs))
 
-        logging.info("Starting quarantine checks...")
-        for action in self._actions.values():
-            logging.info(f"Starting `{action.display_name()}` verification...")
-            action_result = action.verify(net_scenario, members, self._rs_manager, **kwargs)
-            results.append(action_result)
+        return [results[action.name()] for action in self._actions.values() if action.name() in results]
 
-        return results
+    def check_iter(
+            self, net_scenario: Lab, members: dict[str, BGPNeighbour], deadline: float | None = None, **kwargs
+    ) -> Generator[ActionResult, None, None]:
+        self._check_participant_args(kwargs)
 
-    def run_action_by_name(
-            self, check_name: str, net_scenario: Lab, members: dict[str, BGPNeighbour], **kwargs
-    ) -> ActionResult:
+        logging.info("Starting quarantine checks...")
+        # RS queries and connectivity probes are shared by the actions of a single run only
+        self._rs_manager.reset_neighbor_queries()
+        ConnectivityProber.get_instance().reset_probes()
+
+        action_names = set(action.name() for action in self._actions.values())
+        pending = list(self._actions.values())
+        running: dict[Future, Action] = {}
+        completed = set()
+        end_time = time.monotonic() + deadline if deadline is not None else None
+        stop_event = threading.Event()
+        verify_kwargs = {**kwargs, STOP_EVENT_ARG: stop_event}
+
+        executor = ThreadPoolExecutor(max_workers=max(len(self._actions), 1), thread_name_prefix="quarantine")
+        try:
+            while pending or running:
+                for action in list(pending):
+                    # Dependencies on actions that are not configured (or excluded) are ignored
+                    dependencies = set(action.depends_on()) & action_names
+                    if dependencies <= completed:
+                        logging.info(f"Starting `{action.display_name()}` verification...")
+                        future = executor.submit(
+                            action.verify, net_scenario, members, self._rs_manager, **verify_kwargs
+                        )
+                        running[future] = action
+                        pending.remove(action)
+
+                timeout = max(end_time - time.monotonic(), 0) if end_time is not None else None
+                done, _ = wait(running.keys(), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+
+                for future in done:
+                    action = running.pop(future)
+                    completed.add(action.name())
+                    yield self._get_action_result(action, future)
+
+            # The late verifications are asked to stop, they are cleaned once they returned
+            stop_event.set()
+            for action in running.values():
+                logging.error(f"`{action.display_name()}` verification did not complete within {deadline}s.")
+                action_result = ActionResult(action)
+                action_result.add_result(ERROR, f"Verification did not complete within {deadline}s.")
+                yield action_result
+
+            for action in pending:
+                dependencies = ", ".join(sorted(set(action.depends_on()) - completed))
+                action_result = ActionResult(action)
+                action_result.add_result(ERROR, f"Verification not started, waiting for: {dependencies}.")
+                yield action_result
+        finally:
+            # Also reached when the consumer stops iterating, the run ends only when no verification is left
+            stop_event.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            for future, action in running.items():
+                if future.cancelled():
+                    continue
+                try:
+                    action.clean(net_scenario, members, self._rs_manager, **kwargs)
+                except Exception:
+                    logging.exception(f"Error while cleaning `{action.display_name()}` verification.")
+
+    @staticmethod
+    def _get_action_result(action: Action, future: Future) -> ActionResult:
+        try:
+            return future.result()
+        except Exception as e:
+            logging.exception(f"Error while running `{action.display_name()}` verification.")
+            action_result = ActionResult(action)
+            action_result.add_result(ERROR, f"Error while running verification: {e}")
+            return action_result
+
+    @staticmethod
+    def _check_participant_args(kwargs: dict) -> None:
         if 'asn' not in kwargs:
             raise ValueError("No participant ASN specified.")
         if 'mac' not in kwargs:
@@ -48,8 +119,15 @@ class ActionManager:
         if 'ipv4' not in kwargs and 'ipv6' not in kwargs:
             raise ValueError("No participant IPv4 nor IPv6 address specified.")
 
+    def run_action_by_name(
+            self, check_name: str, net_scenario: Lab, members: dict[str, BGPNeighbour], **kwargs
+    ) -> ActionResult:
+        self._check_participant_args(kwargs)
+
         action = self._actions[check_name]
         logging.info(f"Starting `{action.display_name()}` verification...")
+        self._rs_manager.reset_neighbor_queries()
+        ConnectivityProber.get_instance().reset_probes()
         action_result = action.verify(net_scenario, members, self._rs_manager, **kwargs)
         action.clean(net_scenario, members, self._rs_manager, **kwargs)
 
@@ -1,19 +1,14 @@
 import logging
-import time
 
-from Kathara.manager.Kathara import Kathara
 from Kathara.model.Lab import Lab
+from Kathara.model.Machine import Machine
 
 from ... import utils
 from ...foundation.quarantine.action import Action
 from ...foundation.quarantine.action_result import ActionResult, SUCCESS, ERROR
 from ...model.bgp_neighbour import BGPNeighbour
 from ...network_scenario.rs_manager import RouteServerManager
-from ...regex import PING_LOSS_REGEX
-from ...settings.settings import Settings
-
-PING_COUNT = 5
-MAX_MTU = 1500
+from .connectivity_prober import ConnectivityProber, PING_COUNT, MAX_MTU
 
 
 class CheckPingMtuAction(Action):
@@ -22,74 +17,51 @@ class CheckPingMtuAction(Action):
     ) -> 'ActionResult':
         action_result = ActionResult(self)
 
-        participant_ipv4 = kwargs["ipv4"] if "ipv4" in kwargs and kwargs["ipv4"] else None
-        participant_ipv6 = kwargs["ipv6"] if "ipv6" in kwargs and kwargs["ipv6"] else None
-
-        for rs_name in Settings.get_instance().route_servers.keys():
-            if not net_scenario.has_machine(rs_name):
-                logging.warning(f"Skipping RS `{rs_name}` since not in the network scenario...")
-                continue
+        rs_results = self.run_on_route_servers(
+            net_scenario, lambda rs_name, rs_config, rs_device: self._verify_route_server(rs_device, **kwargs)
+        )
+        for rs_result in rs_results.values():
+            action_result.extend(rs_result)
 
-            rs_device = net_scenario.get_machine(rs_name)
-            ipv6 = utils.is_device_ipv6(rs_device)
+        return action_result
 
-            participant_ip = participant_ipv4 if not ipv6 else participant_ipv6
-            if participant_ip is None:
-                logging.warning(
-                    f"Skipping RS `{rs_name}` since no participant IPv{4 if not ipv6 else 6} is specified..."
-                )
-                continue
+    def _verify_route_server(self, rs_device: Machine, **kwargs) -> 'ActionResult':
+        action_result = ActionResult(self)
 
-            stdout_tcpdump = Kathara.get_instance().exec_obj(
-                rs_device,
-                f"timeout 20 tcpdump -tenni any (icmp or icmp6) and host {participant_ip} -c {PING_COUNT * 2}",
-                stream=True
-            )
+        participant_ipv4 = kwargs["ipv4"] if "ipv4" in kwargs and kwargs["ipv4"] else None
+        participant_ipv6 = kwargs["ipv6"] if "ipv6" in kwargs and kwargs["ipv6"] else None
 
-            time.sleep(1)
+        ipv6 = utils.is_device_ipv6(rs_device)
 
-            payload_size = MAX_MTU - (20 if not ipv6 else 40) - 8  # 1500 - IP - ICMP
-            Kathara.get_instance().exec_obj(
-                rs_device,
-                f"ping -c {PING_COUNT} -M do -s {payload_size} {participant_ip}",
-                stream=False
+        participant_ip = participant_ipv4 if not ipv6 else participant_ipv6
+        if participant_ip is None:
+            logging.warning(
+                f"Skipping RS `{rs_device.name}` since no participant IPv{4 if not ipv6 else 6} is specified..."
             )
+            return action_result
 
-            tcpdump_output = ""
-            try:
-                while True:
-                    (stdout, _) = next(stdout_tcpdump)
-                    stdout = stdout.decode('utf-8') if stdout else ""
-
-                    if stdout:
-                        tcpdump_output += stdout
-            except StopIteration:
-                pass
-
-            request_count = 0
-            reply_count = 0
-            for packet in tcpdump_output.split("\n"):
-                if "echo request" in packet:
-                    request_count += 1
-                if "echo reply" in packet:
-                    reply_count += 1
+        connectivity = ConnectivityProber.get_instance().probe(
+            rs_device, participant_ip, self.name(), self.get_stop_event(kwargs)
+        )
+        request_count = connectivity.mtu_requests
+        reply_count = connectivity.mtu_replies
 
-            if request_count == PING_COUNT:
-                if request_count == reply_count:
-                    action_result.add_result(
-                        SUCCESS,
-                        f"Link from `{rs_device.name}` to {participant_ip} is able to send {MAX_MTU} bytes packets.",
-                    )
-                else:
-                    action_result.add_result(
-                        ERROR,
-                        f"Link from `{rs_device.name}` to {participant_ip} is not able to send {MAX_MTU} bytes packets.",
-                    )
+        if request_count == PING_COUNT:
+            if request_count == reply_count:
+                action_result.add_result(
+                    SUCCESS,
+                    f"Link from `{rs_device.name}` to {participant_ip} is able to send {MAX_MTU} bytes packets.",
+                )
             else:
                 action_result.add_result(
                     ERROR,
                     f"Link from `{rs_device.name}` to {participant_ip} is not able to send {MAX_MTU} bytes packets.",
                 )
+        else:
+            action_result.add_result(
+                ERROR,
+                f"Link from `{rs_device.name}` to {participant_ip} is not able to send {MAX_MTU} bytes packets.",
+            )
 
         return action_result
 
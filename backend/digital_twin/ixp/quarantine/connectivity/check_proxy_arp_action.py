@@ -3,6 +3,7 @@ import logging
 
 from Kathara.manager.Kathara import Kathara
 from Kathara.model.Lab import Lab
+from Kathara.model.Machine import Machine
 
 from ... import utils
 from ...foundation.quarantine.action import Action
@@ -20,35 +21,10 @@ class CheckProxyArpAction(Action):
     ) -> 'ActionResult':
         action_result = ActionResult(self)
 
-        participant_mac = kwargs['mac']
-        participant_ipv4 = kwargs["ipv4"] if "ipv4" in kwargs and kwargs["ipv4"] else None
-
-        proxy_arp_replies = {}
-        for rs_name in Settings.get_instance().route_servers.keys():
-            if not net_scenario.has_machine(rs_name):
-                logging.warning(f"Skipping RS `{rs_name}` since not in the network scenario...")
-                continue
-
-            rs_device = net_scenario.get_machine(rs_name)
-            ipv6 = utils.is_device_ipv6(rs_device)
-
-            if ipv6:
-                logging.warning(f"Skipping RS `{rs_name}` since it is IPv6...")
-            if participant_ipv4 is None:
-                logging.warning(f"Skipping RS `{rs_name}` since no participant IPv4 is specified...")
-                continue
-
-            for ip in Settings.get_instance().quarantine["proxy_arp_ips"]:
-                ip: ipaddress.IPv4Address = ipaddress.ip_address(ip)
-                (_, _, exit_code) = Kathara.get_instance().exec_obj(
-                    rs_device, f"arping -c {ARPING_COUNT} -t {participant_mac} -i eth0 {ip}", stream=False
-                )
-
-                if exit_code == 0:
-                    if rs_name not in proxy_arp_replies:
-                        proxy_arp_replies[rs_name] = []
-
-                    proxy_arp_replies[rs_name].append(ip)
+        rs_replies = self.run_on_route_servers(
+            net_scenario, lambda rs_name, rs_config, rs_device: self._arping_route_server(rs_device, **kwargs)
+        )
+        proxy_arp_replies = dict((rs_name, ips) for rs_name, ips in rs_replies.items() if ips)
 
         success = True
         for rs_name, ips in proxy_arp_replies.items():
@@ -65,6 +41,42 @@ class CheckProxyArpAction(Action):
 
         return action_result
 
+    @staticmethod
+    def _arping_route_server(rs_device: Machine, **kwargs) -> list[ipaddress.IPv4Address]:
+        participant_mac = kwargs['mac']
+        participant_ipv4 = kwargs["ipv4"] if "ipv4" in kwargs and kwargs["ipv4"] else None
+
+        if utils.is_device_ipv6(rs_device):
+            logging.warning(f"Skipping RS `{rs_device.name}` since it is IPv6...")
+            return []
+        if participant_ipv4 is None:
+            logging.warning(f"Skipping RS `{rs_device.name}` since no participant IPv4 is specified...")
+            return []
+
+        ips = [ipaddress.ip_address(ip) for ip in Settings.get_instance().quarantine["proxy_arp_ips"]]
+        if not ips:
+            return []
+
+        # All the IPs are probed concurrently in a single exec, each job prints `<ip> <arping exit code>`
+        sweep = " ".join(
+            f"(arping -c {ARPING_COUNT} -t {participant_mac} -i eth0 {ip} >/dev/null 2>&1; echo \"{ip} $?\") &"
+            for ip in ips
+        )
+        (stdout, _, _) = Kathara.get_instance().exec_obj(rs_device, ["sh", "-c", f"{sweep} wait"], stream=False)
+
+        exit_codes = {}
+        for line in (stdout.decode("utf-8") if stdout else "").splitlines():
+            (ip, exit_code) = line.split()
+            exit_codes[ipaddress.ip_address(ip)] = int(exit_code)
+
+        for ip in ips:
+            if ip not in exit_codes:
+                logging.warning(f"No arping result for IP {ip} from `{rs_device.name}`.")
+            else:
+                logging.debug(f"Arping for IP {ip} from `{rs_device.name}` exited with code {exit_codes[ip]}.")
+
+        return [ip for ip in ips if exit_codes.get(ip, None) == 0]
+
     def name(self) -> str:
         return "proxy_arp"
 
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import ipaddress
+import logging
+import threading
+from concurrent.futures import Future
+
+from Kathara.manager.Kathara import Kathara
+from Kathara.model.Machine import Machine
+
+from ...foundation.exceptions import InstantiationError
+from ...regex import PING_LOSS_REGEX, TCPDUMP_ECHO_REGEX
+from ..stream_multiplexer import StreamMultiplexer, STDOUT
+
+PING_COUNT = 5
+MAX_MTU = 1500
+CAPTURE_TIMEOUT = 30
+TCPDUMP_LISTENING_MESSAGE = "listening on"
+
+
+class ConnectivityResult:
+    __slots__ = ['ping_output', 'ping_loss', 'mtu_requests', 'mtu_replies']
+
+    def __init__(self) -> None:
+        self.ping_output: str = ""
+        self.ping_loss: int | None = None
+        self.mtu_requests: int = 0
+        self.mtu_replies: int = 0
+
+
+class ConnectivityProber:
+    __slots__ = ['_results', '_lock']
+
+    __instance: ConnectivityProber = None
+
+    @staticmethod
+    def get_instance() -> ConnectivityProber:
+        if ConnectivityProber.__instance is None:
+            ConnectivityProber()
+
+        return ConnectivityProber.__instance
+
+    def __init__(self) -> None:
+        if ConnectivityProber.__instance is not None:
+            raise InstantiationError("This class is a singleton!")
+        else:
+            # Last probe of each (lab, RS, participant IP) in the current run and the consumers that already read it
+            self._results: dict[tuple[str, str, str], tuple[Future, set[str]]] = {}
+            self._lock: threading.Lock = threading.Lock()
+
+            ConnectivityProber.__instance = self
+
+    def reset_probes(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+    def probe(
+            self, rs_device: Machine, participant_ip: ipaddress.IPv4Address | ipaddress.IPv6Address, consumer: str,
+            stop_event: threading.Event | None = None
+    ) -> ConnectivityResult:
+        # Checks of the same run share one probe, a consumer asking again triggers a new one
+        key = (rs_device.lab.hash, rs_device.name, str(participant_ip))
+        with self._lock:
+            (future, consumers) = self._results.get(key, (None, None))
+            is_owner = future is None or consumer in consumers
+            if is_owner:
+                (future, consumers) = (Future(), set())
+                self._results[key] = (future, consumers)
+            consumers.add(consumer)
+
+        if is_owner:
+            try:
+                future.set_result(self._probe(rs_device, participant_ip, stop_event))
+            except Exception as e:
+                future.set_exception(e)
+
+        return future.result()
+
+    @staticmethod
+    def _probe(
+            rs_device: Machine, participant_ip: ipaddress.IPv4Address | ipaddress.IPv6Address,
+            stop_event: threading.Event | None
+    ) -> ConnectivityResult:
+        result = ConnectivityResult()
+        kathara = Kathara.get_instance()
+
+        # Discarded to ensure ARP/ND resolution
+        kathara.exec_obj(rs_device, f"ping -c 1 -W 1 {participant_ip}", stream=False)
+
+        capture_stream = kathara.exec_obj(
+            rs_device,
+            f"timeout {CAPTURE_TIMEOUT} tcpdump -l -tenni any (icmp or icmp6) and host {participant_ip}",
+            stream=True
+        )
+        capture_lines = StreamMultiplexer({rs_device.name: capture_stream}).iter_lines(stop_event=stop_event)
+
+        # Wait for the capture to be started before sending the echo requests
+        capture = []
+        for (_, fd, line) in capture_lines:
+            if fd == STDOUT:
+                capture.append(line)
+            elif TCPDUMP_LISTENING_MESSAGE in line:
+                break
+
+        if stop_event is not None and stop_event.is_set():
+            logging.warning(f"Connectivity probe of {participant_ip} from `{rs_device.name}` stopped.")
+            kathara.exec_obj(rs_device, "pkill -INT -x tcpdump", stream=False)
+            return result
+
+        logging.info(f"Pinging {participant_ip} from `{rs_device.name}` with default and {MAX_MTU} bytes packets...")
+        (stdout, _, _) = kathara.exec_obj(rs_device, f"ping -c {PING_COUNT} {participant_ip}", stream=False)
+        result.ping_output = stdout.decode("utf-8") if stdout else ""
+
+        mtu_payload_size = MAX_MTU - (20 if participant_ip.version == 4 else 40) - 8  # 1500 - IP - ICMP
+        kathara.exec_obj(
+            rs_device, f"ping -c {PING_COUNT} -M do -s {mtu_payload_size} {participant_ip}", stream=False
+        )
+
+        # Both pings wait for their replies, so the capture can be stopped right away
+        kathara.exec_obj(rs_device, "pkill -INT -x tcpdump", stream=False)
+        capture.extend(line for (_, fd, line) in capture_lines if fd == STDOUT)
+
+        matches = PING_LOSS_REGEX.search(result.ping_output)
+        if matches:
+            result.ping_loss = int(matches.group(1))
+
+        for line in capture:
+            matches = TCPDUMP_ECHO_REGEX.search(line)
+            if not matches or int(matches.group(2)) != mtu_payload_size + 8:
+                continue
+
+            if matches.group(1) == "request":
+                result.mtu_requests += 1
+            else:
+                result.mtu_replies += 1
+
+        return result
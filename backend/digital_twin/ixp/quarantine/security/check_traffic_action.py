@@ -3,7 +3,6 @@ import json
 import logging
 import os
 import shlex
-import time
 from io import BytesIO
 
 from Kathara.foundation.manager.exec_stream.IExecStream import IExecStream
@@ -18,6 +17,7 @@ from ...globals import BIN_FOLDER
 from ...model.bgp_neighbour import BGPNeighbour
 from ...network_scenario.rs_manager import RouteServerManager
 from ...settings.settings import Settings
+from ..stream_multiplexer import StreamMultiplexer, STDERR
 
 
 class CheckTrafficAction(Action):
@@ -66,27 +66,48 @@ class CheckTrafficAction(Action):
 
             streams[rs_name] = self._start_device_dumper(rs_device, all_macs, participant_mac, participant_ip)
 
+        stop_on_violation = Settings.get_instance().quarantine.get("traffic_dump_stop_on_violation", False)
+        multiplexer = StreamMultiplexer(streams)
+        stop_event = self.get_stop_event(kwargs)
         results = {}
-        for name, stream in streams.items():
-            result = ""
-            while True:
-                time.sleep(1)
-                try:
-                    (line, _) = next(stream)
-                    if line:
-                        result += line.decode('utf-8').strip()
-                except StopIteration:
-                    break
-
-            results[name] = json.loads(result)
+        stopped = False
+        for name, fd, line in multiplexer.iter_lines(stop_event=stop_event):
+            if fd == STDERR:
+                logging.debug(f"Traffic dumper on `{name}`: {line}")
+                continue
+            if not line.strip():
+                continue
+
+            try:
+                report = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping malformed traffic report from `{name}`: {line}")
+                continue
+            results[name] = report
+            self._log_report(name, report)
+
+            if stop_on_violation and not stopped and report["total"] > 0:
+                self._stop_dumpers(net_scenario, [x for x in multiplexer.running() if x != name])
+                stopped = True
+
+        if stop_event is not None and stop_event.is_set():
+            # The dumpers still running are killed and removed by `clean`
+            action_result.add_result(ERROR, "Traffic dump stopped before completion.")
+            return action_result
 
         for name in streams.keys():
             logging.info(f"Deleting traffic dumper script from RS `{name}`...")
             Kathara.get_instance().exec(name, "rm -Rf /traffic_dump.py", lab=net_scenario, stream=False)
 
-        for name, result in results.items():
-            if len(result) > 0:
-                action_result.add_result(ERROR, f"Unauthorized traffic on `{name}`.", "\n".join(result))
+        for name in streams.keys():
+            if name not in results:
+                action_result.add_result(ERROR, f"No traffic report received from `{name}`.")
+            elif results[name]["total"] > 0:
+                action_result.add_result(
+                    ERROR,
+                    f"{results[name]['total']} unauthorized packets on `{name}`.",
+                    self._format_report(results[name])
+                )
             else:
                 action_result.add_result(SUCCESS, f"No unauthorized traffic on `{name}`.")
 
@@ -108,17 +129,58 @@ class CheckTrafficAction(Action):
             )
             logging.info(f"Deleted traffic dumper with exit code: {exit_code}.")
 
+    def depends_on(self) -> list[str]:
+        # The probe device of the Running Services check is not whitelisted and would be reported
+        return ["services"]
+
+    @staticmethod
+    def _stop_dumpers(net_scenario: Lab, rs_names: list[str]) -> None:
+        # SIGINT ends the capture gracefully, so the dumper still emits its final report
+        for rs_name in rs_names:
+            logging.info(f"Stopping traffic dumper on RS `{rs_name}` since a violation was already found...")
+            Kathara.get_instance().exec(rs_name, "pkill -INT -f -i traffic_dump.py", lab=net_scenario, stream=False)
+
+    @staticmethod
+    def _log_report(rs_name: str, report: dict) -> None:
+        if report["final"]:
+            return
+
+        logging.info(
+            f"Traffic dump on `{rs_name}` after {report['elapsed']}s: "
+            f"{report['total']} unauthorized packets in {report['flow_count']} flows."
+        )
+
+    @staticmethod
+    def _format_report(report: dict) -> str:
+        lines = [
+            f"{flow['src']} -> {flow['dst']} ethertype={flow['ethertype']} "
+            f"proto={flow['proto']} port={flow['port']}: {flow['count']} packets"
+            for flow in sorted(report["flows"], key=lambda x: x["count"], reverse=True)
+        ]
+        if report["other"] > 0:
+            lines.append(f"Other flows: {report['other']} packets")
+        lines.append("Samples:")
+        lines.extend(report["samples"])
+
+        return "\n".join(lines)
+
     @staticmethod
     def _start_device_dumper(
             rs_device: Machine, all_macs: set, participant_mac: str,
             participant_ip: ipaddress.IPv4Address | ipaddress.IPv6Address
     ) -> IExecStream:
-        sniff_time = Settings.get_instance().quarantine["traffic_dump_mins"] * 60
+        quarantine_settings = Settings.get_instance().quarantine
+        sniff_time = quarantine_settings["traffic_dump_mins"] * 60
         logging.info(f"Start traffic dump for {sniff_time}s with MAC={participant_mac} and IP={participant_ip}...")
 
         v = participant_ip.version
         macs_str = ",".join(all_macs)
         cmd = f"/usr/bin/python3 /traffic_dump.py eth0 {sniff_time} {macs_str} {participant_mac} {participant_ip} {v}"
+        # IP defragmentation can be disabled to save CPU on the RS, fragments are then inspected one by one
+        if not quarantine_settings.get("traffic_dump_ip_session", True):
+            cmd += " --no-ip-session"
+        if quarantine_settings.get("traffic_dump_stop_on_violation", False):
+            cmd += " --stop-on-violation"
         logging.debug(f"Running cmd `{cmd}`")
 
         return Kathara.get_instance().exec_obj(machine=rs_device, command=shlex.split(cmd))
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import ipaddress
+import logging
+import threading
+
+import docker
+from Kathara import utils as kathara_utils
+from Kathara.manager.Kathara import Kathara
+from Kathara.model.Lab import Lab
+from docker.errors import ImageNotFound, NotFound
+from docker.models.containers import Container
+
+from ...foundation.exceptions import InstantiationError
+from ...globals import BIN_FOLDER
+
+PROBE_DOCKERFILE_NAME = "probe.Dockerfile"
+PROBE_IMAGE_NAME = "ixp/probe"
+PROBE_DEVICE_NAME = "ixp_probe"
+PROBE_SHELL = "/bin/bash"
+
+
+class ProbePool:
+    """
+    Warm probe containers used by the quarantine checks, one per lab.
+    The probe is a plain Docker container attached to the network of the peering collision domain, it is not a device
+    of the lab: the lab and its derived data are never modified, and reconcile does not see it as a running device
+    since it has no `lab_hash` label. The `app` and `user` labels let the lab wipe remove it with the devices.
+    """
+    __slots__ = ['_image_ready', '_probes', '_lock']
+
+    __instance: ProbePool = None
+
+    @staticmethod
+    def get_instance() -> ProbePool:
+        if ProbePool.__instance is None:
+            ProbePool()
+
+        return ProbePool.__instance
+
+    def __init__(self) -> None:
+        if ProbePool.__instance is not None:
+            raise InstantiationError("This class is a singleton!")
+        else:
+            self._image_ready: bool = False
+            # Warm probe container of each lab with the ID of its network, keyed by lab hash
+            self._probes: dict[str, tuple[str, Container]] = {}
+            self._lock: threading.Lock = threading.Lock()
+
+            ProbePool.__instance = self
+
+    def ensure_image(self) -> None:
+        with self._lock:
+            if self._image_ready:
+                return
+
+            client = docker.from_env()
+
+            logging.debug(f"Checking if image `{PROBE_IMAGE_NAME}` exists...")
+            try:
+                client.images.get(PROBE_IMAGE_NAME)
+                logging.debug(f"Image `{PROBE_IMAGE_NAME}` exists!")
+            except ImageNotFound:
+                logging.info(f"Image `{PROBE_IMAGE_NAME}` does not exist, building...")
+                client.images.build(
+                    path=BIN_FOLDER,
+                    dockerfile=PROBE_DOCKERFILE_NAME,
+                    tag=PROBE_IMAGE_NAME,
+                    quiet=True,
+                    pull=False,
+                    forcerm=True
+                )
+
+            self._image_ready = True
+
+    def get_probe(
+            self, net_scenario: Lab, cd: str, iface_ip: ipaddress.IPv4Interface | ipaddress.IPv6Interface
+    ) -> Container:
+        """
+        Returns the probe of the lab attached to `cd` and addressed with `iface_ip`.
+        The caller must `flush` it when its checks end, so it does not keep answering ARP/ND with that address.
+        """
+        self.ensure_image()
+
+        with self._lock:
+            network = Kathara.get_instance().get_link_api_object(cd, lab_hash=net_scenario.hash)
+
+            (network_id, probe) = self._probes.get(net_scenario.hash, (None, None))
+            if network_id == network.id and self._is_running(probe):
+                if self._set_address(probe, iface_ip):
+                    return probe
+
+                logging.warning(f"Cannot re-address probe `{probe.name}`, deploying a new one...")
+
+            probe = self._deploy_probe(net_scenario.hash, network, cd, iface_ip)
+            self._probes[net_scenario.hash] = (network.id, probe)
+
+            return probe
+
+    def flush(self, probe: Container) -> None:
+        logging.info(f"Flushing the addresses of probe `{probe.name}`...")
+        try:
+            (_, stderr, exit_code) = self.exec(probe, ["ip", "addr", "flush", "dev", "eth0", "scope", "global"])
+        except NotFound:
+            return
+
+        if exit_code != 0:
+            # The address would stay on the peering LAN, the probe is removed instead
+            logging.warning(f"Cannot flush probe `{probe.name}`: {stderr.decode('utf-8') if stderr else ''}")
+            with self._lock:
+                self._remove_probe(probe)
+
+    def release(self, net_scenario: Lab) -> None:
+        with self._lock:
+            (_, probe) = self._probes.pop(net_scenario.hash, (None, None))
+            if probe is not None:
+                self._remove_probe(probe)
+
+    @staticmethod
+    def exec(probe: Container, command: list[str]) -> tuple[bytes | None, bytes | None, int]:
+        """
+        Runs a command in the probe, with the same result as a Kathara `exec_obj` without stream
+        """
+        (exit_code, (stdout, stderr)) = probe.exec_run(command, demux=True)
+
+        return stdout, stderr, exit_code
+
+    @staticmethod
+    def _is_running(probe: Container | None) -> bool:
+        if probe is None:
+            return False
+
+        try:
+            probe.reload()
+        except NotFound:
+            return False
+
+        return probe.status == "running"
+
+    @staticmethod
+    def _address_command(iface_ip: ipaddress.IPv4Interface | ipaddress.IPv6Interface) -> str:
+        # Skip Duplicate Address Detection, the probe must be usable as soon as it is addressed
+        return f"ip addr add {iface_ip} dev eth0" + (" nodad" if iface_ip.version == 6 else "")
+
+    @staticmethod
+    def _set_address(probe: Container, iface_ip: ipaddress.IPv4Interface | ipaddress.IPv6Interface) -> bool:
+        logging.info(f"Addressing probe `{probe.name}` with IP={iface_ip}...")
+
+        (_, stderr, exit_code) = ProbePool.exec(
+            probe,
+            ["sh", "-c", f"ip addr flush dev eth0 scope global && {ProbePool._address_command(iface_ip)}"]
+        )
+        if exit_code != 0:
+            logging.debug(f"Addressing failed: {stderr.decode('utf-8') if stderr else ''}")
+
+        return exit_code == 0
+
+    @staticmethod
+    def _deploy_probe(
+            lab_hash: str, network, cd: str, iface_ip: ipaddress.IPv4Interface | ipaddress.IPv6Interface
+    ) -> Container:
+        logging.info(f"Deploying probe in collision domain {cd} and with IP={iface_ip}...")
+
+        client = docker.from_env()
+        name = f"{PROBE_DEVICE_NAME}_{lab_hash}"
+        try:
+            client.containers.get(name).remove(force=True)
+        except NotFound:
+            pass
+
+        # Same endpoint options of the Kathara devices, so the network plugin attaches it as `eth0`
+        endpoint_config = client.api.create_endpoint_config(driver_opt={"kathara.iface": "0", "kathara.link": cd})
+        probe = client.containers.run(
+            image=PROBE_IMAGE_NAME,
+            name=name,
+            hostname=PROBE_DEVICE_NAME,
+            cap_add=["NET_ADMIN", "NET_RAW"],
+            # Always enabled, so the same probe can be re-addressed for both IP versions
+            sysctls={"net.ipv6.conf.all.disable_ipv6": 0, "net.ipv6.conf.default.disable_ipv6": 0},
+            network=network.name,
+            networking_config={network.name: endpoint_config},
+            labels={
+                "app": "kathara",
+                "user": kathara_utils.get_current_user_name(),
+                "name": PROBE_DEVICE_NAME,
+                "shell": PROBE_SHELL,
+            },
+            tty=True,
+            stdin_open=True,
+            detach=True,
+        )
+
+        if not ProbePool._set_address(probe, iface_ip):
+            ProbePool._remove_probe(probe)
+            raise RuntimeError(f"Cannot address probe `{name}` with IP={iface_ip}")
+
+        return probe
+
+    @staticmethod
+    def _remove_probe(probe: Container) -> None:
+        logging.info(f"Removing probe `{probe.name}`...")
+        try:
+            probe.remove(force=True)
+        except NotFound:
+            pass
+
+        logging.info(f"Probe `{probe.name}` removed...")
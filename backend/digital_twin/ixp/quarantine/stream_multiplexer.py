@@ -0,0 +1,80 @@
+import logging
+import queue
+import threading
+import time
+from typing import Generator
+
+from Kathara.foundation.manager.exec_stream.IExecStream import IExecStream
+
+STDOUT: int = 1
+STDERR: int = 2
+
+# Granularity (seconds) at which a stop request is noticed while waiting for output
+STOP_POLL_INTERVAL: float = 0.5
+
+_END = object()
+
+
+class StreamMultiplexer:
+    __slots__ = ['_queue', '_running']
+
+    def __init__(self, streams: dict[str, IExecStream]) -> None:
+        self._queue: queue.Queue = queue.Queue()
+        self._running: set[str] = set(streams.keys())
+
+        # Each stream blocks on its own socket, so it is drained by a dedicated thread
+        for name, stream in streams.items():
+            threading.Thread(
+                target=self._read_stream, args=(name, stream), name=f"stream-{name}", daemon=True
+            ).start()
+
+    def _read_stream(self, name: str, stream: IExecStream) -> None:
+        try:
+            for (stdout, stderr) in stream:
+                self._queue.put((name, stdout, stderr))
+        except Exception as e:
+            logging.warning(f"Error while reading stream of `{name}`: {e}")
+        finally:
+            self._queue.put((name, _END, None))
+
+    def running(self) -> set[str]:
+        return set(self._running)
+
+    def iter_lines(
+            self, timeout: float | None = None, stop_event: threading.Event | None = None
+    ) -> Generator[tuple[str, int, str], None, None]:
+        end_time = time.monotonic() + timeout if timeout is not None else None
+        buffers: dict[str, dict[int, str]] = {}
+
+        while self._running:
+            if stop_event is not None and stop_event.is_set():
+                logging.warning(f"Stopped reading streams {', '.join(sorted(self._running))} before completion.")
+                return
+
+            remaining = max(end_time - time.monotonic(), 0) if end_time is not None else None
+            if stop_event is not None:
+                remaining = min(remaining, STOP_POLL_INTERVAL) if remaining is not None else STOP_POLL_INTERVAL
+            try:
+                (name, stdout, stderr) = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                if end_time is None or time.monotonic() < end_time:
+                    continue
+                logging.warning(f"Streams {', '.join(sorted(self._running))} did not complete within {timeout}s.")
+                return
+
+            if stdout is _END:
+                self._running.discard(name)
+                for fd, buffer in buffers.pop(name, {}).items():
+                    if buffer:
+                        yield name, fd, buffer
+                continue
+
+            name_buffers = buffers.setdefault(name, {})
+            for fd, chunk in ((STDOUT, stdout), (STDERR, stderr)):
+                if not chunk:
+                    continue
+
+                buffer = name_buffers.get(fd, "") + chunk.decode('utf-8', errors='replace')
+                *lines, name_buffers[fd] = buffer.split("\n")
+                for line in lines:
+                    yield name, fd, line
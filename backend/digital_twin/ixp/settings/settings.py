@@ -13,7 +13,7 @@ DEFAULT_SETTINGS_PATH: str = os.path.abspath(os.path.join(PATH_PREFIX, "ixp.conf
 class Settings(object):
     __slots__ = [
         'scenario_name', 'host_interface', 'peering_lan', 'peering_configuration', 'rib_dumps',
-        'route_servers', 'rpki', 'quarantine'
+        'route_servers', 'rpki', 'quarantine', 'member_selection'
     ]
 
     __instance: Settings = None
@@ -29,17 +29,34 @@ class Settings(object):
         if Settings.__instance is not None:
             raise InstantiationError("This class is a singleton!")
         else:
-            self.scenario_name: str | None = None
-            self.host_interface: str | None = None
-            self.peering_lan: dict = {}
-            self.peering_configuration: dict = {}
-            self.rib_dumps: dict = {}
-            self.route_servers: dict = {}
-            self.rpki: list = []
-            self.quarantine: dict = {}
+            self.reset()
 
             Settings.__instance = self
 
+    @staticmethod
+    def new_detached() -> Settings:
+        # Not published as the singleton, so it can be loaded while the current settings are still in use
+        settings = object.__new__(Settings)
+        settings.reset()
+
+        return settings
+
+    @staticmethod
+    def set_instance(settings: Settings) -> None:
+        # A single reference swap, readers get either the previous or the new settings, never a partially loaded one
+        Settings.__instance = settings
+
+    def reset(self) -> None:
+        self.scenario_name: str | None = None
+        self.host_interface: str | None = None
+        self.peering_lan: dict = {}
+        self.peering_configuration: dict = {}
+        self.rib_dumps: dict = {}
+        self.route_servers: dict = {}
+        self.rpki: list = []
+        self.quarantine: dict = {}
+        self.member_selection: dict = {}
+
     def load_from_disk(self) -> None:
         if not os.path.exists(DEFAULT_SETTINGS_PATH):
             raise FileNotFoundError(f"File `{DEFAULT_SETTINGS_PATH}` not found.")
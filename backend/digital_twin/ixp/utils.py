@@ -1,13 +1,18 @@
 import importlib
+import json
 import subprocess
 import sys
 from typing import Generator, Any
 
 from Kathara.model.Machine import Machine
-from Kathara.setting.Setting import Setting
 
 from .globals import PATH_PREFIX
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def class_for_name(module_name: str, class_name: str) -> Any:
     m = importlib.import_module(
@@ -22,6 +27,8 @@ def chunk_list(input_list: list, size: int) -> Generator[list, None, None]:
 
 
 def open_terminal(device: Machine) -> None:
+    from Kathara.setting.Setting import Setting
+
     command = (
             '%s -c "from Kathara.manager.Kathara import Kathara; '
             "Kathara.get_instance().connect_tty('%s', lab_name='%s', shell='%s', logs=True)\""
@@ -35,3 +42,8 @@ def is_device_ipv6(device: Machine) -> bool:
         return device.meta["sysctls"]["net.ipv6.conf.all.forwarding"] == "1"
 
     return False
+
+
+def json_loads(data: str | bytes) -> Any:
+    # orjson is optional, both raise a subclass of ValueError on malformed input
+    return orjson.loads(data) if orjson is not None else json.loads(data)
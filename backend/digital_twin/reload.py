@@ -7,6 +7,7 @@ from Kathara.setting.Setting import Setting
 from ixp.colored_logging import set_logging
 from ixp.configuration.frr_scenario_configuration_applier import FrrScenarioConfigurationApplier
 from ixp.foundation.dumps.member_dump.member_dump_factory import MemberDumpFactory
+from ixp.foundation.dumps.table_dump.table_dump import SELECTION_FIRST
 from ixp.foundation.dumps.table_dump.table_dump_factory import TableDumpFactory
 from ixp.globals import RESOURCES_FOLDER
 from ixp.network_scenario.network_scenario_manager import NetworkScenarioManager
@@ -23,6 +24,13 @@ if __name__ == "__main__":
         action='store_true',
         help='Reload only RS configurations, skipping peerings.'
     )
+    parser.add_argument(
+        '--incremental',
+        dest='incremental',
+        required=False,
+        action='store_true',
+        help='Apply only the configuration delta to peerings through frr-reload, without restarting FRR.'
+    )
     parser.add_argument(
         '--max-devices',
         dest='max_devices',
@@ -50,11 +58,13 @@ if __name__ == "__main__":
     for v, file in settings.rib_dumps["dumps"].items():
         table_dump.load_from_file(os.path.join(RESOURCES_FOLDER, file))
 
+    if settings.member_selection:
+        table_dump.select_entries(**settings.member_selection)
     if args.max_devices is not None:
-        table_dump.entries = dict(list(table_dump.entries.items())[0:args.max_devices])
+        table_dump.select_entries(SELECTION_FIRST, limit=args.max_devices)
 
     net_scenario_manager = NetworkScenarioManager()
-    frr_conf = FrrScenarioConfigurationApplier(table_dump)
+    frr_conf = FrrScenarioConfigurationApplier(table_dump, incremental_reload=args.incremental)
     if not args.rs_only:
         net_scenario = net_scenario_manager.build_diff(table_dump)
         new_devices = dict(x for x in net_scenario.machines.items() if "new" in x[1].meta and x[1].meta["new"])
@@ -63,7 +73,10 @@ if __name__ == "__main__":
 
         net_scenario_manager.deploy_devices(new_devices)
         net_scenario_manager.undeploy_devices(del_devices)
-        net_scenario_manager.update_interconnection(table_dump, new_devices, set(del_devices.keys()))
+        net_scenario_manager.update_interconnection(
+            net_scenario_manager.generate_arp_entries(table_dump, set(del_devices.keys())),
+            new_devices, set(del_devices.keys())
+        )
     else:
         net_scenario = net_scenario_manager.get()
 
@@ -6,6 +6,7 @@ from Kathara.setting.Setting import Setting
 from ixp.colored_logging import set_logging
 from ixp.configuration.frr_scenario_configuration_applier import FrrScenarioConfigurationApplier
 from ixp.foundation.dumps.member_dump.member_dump_factory import MemberDumpFactory
+from ixp.foundation.dumps.table_dump.table_dump import SELECTION_FIRST
 from ixp.foundation.dumps.table_dump.table_dump_factory import TableDumpFactory
 from ixp.globals import RESOURCES_FOLDER
 from ixp.network_scenario.network_scenario_manager import NetworkScenarioManager
@@ -39,8 +40,10 @@ if __name__ == "__main__":
     for v, file in settings.rib_dumps["dumps"].items():
         table_dump.load_from_file(os.path.join(RESOURCES_FOLDER, file))
 
+    if settings.member_selection:
+        table_dump.select_entries(**settings.member_selection)
     if args.max_devices is not None:
-        table_dump.entries = dict(list(table_dump.entries.items())[0:args.max_devices])
+        table_dump.select_entries(SELECTION_FIRST, limit=args.max_devices)
 
     net_scenario_manager = NetworkScenarioManager()
     frr_conf = FrrScenarioConfigurationApplier(table_dump)
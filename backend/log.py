@@ -38,24 +38,22 @@ log_config_dict = {
 }
 
 
-def reset_file_content(file_path):
-    try:
-        # Open the file in write mode, which truncates the content
-        with open(file_path, 'w') as file:
-            # Truncate the file, effectively resetting its content
-            file.truncate()
-        logging.info(f"Content of '{file_path}' has been reset.")
-    except FileNotFoundError:
-        logging.error(f"Error: File '{file_path}' not found.")
-    except Exception as e:
-        logging.error(f"Error: {e}")
+_logging_configured = False
 
 
 def set_logging() -> None:
+    """
+    Configura il logging una sola volta per processo, build e reload non troncano più il file di log:
+    la dimensione è limitata dalla rotazione del RotatingFileHandler
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+
     logging.config.dictConfig(log_config_dict)
-    reset_file_content(BACKEND_LOGS_PATH)
 
     logging.SUCCESS = 25
     logging.addLevelName(logging.SUCCESS, 'SUCCESS')
     logging.success = lambda message, *args: logging.log(logging.SUCCESS, message, *args)
 
+    _logging_configured = True
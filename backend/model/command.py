@@ -0,0 +1,20 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+DeviceRole = Literal["rs", "member", "switch", "gateway", "other"]
+
+
+# Devices selected by a batch command, each specified criterion must match (a missing one matches all)
+class DeviceSelector(BaseModel):
+    names: list[str] | None = None
+    roles: list[DeviceRole] | None = None
+    asns: list[int] | None = None
+
+
+# Command executed concurrently on the selected devices
+class BatchCommandModel(BaseModel):
+    command: str
+    selector: DeviceSelector = DeviceSelector()
+    timeout: float = Field(default=60, gt=0, le=600)
+    max_bytes: int = Field(default=256 * 1024, gt=0, le=16 * 1024 * 1024)
@@ -1,5 +1,10 @@
 from pydantic import BaseModel
 
+from model.member_selection import MemberSelection
+
 
 class ConfigFileModel(BaseModel):
     filename: str
+    member_selection: MemberSelection | None = None
+    # Riutilizza i container del lab in esecuzione, ricreando solo i dispositivi cambiati
+    keep_warm: bool = True
@@ -0,0 +1,23 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field, model_validator
+
+# Strategie che selezionano i primi `limit` membri di un ordinamento
+LIMITED_STRATEGIES = ("first", "top_routes", "random")
+
+
+# Subset of the IXP members to emulate, overrides the `member_selection` section of the ixp.conf
+class MemberSelection(BaseModel):
+    # Senza strategia resta quella del file di configurazione
+    strategy: Literal["all", "first", "top_routes", "random", "asn_list"] | None = None
+    limit: int | None = Field(default=None, gt=0)
+    asns: list[int] | None = None
+    seed: int | None = None
+
+    @model_validator(mode="after")
+    def check_strategy_arguments(self) -> "MemberSelection":
+        if self.strategy == "asn_list" and not self.asns:
+            raise ValueError("strategy `asn_list` requires `asns`")
+        if self.strategy in LIMITED_STRATEGIES and self.limit is None:
+            raise ValueError(f"strategy `{self.strategy}` requires `limit`")
+        return self
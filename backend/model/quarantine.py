@@ -0,0 +1,13 @@
+from ipaddress import IPv4Address, IPv6Address
+
+from pydantic import BaseModel, Field
+
+
+# Candidate member to verify with the quarantine checks
+class QuarantineCheckModel(BaseModel):
+    asn: int
+    mac: str = Field(pattern=r"^([0-9a-fA-F]{2}:){5}[0-9a-fA-F]{2}$")
+    ipv4: IPv4Address | None = None
+    ipv6: IPv6Address | None = None
+    exclude_checks: list[str] = []
+    deadline: float | None = None
@@ -1,5 +1,10 @@
 import re
 import logging
+from typing import Iterable
+
+from digital_twin.ixp.configuration.rs.open_bgpd_rib_parser import RIB_ENTRY_HEADER, iter_detail_routes, iter_json_routes
+from digital_twin.ixp.model.rib_route import RibRoute, unpack_prefix
+from digital_twin.ixp.utils import json_loads
 
 
 def isHeader(line: str) -> bool:
@@ -194,6 +199,15 @@ class RibDump:
         Args:
             dump_content: Stringa con il contenuto del dump
         """
+        # Output di `bgpctl -j show rib`, se non è un JSON valido si prosegue con il parsing testuale
+        if dump_content.lstrip().startswith("{") and self._parse_from_json(dump_content):
+            return
+
+        # Output di `bgpctl show rib ... detail`, parsato in streaming dal parser condiviso con la quarantena
+        if RIB_ENTRY_HEADER in dump_content:
+            self._parse_from_detail(dump_content)
+            return
+
         lines_processed = 0
         lines_skipped = 0
         
@@ -224,6 +238,70 @@ class RibDump:
         
         logging.info(f"Processed {lines_processed} lines, added {len(self.rib_lines)} routes, skipped {lines_skipped}")
     
+    def _parse_from_detail(self, dump_content: str) -> None:
+        """
+        Parsa il dump dal formato dettagliato di OpenBGPD (un blocco per ogni rotta)
+
+        Args:
+            dump_content: Stringa con il contenuto del dump
+        """
+        self._add_routes(iter_detail_routes(dump_content))
+
+        logging.info(f"Processed detailed RIB, added {len(self.rib_lines)} routes")
+
+    def _parse_from_json(self, dump_content: str) -> bool:
+        """
+        Parsa il dump dall'output JSON di OpenBGPD
+
+        Args:
+            dump_content: Stringa con il contenuto del dump
+
+        Returns:
+            bool: True se il contenuto è stato parsato, False se non è un JSON valido
+        """
+        try:
+            result = json_loads(dump_content)
+        except ValueError as e:
+            logging.warning(f"Invalid JSON RIB dump, falling back to text parsing: {str(e)[:100]}")
+            return False
+
+        if not isinstance(result, dict):
+            return False
+
+        self._add_routes(iter_json_routes(result))
+
+        logging.info(f"Processed JSON RIB, added {len(self.rib_lines)} routes")
+        return True
+
+    def _add_routes(self, routes: Iterable[RibRoute]) -> None:
+        """
+        Aggiunge un prefisso per ogni rotta, i path multipli dello stesso prefisso vengono contati una volta
+
+        Args:
+            routes: Rotte prodotte dai parser dei route server
+        """
+        prefixes = set()
+        for route in routes:
+            if route.prefix not in prefixes:
+                prefixes.add(route.prefix)
+                self.rib_lines.add(RibLine(str(unpack_prefix(route.prefix))))
+
+    @classmethod
+    def from_routes(cls, routes: Iterable[RibRoute]) -> 'RibDump':
+        """
+        Crea un dump dalle rotte già parsate (es. da `RouteServerManager.query_rib`)
+
+        Args:
+            routes: Rotte del RIB
+
+        Returns:
+            RibDump: Dump con un prefisso per ogni rotta
+        """
+        dump = cls([])
+        dump._add_routes(routes)
+        logging.info(f"RibDump parsed: {len(dump.rib_lines)} routes from the route server")
+        return dump
+
     def intersection(self, other: 'RibDump') -> set[RibLine]:
         """
         Trova le rotte presenti in entrambi i dump
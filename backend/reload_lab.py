@@ -1,63 +1,160 @@
 import logging
-import os
+import time
 
-from Kathara.setting.Setting import Setting
+from Kathara.model.Lab import Lab
 
-from log import set_logging
 from digital_twin.ixp.configuration.frr_scenario_configuration_applier import FrrScenarioConfigurationApplier
-# from digital_twin.ixp.dumps.member_dump import MemberDump
-# from digital_twin.ixp.dumps.table_dump import TableDump
-from digital_twin.ixp.foundation.dumps.member_dump.member_dump_factory import MemberDumpFactory
-from digital_twin.ixp.foundation.dumps.table_dump.table_dump_factory import TableDumpFactory
-from digital_twin.ixp.globals import RESOURCES_FOLDER
-from digital_twin.ixp.network_scenario.network_scenario_manager import NetworkScenarioManager
+from digital_twin.ixp.network_scenario.network_scenario_manager import NetworkScenarioManager, ScenarioDiff
+from digital_twin.ixp.network_scenario.rpki_manager import RPKIManager
 from digital_twin.ixp.network_scenario.rs_manager import RouteServerManager
-from digital_twin.ixp.settings.settings import Settings
+from log import set_logging
+from start_lab import load_lab_settings, load_table_dump, run_in_worker
+from utils.job_manager import Job
+from utils.lab_serialization import serialize_lab, deserialize_lab
 
 
-def reload_lab(ixp_configs: str):
-    set_logging()
+def _run_phase(timings: dict, job: Job | None, name: str, func, *args):
+    if job:
+        job.set_phase(name)
+    phase_start = time.perf_counter()
+    result = func(*args)
+    timings[name] = round(time.perf_counter() - phase_start, 2)
+    return result
 
-    settings = Settings.get_instance()
-    settings.load_from_disk(ixp_configs)
 
-    Setting.get_instance().load_from_dict({"manager_type": "docker"})
+def build_reload_plan(ixp_configs_filename: str, previous_configurations: dict[str, str]) -> dict:
+    """
+    Entry point del processo worker: carica settings e dump, calcola il diff con il lab in esecuzione
+    e confronta il bgpd.conf di ogni membro con quello caricato in precedenza
 
-    member_dump = MemberDumpFactory()
-    entries = member_dump.load_from_file(os.path.join(RESOURCES_FOLDER, settings.peering_configuration))
+    Args:
+        ixp_configs_filename: Nome del file di configurazione del lab in esecuzione
+        previous_configurations: bgpd.conf dei membri in esecuzione, per nome del dispositivo
 
-    table_dump = TableDumpFactory(entries)
-    for v, file in settings.rib_dumps.items():
-        table_dump.load_from_file(os.path.join(RESOURCES_FOLDER, file))
+    Returns:
+        dict: il lab aggiornato serializzato (senza i dispositivi rimossi), il diff, le entry ARP
+        e la durata (secondi) di ogni fase
+    """
+    set_logging()
+    timings = {}
 
-    # Enable for debug
-    # table_dump.entries = dict(list(table_dump.entries.items())[0:4])
+    settings = _run_phase(timings, None, "load_settings", load_lab_settings, ixp_configs_filename)
+    table_dump = _run_phase(timings, None, "load_dumps", load_table_dump, settings)
 
     net_scenario_manager = NetworkScenarioManager()
     frr_conf = FrrScenarioConfigurationApplier(table_dump)
 
-    net_scenario = net_scenario_manager.build_diff(table_dump)
-    new_devices = dict(x for x in net_scenario.machines.items() if "new" in x[1].meta and x[1].meta["new"])
-    frr_conf.apply_to_devices(new_devices)
-
-    net_scenario_manager.deploy_devices(new_devices)
-    net_scenario_manager.update_interconnection(table_dump, new_devices)
-
-    # Upload RS configurations
-    rs_manager = RouteServerManager()
-    rs_info = rs_manager.get_device_info(net_scenario)
-    return_code = net_scenario_manager.copy_and_exec_by_device_info(rs_info)
-    if return_code != 0:
-        raise Exception("Error while hot reloading lab: RS Copy and Exec phase")
-
-    # Upload peerings configurations
-    peerings_info = frr_conf.get_device_info(net_scenario)
-    return_code = net_scenario_manager.copy_and_exec_by_device_info(peerings_info)
-    if return_code != 0:
-        raise Exception("Error while hot reloading lab: Peerings Copy and Exec phase")
-
-    logging.success("Configurations reload finished!")
-    return net_scenario
+    def diff():
+        lab = net_scenario_manager.build_diff(table_dump)
+        scenario_diff = ScenarioDiff()
+        added = dict(x for x in lab.machines.items() if x[1].meta.get("new", False))
+        scenario_diff.added = set(added)
+        scenario_diff.removed = set(name for name, device in lab.machines.items() if device.meta.get("del", False))
+        frr_conf.apply_to_devices(added)
+
+        # Il bgpd.conf dei membri in esecuzione resta nel lab, il reload successivo lo confronta con il nuovo
+        frr_conf.render_configurations(lab, exclude=scenario_diff.added)
+        for name, configuration in frr_conf.read_configurations(lab).items():
+            if name in scenario_diff.added:
+                continue
+            # Senza la configurazione precedente (lab scoperto) il membro viene sempre ricaricato
+            if previous_configurations.get(name, None) == configuration:
+                scenario_diff.kept.add(name)
+            else:
+                scenario_diff.reconfigured.add(name)
+
+        return lab, scenario_diff
+
+    (net_scenario, scenario_diff) = _run_phase(timings, None, "diff", diff)
+
+    return {
+        "lab": serialize_lab(net_scenario, exclude_machines=scenario_diff.removed),
+        "diff": scenario_diff.to_dict(),
+        "arp_entries": net_scenario_manager.generate_arp_entries(table_dump, scenario_diff.removed),
+        "timings": timings,
+    }
+
+
+def reload_lab(ixp_configs_filename: str, previous_lab: Lab | None = None, job: Job | None = None):
+    """
+    Hot reload del lab in esecuzione: vengono deployati e rimossi solo i membri aggiunti o tolti dai dump,
+    le configurazioni di route server e RPKI vengono aggiornate sui dispositivi in esecuzione, quella dei membri
+    solo dove il bgpd.conf generato è cambiato. Caricamento dei dump e diff avvengono nel processo worker
+
+    Args:
+        ixp_configs_filename: Nome del file di configurazione del lab in esecuzione
+        previous_lab: Lab in esecuzione, con il bgpd.conf caricato nei membri, opzionale
+        job: Job su cui riportare le fasi, opzionale
+
+    Returns:
+        tuple: il lab aggiornato e il report con i dispositivi toccati e la durata (secondi) di ogni fase
+    """
+    set_logging()
+    reload_start = time.perf_counter()
+    timings = {}
+
+    previous_configurations = FrrScenarioConfigurationApplier.read_configurations(previous_lab) if previous_lab else {}
+    plan = _run_phase(
+        timings, job, "plan", run_in_worker, build_reload_plan, ixp_configs_filename, previous_configurations
+    )
+    timings.update(plan["timings"])
+    diff = plan["diff"]
+    logging.info(f"Devices to add: {diff['added']}, devices to remove: {diff['removed']}, "
+                 f"peers to reconfigure: {len(diff['reconfigured'])}, unchanged peers: {len(diff['kept'])}")
+
+    # Il processo API ha bisogno delle stesse Settings per reload e quarantine
+    settings = load_lab_settings(ixp_configs_filename)
+    net_scenario = deserialize_lab(plan["lab"])
+    net_scenario_manager = NetworkScenarioManager(net_scenario)
+    net_scenario_manager.attach_api_objects()
+
+    new_devices = {name: net_scenario.get_machine(name) for name in diff["added"]}
+    del_devices = set(diff["removed"])
+    if del_devices:
+        _run_phase(timings, job, "undeploy", net_scenario_manager.undeploy_machines, del_devices)
+    if new_devices:
+        _run_phase(timings, job, "deploy", net_scenario_manager.deploy_devices, new_devices)
+    if new_devices or del_devices:
+        _run_phase(
+            timings, job, "interconnect", net_scenario_manager.update_interconnection,
+            plan["arp_entries"], new_devices, del_devices
+        )
+
+    def reconfigure(get_device_info, error_message: str) -> list[str]:
+        device_info = get_device_info(net_scenario)
+        if net_scenario_manager.copy_and_exec_by_device_info(device_info) != 0:
+            raise Exception(f"Error while hot reloading lab: {error_message}")
+        return sorted(device.name for device in device_info)
+
+    # I nuovi dispositivi hanno già la configurazione dal deploy, gli altri membri vengono ricaricati solo se cambiata
+    frr_conf = FrrScenarioConfigurationApplier(None, incremental_reload=True)
+
+    def get_peers_info(lab):
+        return frr_conf.get_rendered_device_info(lab, set(diff["reconfigured"]))
+
+    reconfigured = {
+        "rs": _run_phase(
+            timings, job, "reconfigure_rs", reconfigure, RouteServerManager().get_device_info, "RS Copy and Exec phase"
+        ),
+        "rpki": _run_phase(
+            timings, job, "reconfigure_rpki", reconfigure, RPKIManager().get_device_info, "RPKI Copy and Exec phase"
+        ) if settings.rpki else [],
+        "peers": _run_phase(
+            timings, job, "reconfigure_peers", reconfigure, get_peers_info, "Peerings Copy and Exec phase"
+        ),
+    }
+
+    timings["total"] = round(time.perf_counter() - reload_start, 2)
+    report = {
+        "added": diff["added"],
+        "removed": diff["removed"],
+        "reconfigured": reconfigured,
+        "unchanged": {"peers": diff["kept"]},
+        "timings": timings,
+    }
+
+    logging.success(f"Configurations reload finished in {timings['total']:.2f}s: {report}")
+    return net_scenario, report
 
 
 if __name__ == "__main__":
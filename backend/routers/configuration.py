@@ -2,16 +2,23 @@ import os
 
 from fastapi import APIRouter, UploadFile, Response, status
 
-from start_lab import build_lab
 from utils.responses import success_2xx, error_4xx, error_5xx
 from model.IXPConfFile import IXPConfFile
 from model.file import ConfigFileModel
 from utils.ixpconf_util import exists_file_in_ixpconfigs, create_file_in_ixpconfigs, get_ribs_content_from_ixpconf_name, get_rib_names_from_ixpconf_name
 from utils.server_context import ServerContext
+from utils.job_manager import JobCancelledError, get_job_manager, wait_for_job
 
 router = APIRouter(prefix="/ixp/file", tags=["IXP Lab Configuration"])
 
 
+def _build_job(filename: str):
+    # Importato al primo utilizzo, carica l'intero albero di digital_twin
+    from start_lab import build_lab_in_worker
+
+    return build_lab_in_worker(filename)
+
+
 @router.post("/running_ixpconf", status_code=status.HTTP_202_ACCEPTED)
 async def set_running_ixpconf(ixp_filename: ConfigFileModel, response: Response):
     filename = ixp_filename.filename
@@ -23,11 +30,12 @@ async def set_running_ixpconf(ixp_filename: ConfigFileModel, response: Response)
         return error_4xx(response=response,
                          status_code=status.HTTP_406_NOT_ACCEPTABLE,
                          message="ixp.conf file does not exist")
-    lab, _ = build_lab(filename)
-    ServerContext.set_ixpconf_filename(filename)
-    ServerContext.set_lab(lab)
-    ServerContext.set_is_lab_discovered(False)
-    ServerContext.set_total_machines(lab.machines)
+    build_job = get_job_manager().submit("build", lambda job: _build_job(filename))
+    try:
+        lab, _ = await wait_for_job(build_job)
+    except JobCancelledError:
+        return error_4xx(response=response, status_code=status.HTTP_409_CONFLICT, message="job cancelled")
+    ServerContext.update(ixpconf_filename=filename, lab=lab, is_lab_discovered=False, total_machines=lab.machines)
     return success_2xx(message="ixp.conf file set successfully")
 
 
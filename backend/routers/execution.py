@@ -1,23 +1,30 @@
+import json
 import logging
 from typing import Annotated
-from threading import Thread
 
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from utils.responses import *
-from Kathara.manager.Kathara import Kathara
-from fastapi import APIRouter, status, Response, Body
-from start_lab import build_lab, start_lab
-from reload_lab import reload_lab
+from fastapi import APIRouter, status, Response, Body, Query
 from model.file import ConfigFileModel
 from model.lab import Lab as BodyLab
-from utils.lab_utils import (
-    get_running_machines_names,
-    execute_command_on_machine,
-    discover_running_lab,
+from model.command import BatchCommandModel
+from utils.lab_utils import discover_running_lab
+from utils.command_utils import (
+    execute_command,
+    get_running_machines,
+    stream_command,
+    stream_batch_command,
+    select_devices,
+    DEFAULT_COMMAND_TIMEOUT,
+    MAX_COMMAND_TIMEOUT,
+    DEFAULT_COMMAND_OUTPUT_BYTES,
+    MAX_COMMAND_OUTPUT_BYTES,
 )
 from utils.server_context import ServerContext
+from utils.machine_inventory import get_machine_inventory
+from utils.job_manager import JOB_COMPLETED, Job, JobCancelledError, get_job_manager, wait_for_job
+from utils.wipe_utils import wipe_lab_resources
 import traceback
-import docker
 from datetime import datetime
 from cache_manager import get_stats_cache
 from utils.docker_utils import (
@@ -29,30 +36,70 @@ from utils.docker_utils import (
 router = APIRouter(prefix="/ixp", tags=["IXP Lab Execution"])
 
 
+# Job che ricostruisce in background il lab trovato all'avvio, annullato da start e wipe
+_discovery_job: Job | None = None
+_discovered_lab_hash: str | None = None
+# Ultimo job di start (wipe, build e deploy), finché è in corso il lab risulta in caricamento
+_start_job_ref: Job | None = None
+# Ultimo job di wipe richiesto con /wipe, lo start successivo dipende da esso o lo ripete se è fallito
+_wipe_job_ref: Job | None = None
+
+
 def startup():
-    found_lab_hash = discover_running_lab()
-    lab = (
-        Kathara.get_instance().get_lab_from_api(found_lab_hash)
-        if found_lab_hash
-        else None
-    )
-    ServerContext.set_is_lab_discovered(True if lab is not None else None)
-    ServerContext.set_lab(lab)
-    ServerContext.set_total_machines(lab.machines if lab else None)
-    ServerContext.set_ixpconf_filename(None)
+    global _discovery_job, _discovered_lab_hash
+
+    # Inventario dei dispositivi in esecuzione, aggiornato dagli eventi di Docker
+    get_machine_inventory().start()
+
+    context = ServerContext.update(lab=None, is_lab_discovered=None, total_machines=None, ixpconf_filename=None)
+
+    # Una sola query filtrata per label, il modello completo del lab viene caricato in background
+    _discovered_lab_hash = discover_running_lab()
+    if _discovered_lab_hash:
+        logging.info(f"Lab {_discovered_lab_hash} was discovered, loading it in background...")
+        lab_hash = _discovered_lab_hash
+        _discovery_job = get_job_manager().submit(
+            "discover", lambda job: _discover_job(job, lab_hash, context.version)
+        )
 
     logging.info("IXP API Started")
-    if ServerContext.get_is_lab_discovered():
-        logging.info("Lab was discovered!")
-    logging.info(
-        f"Context:\n"
-        f"Lab: {ServerContext.get_lab().hash if ServerContext.get_lab() else 'None'}\n"
-        f"Machines: {ServerContext.get_total_machines().keys() if ServerContext.get_lab() else 'None'}"
-    )
+
+
+def _discover_job(job: Job, lab_hash: str, context_version: int):
+    from Kathara.manager.Kathara import Kathara
+
+    job.set_phase("discover")
+    lab = Kathara.get_instance().get_lab_from_api(lab_hash)
+
+    # Applicato solo se nel frattempo un start o un wipe non hanno modificato il contesto
+    job.check_cancelled()
+    if ServerContext.update(
+        lab=lab, total_machines=lab.machines, is_lab_discovered=True, expected_version=context_version
+    ) is None:
+        logging.info(f"Discovered lab {lab.hash} was replaced while loading, skipping")
+        return
+
+    logging.info(f"Discovered lab {lab.hash} loaded, machines: {list(lab.machines.keys())}")
+
+
+def _is_discovery_pending() -> bool:
+    return _discovery_job is not None and not _discovery_job.is_finished()
+
+
+def _cancel_discovery() -> None:
+    if _is_discovery_pending():
+        get_job_manager().cancel(_discovery_job.id)
 
 
 @router.post("/start", status_code=status.HTTP_201_CREATED)
 async def run_namex_lab(ixp_file: ConfigFileModel, response: Response):
+    """
+    Accoda un unico job che rimuove il lab precedente, costruisce il nuovo e lo deploya (o riconcilia):
+    il fallimento o l'annullamento di una fase ferma le successive. La risposta contiene subito il `job_id`,
+    fasi e progresso sono consultabili su /ixp/jobs/{job_id}
+    """
+    global _start_job_ref
+
     try:
 
         # Pulisci la cache
@@ -61,39 +108,50 @@ async def run_namex_lab(ixp_file: ConfigFileModel, response: Response):
         logging.info(f"=== START LAB REQUEST ===")
         logging.info(f"Received filename: {ixp_file.filename}")
 
-        # IMPORTANTE: Wipe completo del lab precedente se esiste
-        if ServerContext.get_lab():
-            logging.info("Previous lab detected, wiping...")
-            try:
-                Kathara.get_instance().wipe()
-                logging.info("Previous lab wiped successfully")
-            except Exception as e:
-                logging.warning(f"Error wiping previous lab: {e}")
-
-        # Pulisci completamente il ServerContext
-        ServerContext.set_lab(None)
-        ServerContext.set_is_lab_discovered(None)
-        ServerContext.set_ixpconf_filename(None)
-        ServerContext.set_total_machines(None)
-
-        logging.info(f"Building new lab with config: {ixp_file.filename}")
-
-        # Costruisci il nuovo lab
-        lab, net_scenario_manager = build_lab(ixp_file.filename)
-
-        ServerContext.set_total_machines(lab.machines)
-        ServerContext.set_lab(lab)
-        ServerContext.set_is_lab_discovered(False)
-        ServerContext.set_ixpconf_filename(ixp_file.filename)
+        # Un lab costruito da questo processo (con i file di configurazione) può essere riconciliato invece di
+        # essere rimosso, un lab trovato all'avvio no
+        previous = ServerContext.snapshot()
+        keep_warm = ixp_file.keep_warm and previous.lab is not None and previous.is_lab_discovered is False
+
+        # IMPORTANTE: Wipe completo del lab precedente se esiste (anche se ancora in caricamento)
+        wipe_first = bool(previous.lab and not keep_warm) or _is_discovery_pending()
+        _cancel_discovery()
+
+        # Lo start non parte se il wipe richiesto prima fallisce, un wipe già fallito o annullato viene ripetuto
+        depends_on = []
+        if _wipe_job_ref is not None:
+            if not _wipe_job_ref.is_finished():
+                depends_on.append(_wipe_job_ref)
+            elif _wipe_job_ref.status != JOB_COMPLETED:
+                wipe_first = True
+
+        # Pulisci completamente il ServerContext, il job pubblica il nuovo lab solo se nel frattempo non cambia
+        context = ServerContext.update(lab=None, is_lab_discovered=None, ixpconf_filename=None, total_machines=None)
+
+        # Solo i campi inviati sovrascrivono quelli del file di configurazione
+        member_selection = (
+            ixp_file.member_selection.model_dump(exclude_unset=True, exclude_none=True)
+            if ixp_file.member_selection else None
+        )
+        fabric_collision_domains = None
+        if keep_warm:
+            from digital_twin.ixp.network_scenario.network_scenario_manager import NetworkScenarioManager
+
+            fabric_collision_domains = NetworkScenarioManager.get_fabric_collision_domains(previous.lab)
+
+        previous_lab = previous.lab if keep_warm else None
+        start_job = get_job_manager().submit(
+            "start", lambda job: _start_job(
+                job, ixp_file.filename, member_selection, fabric_collision_domains, wipe_first, previous_lab,
+                context.version
+            ),
+            depends_on=depends_on,
+        )
+        _start_job_ref = start_job
 
-        logging.info(f"Lab built successfully. Hash: {lab.hash}")
-        logging.info(f"Machines in lab: {list(lab.machines.keys())}")
+        logging.info(f"Lab start queued with config {ixp_file.filename}, job: {start_job.id}")
         logging.info(f"=========================")
-
-        # Starting lab on different thread
-        Thread(target=start_lab, args=(net_scenario_manager,)).start()
-
-        return success_2xx(key_mess="lab_hash", message=ServerContext.get_lab().hash)
+        return success_2xx(key_mess="job_id", message=start_job.id)
 
     except Exception as e:
         logging.error(f"Error starting the Lab: {e}")
@@ -103,56 +161,58 @@ async def run_namex_lab(ixp_file: ConfigFileModel, response: Response):
 
 @router.get("/running", status_code=status.HTTP_200_OK)
 async def get_namex_running_instance(response: Response):
-    if not ServerContext.get_lab():
+    context = ServerContext.snapshot()
+    if not context.lab and _start_job_ref is not None and not _start_job_ref.is_finished():
+        return success_2xx(
+            key_mess="info",
+            message={"hash": None, "discovered": False, "loading": True, "job_id": _start_job_ref.id},
+        )
+    if not context.lab and _is_discovery_pending():
+        return success_2xx(
+            key_mess="info",
+            message={"hash": _discovered_lab_hash, "discovered": True, "loading": True},
+        )
+    if not context.lab:
         return error_4xx(response, status.HTTP_404_NOT_FOUND, message="no lab running")
     return success_2xx(
         key_mess="info",
         message={
-            "hash": ServerContext.get_lab().hash,
-            "discovered": ServerContext.get_is_lab_discovered(),
+            "hash": context.lab_hash,
+            "discovered": context.is_lab_discovered,
         },
     )
 
 
 @router.post("/wipe", status_code=status.HTTP_200_OK)
 async def wipe_namex_lab(response: Response):
+    global _wipe_job_ref
+
     try:
         logging.info("Starting lab wipe...")
 
         # Pulisci la cache
         get_stats_cache().clear()
 
-        if not ServerContext.get_lab():
+        context = ServerContext.snapshot()
+        if not context.lab and not _is_discovery_pending():
             logging.warning("No lab to wipe")
             return success_2xx(message="no lab to wipe")
 
-        lab_hash = ServerContext.get_lab().hash
+        _cancel_discovery()
+        lab_hash = context.lab_hash if context.lab else _discovered_lab_hash
         logging.info(f"Wiping lab with hash: {lab_hash}")
 
         # Pulisci subito il context per rendere il lab "stopped" nell'interfaccia
-        lab_to_wipe = ServerContext.get_lab()
-        ServerContext.set_lab(None)
-        ServerContext.set_is_lab_discovered(None)
-        ServerContext.set_ixpconf_filename(None)
-        ServerContext.set_total_machines(None)
+        ServerContext.update(lab=None, is_lab_discovered=None, ixpconf_filename=None, total_machines=None)
 
         # Esegui wipe in background
-        def do_wipe():
-            try:
-                logging.info("Executing Kathara wipe...")
-                Kathara.get_instance().wipe()
-                logging.info("Kathara wipe completed")
-            except Exception as e:
-                logging.error(f"Error during background wipe: {e}")
-
-        # Avvia wipe in thread separato
-        import threading
-
-        wipe_thread = threading.Thread(target=do_wipe)
-        wipe_thread.start()
+        wipe_job = get_job_manager().submit("wipe", _wipe_job)
+        _wipe_job_ref = wipe_job
 
         logging.info("Wipe started in background")
-        return success_2xx(message="lab wipe initiated")
+        result = success_2xx(message="lab wipe initiated")
+        result["job_id"] = wipe_job.id
+        return result
 
     except Exception as e:
         logging.error(f"Error during wipe: {e}")
@@ -164,17 +224,77 @@ async def wipe_namex_lab(response: Response):
 
 @router.post("/hot_reload", status_code=status.HTTP_200_OK)
 async def hot_reload_namex_lab(lab: BodyLab, response: Response):
-    if not ServerContext.get_lab():
+    context = ServerContext.snapshot()
+    if not context.lab:
         return error_4xx(response, status.HTTP_404_NOT_FOUND, message="no lab running")
-    if ServerContext.get_lab().hash != lab.hash:
+    if context.lab_hash != lab.hash:
         return error_4xx(response, status.HTTP_404_NOT_FOUND, message="lab not found")
     try:
-        new_lab = reload_lab(ServerContext.get_ixpconf_filename())
-        ServerContext.set_lab(new_lab)
-        return success_2xx(key_mess="lab_hash", message=ServerContext.get_lab().hash)
+        ixpconf_filename = context.ixpconf_filename
+        previous_lab = context.lab
+        reload_job = get_job_manager().submit("reload", lambda job: _reload_job(job, ixpconf_filename, previous_lab))
+        new_lab, report = await wait_for_job(reload_job)
+        # Il lab ricaricato ha solo i file dei nuovi dispositivi e il bgpd.conf dei membri, non può essere riconciliato
+        ServerContext.update(lab=new_lab, total_machines=new_lab.machines, is_lab_discovered=True)
+        result = success_2xx(key_mess="lab_hash", message=new_lab.hash)
+        result["job_id"] = reload_job.id
+        result["reload"] = report
+        return result
+    except JobCancelledError:
+        logging.warning("Lab reload cancelled")
+        return error_4xx(response, status.HTTP_409_CONFLICT, message="job cancelled")
     except Exception as e:
         logging.error(f"Error reloading the Lab: {e}")
-        return error_5xx(response, message="couldn't start lab")
+        return error_5xx(response, message=f"couldn't reload lab: {str(e)}")
+
+
+# I moduli di build e reload importano l'intero albero di digital_twin, vengono caricati al primo utilizzo
+def _start_job(
+        job: Job, ixpconf_filename: str, member_selection: dict | None,
+        fabric_collision_domains: dict[str, list[str]] | None, wipe_first: bool, previous_lab, context_version: int
+):
+    from start_lab import build_lab_in_worker, start_deploy, start_reconcile
+
+    # Una fase fallita o annullata solleva un'eccezione e termina il job, le successive non partono
+    if wipe_first:
+        logging.info("Previous lab detected, wiping...")
+        _wipe_job(job)
+
+    job.set_phase("build")
+    lab, net_scenario_manager = build_lab_in_worker(ixpconf_filename, member_selection, fabric_collision_domains)
+
+    # Un wipe o un altro start arrivati durante la build hanno già sostituito il contesto
+    if ServerContext.update(
+        lab=lab, total_machines=lab.machines, is_lab_discovered=False, ixpconf_filename=ixpconf_filename,
+        expected_version=context_version
+    ) is None:
+        raise JobCancelledError(f"Job {job.id} superseded by a later lifecycle request")
+
+    logging.info(f"Lab built successfully. Hash: {lab.hash}")
+    logging.info(f"Machines in lab: {len(lab.machines)}")
+
+    if previous_lab is not None and lab.hash == previous_lab.hash:
+        logging.info("Same lab is running, reconciling it...")
+        return {"lab_hash": lab.hash, "reconcile": start_reconcile(net_scenario_manager, previous_lab, job)}
+
+    if previous_lab is not None:
+        logging.info(f"Running lab {previous_lab.hash} differs from the new one, wiping...")
+        _wipe_job(job)
+    start_deploy(net_scenario_manager, job)
+    return {"lab_hash": lab.hash}
+
+
+def _wipe_job(job: Job):
+    logging.info("Executing lab wipe...")
+    result = wipe_lab_resources(job)
+    logging.info(f"Lab wipe completed: {result}")
+    return result
+
+
+def _reload_job(job: Job, ixpconf_filename: str, previous_lab):
+    from reload_lab import reload_lab
+
+    return reload_lab(ixpconf_filename, previous_lab, job)
 
 
 @router.post("/execute_command/{rs_name}", status_code=status.HTTP_200_OK)
@@ -186,10 +306,11 @@ async def execute_command_on_rs(
     """
     logging.info(f"Executing command on {rs_name}: {command}")
 
-    if ServerContext.get_lab() is None:
+    lab = ServerContext.snapshot().lab
+    if lab is None:
         return error_4xx(response, status.HTTP_404_NOT_FOUND, message="lab not found")
 
-    machine_names = get_running_machines_names(ServerContext.get_lab().hash)
+    machine_names = await get_running_machines(lab.hash)
 
     if rs_name not in machine_names:
         logging.warning(f"Machine {rs_name} not found in running machines")
@@ -199,9 +320,8 @@ async def execute_command_on_rs(
 
     try:
         logging.info(f"Executing command on machine {rs_name}")
-        command_output = execute_command_on_machine(
-            rs_name, command, ServerContext.get_lab()
-        )
+        # Eseguito nel pool dei comandi, l'event loop resta libero durante comandi lunghi
+        command_output = await execute_command(rs_name, command, lab)
         logging.info(f"Command output: {command_output}")
         return success_2xx(message=command_output)
     except Exception as e:
@@ -209,6 +329,66 @@ async def execute_command_on_rs(
         return error_5xx(response, message=f"Error executing command: {str(e)}")
 
 
+@router.post("/execute_command/{rs_name}/stream", status_code=status.HTTP_200_OK)
+async def stream_command_on_rs(
+    rs_name: str,
+    command: Annotated[str, Body()],
+    response: Response,
+    timeout: Annotated[float, Query(gt=0, le=MAX_COMMAND_TIMEOUT)] = DEFAULT_COMMAND_TIMEOUT,
+    max_bytes: Annotated[int, Query(gt=0, le=MAX_COMMAND_OUTPUT_BYTES)] = DEFAULT_COMMAND_OUTPUT_BYTES,
+):
+    """
+    Execute a command on a specific device, stdout and stderr are sent as Server-Sent Events as they arrive
+    """
+    logging.info(f"Streaming command on {rs_name}: {command}")
+
+    lab = ServerContext.snapshot().lab
+    if lab is None:
+        return error_4xx(response, status.HTTP_404_NOT_FOUND, message="lab not found")
+
+    machine_names = await get_running_machines(lab.hash)
+
+    if rs_name not in machine_names:
+        logging.warning(f"Machine {rs_name} not found in running machines")
+        return error_4xx(
+            response, status.HTTP_404_NOT_FOUND, message="machine not found"
+        )
+
+    async def event_stream():
+        async for event_type, payload in stream_command(rs_name, command, lab, timeout, max_bytes):
+            yield f"event: {event_type}\ndata: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.post("/execute_batch", status_code=status.HTTP_200_OK)
+async def execute_batch_command(batch: BatchCommandModel, response: Response):
+    """
+    Execute a command on the devices matching the selector, results are sent as Server-Sent Events as each device
+    completes
+    """
+    context = ServerContext.snapshot()
+    if context.lab is None:
+        return error_4xx(response, status.HTTP_404_NOT_FOUND, message="lab not found")
+
+    # I dispositivi sono quelli del lab in memoria, senza interrogare nuovamente Kathara
+    lab = context.lab
+    machine_names = select_devices(context.machine_names, batch.selector)
+    if not machine_names:
+        return error_4xx(response, status.HTTP_404_NOT_FOUND, message="no device matches the selector")
+
+    logging.info(f"Executing batch command on {len(machine_names)} devices: {batch.command}")
+
+    async def event_stream():
+        async for result in stream_batch_command(
+            machine_names, batch.command, lab, batch.timeout, batch.max_bytes
+        ):
+            yield f"event: result\ndata: {json.dumps(result)}\n\n"
+        yield f"event: end\ndata: {json.dumps({'devices': machine_names})}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 def calculate_cpu_percent(stats, machine_name):
     """
     Calcola la percentuale CPU in modo robusto con validazione e normalizzazione.
@@ -338,10 +518,13 @@ def calculate_uptime(container, machine_name):
 
 @router.get("/devices", status_code=status.HTTP_200_OK)
 async def get_lab_devices(response: Response):
-    if not ServerContext.get_lab():
+    import docker
+
+    context = ServerContext.snapshot()
+    if not context.lab:
         return error_4xx(response, status.HTTP_404_NOT_FOUND, message="no lab running")
 
-    lab = ServerContext.get_lab()
+    lab = context.lab
 
     # Prova a usare la cache (5 secondi TTL)
     cache_key = f"devices_{lab.hash}"
@@ -359,8 +542,9 @@ async def get_lab_devices(response: Response):
         from routers.infos import get_docker_client
 
         docker_client = get_docker_client()
-        all_containers = docker_client.containers.list()
-        logging.info(f"Found {len(all_containers)} running containers")
+        # Indice nome dispositivo -> container dello snapshot, calcolato una sola volta per lab
+        container_index = context.container_index()
+        logging.info(f"Found {len(container_index)} containers of lab {lab.hash}")
 
         for machine_name, machine in lab.machines.items():
             device_stats = {
@@ -380,16 +564,14 @@ async def get_lab_devices(response: Response):
             }
 
             try:
-                # Cerca container - prima nella lista già caricata (veloce)
+                # Cerca container - prima nell'indice per label del lab (veloce)
                 container = None
 
-                for c in all_containers:
-                    if machine_name in c.name and lab.hash in c.name:
-                        container = c
-                        logging.info(
-                            f"Found container {c.name} by search for device {machine_name}"
-                        )
-                        break
+                if machine_name in container_index:
+                    try:
+                        container = docker_client.containers.get(container_index[machine_name])
+                    except docker.errors.NotFound:
+                        container = None
 
                 # Fallback: cerca per nome esatto (raro)
                 if not container:
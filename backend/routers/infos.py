@@ -1,27 +1,26 @@
 import logging
 import time
-import docker
 from datetime import datetime, timedelta
 
 from starlette.websockets import WebSocketDisconnect
-from model.rib import RibDump
 from utils.file_utils import get_resource_file
 from utils.ixpconf_util import exists_file_in_ixpconfigs, get_rib_names_from_ixpconf_name, \
     get_ribs_content_from_ixpconf_name
 
 from utils.responses import *
-from Kathara.exceptions import MachineNotFoundError
-from Kathara.manager.Kathara import Kathara
 from fastapi import APIRouter, status, Response, WebSocket, Query
 from utils.logs_utils import read_logs_file_content, init_logs_ws, get_ws_sync_payload, count_log_lines
 from utils.responses import success_2xx, error_4xx
 from utils.server_context import ServerContext
-from utils.lab_utils import get_running_machines_names as get_running_machines_names_from_lab, filter_machines_info, \
-    execute_command_on_machine
+from utils.lab_utils import filter_machines_info
+from utils.command_utils import get_running_machines, run_in_command_pool
 from utils.docker_utils import get_docker_client, get_all_running_containers, find_container_by_name
 
 router = APIRouter(prefix="/ixp/info", tags=["IXP Info"])
 
+# Vendor dei route server di un lab trovato all'avvio, senza i settings del file di configurazione
+DEFAULT_RS_CONFIG = "open_bgpd"
+
 # ==================== CACHE SYSTEM ====================
 
 class SimpleCache:
@@ -52,6 +51,8 @@ def get_docker_client():
     """Docker client singleton"""
     global _docker_client
     if _docker_client is None:
+        import docker
+
         _docker_client = docker.from_env()
     return _docker_client
 
@@ -74,14 +75,16 @@ def clear_cache():
 
 @router.get("/context")
 async def context(response: Response):
-    if ServerContext.get_lab() is not None:
+    ctx = ServerContext.snapshot()
+    if ctx.lab is not None:
         return {
-            "result": ServerContext is not None,
-            "lab": ServerContext.get_lab().name,
-            "is_discovered": ServerContext.get_is_lab_discovered(),
-            "ixpconfs": ServerContext.get_ixpconf_filename(),
-            "lab_hash": ServerContext.get_lab().hash,
-            "lab_machines": len(ServerContext.get_lab().machines) 
+            "result": True,
+            "lab": ctx.lab.name,
+            "is_discovered": ctx.is_lab_discovered,
+            "ixpconfs": ctx.ixpconf_filename,
+            "lab_hash": ctx.lab_hash,
+            "lab_machines": len(ctx.machine_names),
+            "version": ctx.version,
         }
     return error_4xx(response, status.HTTP_404_NOT_FOUND, message="no server context")
 
@@ -107,19 +110,22 @@ async def get_logs(response: Response):
 @router.get("/stats/", status_code=status.HTTP_200_OK)
 async def get_machine_stats(response: Response):
     """Stats con caching per ridurre il carico"""
+    from Kathara.exceptions import MachineNotFoundError
+    from Kathara.manager.Kathara import Kathara
     
-    if not ServerContext.get_lab():
+    lab = ServerContext.snapshot().lab
+    if not lab:
         return error_4xx(response, message="Lab not found")
     
     # Prova cache
-    cache_key = f"stats_{ServerContext.get_lab().hash}"
+    cache_key = f"stats_{lab.hash}"
     cached_stats = _stats_cache.get(cache_key)
     
     if cached_stats is not None:
         return success_2xx(key_mess="stats", message=cached_stats)
     
     try:
-        stats_gen = Kathara.get_instance().get_machines_stats(ServerContext.get_lab().hash)
+        stats_gen = Kathara.get_instance().get_machines_stats(lab.hash)
         stats = next(stats_gen)
         
         stats_dict = {}
@@ -140,11 +146,12 @@ async def get_machine_stats(response: Response):
 
 @router.get("/machines/count/running", status_code=status.HTTP_200_OK)
 async def get_running_machines_count(response: Response):
-    if not ServerContext.get_lab() or not ServerContext.get_lab().hash:
+    lab_hash = ServerContext.snapshot().lab_hash
+    if not lab_hash:
         return error_4xx(response, message="cannot find lab")
     
     try:
-        count = len(Kathara.get_instance().get_lab_from_api(ServerContext.get_lab().hash).machines)
+        count = len(await get_running_machines(lab_hash))
         return success_2xx(key_mess="count", message=count)
     except Exception as e:
         logging.error(f"Error getting running machines count: {e}")
@@ -153,18 +160,20 @@ async def get_running_machines_count(response: Response):
 
 @router.get("/machines/count/all/", status_code=status.HTTP_200_OK)
 async def get_total_machines_count(response: Response):
-    if not ServerContext.get_lab() or not ServerContext.get_lab().hash:
+    ctx = ServerContext.snapshot()
+    if not ctx.lab_hash:
         return error_4xx(response=response, message="cannot find lab")
-    return success_2xx(key_mess="count", message=len(ServerContext.get_lab().machines))
+    return success_2xx(key_mess="count", message=len(ctx.machine_names))
 
 
 @router.get("/machines/names/all/", status_code=status.HTTP_200_OK)
 async def get_running_machines_names(response: Response):
-    if not ServerContext.get_lab() or not ServerContext.get_lab().hash:
+    lab_hash = ServerContext.snapshot().lab_hash
+    if not lab_hash:
         return error_4xx(response=response, status_code=status.HTTP_404_NOT_FOUND, message="cannot find lab")
     
     try:
-        names = get_running_machines_names_from_lab(ServerContext.get_lab().hash)
+        names = await get_running_machines(lab_hash)
         return success_2xx(message=names)
     except Exception as e:
         logging.error(f"Error getting machine names: {e}")
@@ -205,6 +214,7 @@ async def logs_via_websocket(ws: WebSocket):
 @router.get("/docker/machines", status_code=status.HTTP_200_OK)
 async def get_docker_machines():
     """Docker machines con caching"""
+    from Kathara.manager.Kathara import Kathara
     
     cache_key = "docker_machines"
     cached_machines = _stats_cache.get(cache_key)
@@ -253,7 +263,12 @@ async def get_ribs_diff(
     ixp_conf_arg: str | None = None, 
     machine_ip_type: int = Query(default=4, ge=4, le=6)
 ):
-    ixp_conf_name = ixp_conf_arg if ixp_conf_arg else ServerContext.get_ixpconf_filename()
+    from digital_twin.ixp.network_scenario.rs_manager import RouteServerManager
+    from digital_twin.ixp.settings.settings import Settings
+    from model.rib import RibDump
+
+    ctx = ServerContext.snapshot()
+    ixp_conf_name = ixp_conf_arg if ixp_conf_arg else ctx.ixpconf_filename
     
     if not ixp_conf_name:
         return error_4xx(
@@ -277,21 +292,28 @@ async def get_ribs_diff(
                 message=f"No RIB dump configured for IPv{machine_ip_type}"
             )
         
-        # Esegui comando bgpctl show rib
-        logging.info(f"Executing 'bgpctl show rib' on {machine_name}")
-        command_result = execute_command_on_machine(machine_name, "bgpctl show rib", ServerContext.get_lab())
-        
-        actual_ribs_content = command_result if isinstance(command_result, str) else str(command_result)
-        
-        if not actual_ribs_content or actual_ribs_content.strip() == "":
+        if ctx.lab is None or not ctx.lab.has_machine(machine_name):
+            return error_4xx(response, status.HTTP_404_NOT_FOUND, message=f"{machine_name} not found in the running lab")
+
+        # Il tipo del route server è nei settings del lab avviato, un lab trovato all'avvio usa OpenBGPD
+        rs = Settings.get_instance().route_servers.get(machine_name, None)
+        config_name = rs["type"] if rs else DEFAULT_RS_CONFIG
+
+        def query_actual_rib() -> tuple[int, RibDump]:
+            # Solo la famiglia di indirizzi del dump atteso, in JSON se supportato con fallback sul testo
+            (exit_code, routes) = RouteServerManager().query_rib(
+                ctx.lab.get_machine(machine_name), config_name, machine_ip_type
+            )
+            return exit_code, RibDump.from_routes(routes)
+
+        logging.info(f"Querying the IPv{machine_ip_type} RIB of {machine_name} ({config_name})")
+        (exit_code, actual_rib_dump) = await run_in_command_pool(query_actual_rib)
+
+        if exit_code != 0:
             return error_4xx(
                 response=response,
-                message=f"Empty or invalid RIB output from {machine_name}"
+                message=f"Cannot read the RIB of {machine_name} (exit code {exit_code})"
             )
-        
-        # Crea dump dall'output attuale
-        logging.info(f"Parsing actual RIB from {machine_name}")
-        actual_rib_dump = RibDump(actual_ribs_content)
         logging.info(f"Actual RIB has {len(actual_rib_dump)} routes")
         
         # Carica dump atteso dal file
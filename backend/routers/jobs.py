@@ -0,0 +1,29 @@
+from fastapi import APIRouter, status, Response
+
+from utils.job_manager import get_job_manager
+from utils.responses import success_2xx, error_4xx
+
+router = APIRouter(prefix="/ixp/jobs", tags=["IXP Lab Jobs"])
+
+
+@router.get("/", status_code=status.HTTP_200_OK)
+async def get_all_jobs():
+    return success_2xx(key_mess="jobs", message=[job.to_dict() for job in get_job_manager().get_all()])
+
+
+@router.get("/{job_id}", status_code=status.HTTP_200_OK)
+async def get_job(job_id: str, response: Response):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return error_4xx(response, status.HTTP_404_NOT_FOUND, message="job not found")
+    return success_2xx(key_mess="job", message=job.to_dict())
+
+
+@router.post("/{job_id}/cancel", status_code=status.HTTP_202_ACCEPTED)
+async def cancel_job(job_id: str, response: Response):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return error_4xx(response, status.HTTP_404_NOT_FOUND, message="job not found")
+    if not get_job_manager().cancel(job_id):
+        return error_4xx(response, status.HTTP_409_CONFLICT, message="job already finished")
+    return success_2xx(key_mess="job", message=job.to_dict())
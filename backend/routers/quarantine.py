@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+import threading
+from contextlib import closing
+from typing import AsyncGenerator
+
+from fastapi import APIRouter, status, Response, WebSocket
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.websockets import WebSocketDisconnect
+
+from model.quarantine import QuarantineCheckModel
+from utils.quarantine_utils import get_member_dump_cache, is_quarantine_configured, action_result_to_dict
+from utils.responses import error_4xx
+from utils.server_context import ServerContext
+
+router = APIRouter(prefix="/ixp/quarantine", tags=["IXP Quarantine"])
+
+# Le verifiche usano container di probe e catture sui RS, quindi ne eseguiamo una alla volta
+_check_lock = threading.Lock()
+
+
+def startup():
+    """
+    Prepara l'immagine del probe in background, così la prima verifica non deve attenderne la build
+    """
+    def prepare_probe_image():
+        from digital_twin.ixp.quarantine.security.probe_pool import ProbePool
+
+        try:
+            ProbePool.get_instance().ensure_image()
+        except Exception as e:
+            logging.warning(f"Couldn't prepare the quarantine probe image: {e}")
+
+    threading.Thread(target=prepare_probe_image, name="probe-image", daemon=True).start()
+
+
+def _validate_check_request(check: QuarantineCheckModel) -> str | None:
+    if not ServerContext.snapshot().lab:
+        return "no lab running"
+    if not is_quarantine_configured():
+        return "quarantine configuration not loaded, start the lab from an ixp configuration"
+    if check.ipv4 is None and check.ipv6 is None:
+        return "at least one of ipv4 or ipv6 must be specified"
+    return None
+
+
+def _start_checks(check: QuarantineCheckModel) -> asyncio.Queue:
+    """
+    Esegue le verifiche in un thread in background, il lock di `_check_lock` deve essere già acquisito
+    e viene rilasciato solo quando nessuna verifica è più in esecuzione
+
+    Returns:
+        asyncio.Queue: riceve (tipo evento, payload) appena disponibili, il tipo è `result`, `error` oppure `end`.
+            None indica la fine delle verifiche
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    lab = ServerContext.snapshot().lab
+
+    def run():
+        all_passed = True
+        try:
+            # Le azioni (e i manager di Kathara) vengono caricati alla prima verifica
+            from digital_twin.ixp.quarantine.action_manager import ActionManager
+
+            members = get_member_dump_cache().get()
+            action_manager = ActionManager(exclude=check.exclude_checks)
+            # Il generatore termina solo quando le verifiche oltre la deadline sono state fermate e pulite,
+            # viene chiuso prima di rilasciare il lock anche in caso di errore
+            with closing(action_manager.check_iter(
+                    lab, members, deadline=check.deadline,
+                    asn=check.asn, mac=check.mac, ipv4=check.ipv4, ipv6=check.ipv6
+            )) as action_results:
+                for action_result in action_results:
+                    all_passed = all_passed and action_result.passed()
+                    loop.call_soon_threadsafe(queue.put_nowait, ("result", action_result_to_dict(action_result)))
+            loop.call_soon_threadsafe(queue.put_nowait, ("end", {"passed": all_passed}))
+        except Exception as e:
+            logging.exception("Error while running quarantine checks")
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", {"message": str(e)}))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+            _check_lock.release()
+
+    logging.info(f"Starting quarantine checks for AS{check.asn} ({check.mac})")
+    threading.Thread(target=run, name="quarantine-check", daemon=True).start()
+
+    return queue
+
+
+async def _iter_events(queue: asyncio.Queue) -> AsyncGenerator[tuple[str, dict], None]:
+    while (event := await queue.get()) is not None:
+        yield event
+
+
+@router.post("/check", status_code=status.HTTP_200_OK)
+async def check_candidate(check: QuarantineCheckModel, response: Response):
+    """
+    Esegue le verifiche di quarantena sul lab corrente e invia i risultati come Server-Sent Events
+    """
+    error = _validate_check_request(check)
+    if error:
+        return error_4xx(response, status.HTTP_409_CONFLICT, message=error)
+    if not _check_lock.acquire(blocking=False):
+        return error_4xx(response, status.HTTP_409_CONFLICT, message="quarantine checks already running")
+
+    queue = _start_checks(check)
+
+    async def event_stream():
+        async for event_type, payload in _iter_events(queue):
+            yield f"event: {event_type}\ndata: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.websocket("/ws/check")
+async def check_candidate_via_websocket(ws: WebSocket):
+    """
+    Il client invia la richiesta di verifica come JSON e riceve un messaggio per ogni risultato
+    """
+    await ws.accept()
+    try:
+        try:
+            check = QuarantineCheckModel.model_validate(await ws.receive_json())
+        except ValidationError as e:
+            await ws.send_json({"type": "error", "message": str(e)})
+            await ws.close()
+            return
+
+        error = _validate_check_request(check)
+        if error is None and not _check_lock.acquire(blocking=False):
+            error = "quarantine checks already running"
+        if error:
+            await ws.send_json({"type": "error", "message": error})
+            await ws.close()
+            return
+
+        async for event_type, payload in _iter_events(_start_checks(check)):
+            await ws.send_json({"type": event_type, **payload})
+        await ws.close()
+    except WebSocketDisconnect:
+        logging.info("WS Client Disconnected")
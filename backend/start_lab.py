@@ -1,44 +1,103 @@
+import multiprocessing
 import threading
 import logging
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 from Kathara.setting.Setting import Setting
 
 from log import set_logging
 from digital_twin.ixp.configuration.frr_scenario_configuration_applier import FrrScenarioConfigurationApplier
 from digital_twin.ixp.foundation.dumps.member_dump.member_dump_factory import MemberDumpFactory
+from digital_twin.ixp.foundation.dumps.table_dump.table_dump import TableDump
 from digital_twin.ixp.foundation.dumps.table_dump.table_dump_factory import TableDumpFactory
 from globals import BACKEND_RESOURCES_FOLDER, BACKEND_IXPCONFIGS_FOLDER
 from digital_twin.ixp.network_scenario.network_scenario_manager import NetworkScenarioManager
 from digital_twin.ixp.network_scenario.rs_manager import RouteServerManager
 from digital_twin.ixp.settings.settings import Settings
 from utils.dt_utils import load_settings_from_disk
+from utils.job_manager import Job
+from utils.lab_serialization import serialize_lab, deserialize_lab
+from utils.lab_utils import get_running_machines_names
+from utils.machine_inventory import get_machine_inventory
 
 
-def start_deploy(net_scenario_manager: NetworkScenarioManager):
+def start_deploy(net_scenario_manager: NetworkScenarioManager, job: Job | None = None):
     logging.info("Deploying lab..")
+    deploy_start = time.perf_counter()
+    if job:
+        job.set_phase("undeploy")
     net_scenario_manager.undeploy()
-    net_scenario_manager.deploy_chunks()
-    logging.info("Deploy lab complete")
+    if job:
+        job.set_phase("deploy")
+    net_scenario_manager.deploy_chunks(progress_callback=job.set_progress if job else None)
+    logging.info(f"Deploy lab complete in {time.perf_counter() - deploy_start:.2f}s")
 
 
-def build_lab(ixp_configs_filename: str):
+def start_reconcile(net_scenario_manager: NetworkScenarioManager, previous_lab, job: Job | None = None) -> dict:
     """
-    Build lab from IXP configuration file
-    
+    Porta il lab in esecuzione al nuovo lab (stesso hash) toccando solo i dispositivi cambiati:
+    quelli invariati restano in esecuzione, i route server con la sola configurazione cambiata vengono ricaricati
+
     Args:
-        ixp_configs_filename: Name of the config file (e.g., 'ixp.conf', 'prova.conf')
+        net_scenario_manager: Manager del nuovo lab
+        previous_lab: Lab costruito in precedenza e in esecuzione, con i file di configurazione
+
+    Returns:
+        dict: dispositivi per ogni categoria del diff
     """
-    set_logging()
+    logging.info("Reconciling running lab..")
+    reconcile_start = time.perf_counter()
+    lab = net_scenario_manager.net_scenario
 
-    logging.info("Building lab..")
-    logging.info(f"Config filename received: {ixp_configs_filename}")
-    
-    # Get Settings singleton instance
-    settings: Settings = Settings.get_instance()
-    settings.load_from_disk()
-    logging.info(f"settings: {settings}")
-    
+    inventory = get_machine_inventory()
+    if inventory.is_synced():
+        running_machines = set(inventory.get_running_machines(lab.hash))
+    else:
+        running_machines = set(get_running_machines_names(lab.hash))
+
+    diff = net_scenario_manager.diff(
+        previous_lab, running_machines, reconfigurable=set(Settings.get_instance().route_servers.keys())
+    )
+    logging.info(f"Lab diff: {diff}")
+
+    if job:
+        job.set_phase("undeploy")
+    net_scenario_manager.undeploy_machines(diff.removed | diff.recreated)
+
+    if job:
+        job.set_phase("deploy")
+    net_scenario_manager.deploy_chunks(
+        progress_callback=job.set_progress if job else None, selected_machines=diff.added | diff.recreated
+    )
+
+    if diff.reconfigured:
+        if job:
+            job.set_phase("reconfigure")
+        rs_info = {
+            device: info for device, info in RouteServerManager().get_device_info(lab).items()
+            if device.name in diff.reconfigured
+        }
+        if net_scenario_manager.copy_and_exec_by_device_info(rs_info) != 0:
+            raise Exception("Error while reconciling lab: RS Copy and Exec phase")
+
+    if diff.arp_outdated:
+        if job:
+            job.set_phase("refresh_arp")
+        net_scenario_manager.refresh_arp_entries(diff.arp_outdated)
+
+    logging.info(f"Reconcile lab complete in {time.perf_counter() - reconcile_start:.2f}s")
+    return diff.to_dict()
+
+
+def load_lab_settings(ixp_configs_filename: str) -> Settings:
+    """
+    Load Settings singleton and Kathara settings from IXP configuration file
+
+    Args:
+        ixp_configs_filename: Name of the config file (e.g., 'ixp.conf', 'prova.conf')
+    """
     # ✅ CORRETTO - USA IL PARAMETRO RICEVUTO
     config_file_path = os.path.join(BACKEND_IXPCONFIGS_FOLDER, ixp_configs_filename)
     
@@ -48,15 +107,71 @@ def build_lab(ixp_configs_filename: str):
     if not os.path.exists(config_file_path):
         raise FileNotFoundError(f"Config file not found: {config_file_path}")
     
-    # Carica settings dal file specificato
-    load_settings_from_disk(settings, config_file_path)
+    # Carica settings di default e dal file specificato in un nuovo oggetto, che sostituisce il singleton solo
+    # a caricamento completato: chi legge le Settings durante build e reload non vede mai valori a metà
+    settings = load_settings_from_disk(config_file_path)
+    logging.info(f"settings: {settings}")
 
     # Configura Kathara per usare Docker
     Setting.get_instance().load_from_dict({"manager_type": "docker"})
 
+    return settings
+
+
+def build_lab(
+        ixp_configs_filename: str, member_selection: dict | None = None,
+        fabric_collision_domains: dict[str, list[str]] | None = None
+):
+    """
+    Build lab from IXP configuration file
+    
+    Args:
+        ixp_configs_filename: Name of the config file (e.g., 'ixp.conf', 'prova.conf')
+        member_selection: Optional override of the `member_selection` section of the config file
+        fabric_collision_domains: Collision domains of the running lab, kept for the devices it already has
+    """
+    set_logging()
+    build_start = time.perf_counter()
+
+    logging.info("Building lab..")
+    logging.info(f"Config filename received: {ixp_configs_filename}")
+    
+    settings = load_lab_settings(ixp_configs_filename)
+
+    table_dump = load_table_dump(settings, member_selection)
+
+    # Build network scenario
+    phase_start = time.perf_counter()
+    if fabric_collision_domains:
+        NetworkScenarioManager.restore_collision_domains(fabric_collision_domains)
+    net_scenario_manager = NetworkScenarioManager()
+    frr_conf = FrrScenarioConfigurationApplier(table_dump)
+    rs_manager = RouteServerManager()
+
+    net_scenario = net_scenario_manager.build(table_dump)
+    frr_conf.apply_to_network_scenario(net_scenario)
+    rs_manager.apply_to_network_scenario(net_scenario)
+    net_scenario_manager.interconnect(table_dump)
+    logging.info(f"Network scenario built in {time.perf_counter() - phase_start:.2f}s")
+    
+    logging.info(f"Lab built successfully in {time.perf_counter() - build_start:.2f}s, hash: {net_scenario.hash}")
+    logging.info(f"Machines in lab: {len(net_scenario.machines)}")
+    
+    return net_scenario, net_scenario_manager
+
+
+def load_table_dump(settings: Settings, member_selection: dict | None = None) -> TableDump:
+    """
+    Carica member dump e RIB dump indicati nelle Settings e seleziona i membri da emulare
+
+    Args:
+        settings: Settings caricate dal file di configurazione
+        member_selection: Override opzionale della sezione `member_selection` del file di configurazione
+    """
     logging.info(f"Peering configuration: {settings.peering_configuration}")
     
     # Carica member dump
+    phase_start = time.perf_counter()
     member_dump_class = MemberDumpFactory(submodule_package="digital_twin").get_class_from_name(
         settings.peering_configuration["type"]
     )
@@ -73,24 +188,60 @@ def build_lab(ixp_configs_filename: str):
         dump_path = os.path.join(BACKEND_RESOURCES_FOLDER, file)
         logging.info(f"Loading RIB dump from: {dump_path}")
         table_dump.load_from_file(dump_path)
+    logging.info(f"Dumps loaded in {time.perf_counter() - phase_start:.2f}s")
 
-    # Enable for debug - limit to 5 entries
-    table_dump.entries = dict(list(table_dump.entries.items())[0:5])
+    # Selezione dei membri da emulare, la richiesta ha la precedenza sul file di configurazione
+    selection = {**(settings.member_selection or {}), **(member_selection or {})}
+    if selection:
+        logging.info(f"Member selection: {selection}")
+        table_dump.select_entries(**selection)
+    logging.info(f"Members to emulate: {len(table_dump.entries)}")
 
-    # Build network scenario
-    net_scenario_manager = NetworkScenarioManager()
-    frr_conf = FrrScenarioConfigurationApplier(table_dump)
-    rs_manager = RouteServerManager()
+    return table_dump
 
-    net_scenario = net_scenario_manager.build(table_dump)
-    frr_conf.apply_to_network_scenario(net_scenario)
-    rs_manager.apply_to_network_scenario(net_scenario)
-    net_scenario_manager.interconnect(table_dump)
-    
-    logging.info(f"Lab built successfully, hash: {net_scenario.hash}")
-    logging.info(f"Machines in lab: {list(net_scenario.machines.keys())}")
-    
-    return net_scenario, net_scenario_manager
+
+def build_lab_description(
+        ixp_configs_filename: str, member_selection: dict | None = None,
+        fabric_collision_domains: dict[str, list[str]] | None = None
+) -> dict:
+    """
+    Entry point of the build worker process: build the lab and return its serialized description
+    """
+    lab, _ = build_lab(ixp_configs_filename, member_selection, fabric_collision_domains)
+    return serialize_lab(lab)
+
+
+def run_in_worker(func, *args):
+    """
+    Run a function in a separate process, so parsing and file generation do not hold the GIL of the API process
+
+    A fresh process is spawned for each call, so digital_twin singletons (IPAM, CollisionDomain)
+    always start from a clean state.
+    """
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp_context) as executor:
+        return executor.submit(func, *args).result()
+
+
+def build_lab_in_worker(
+        ixp_configs_filename: str, member_selection: dict | None = None,
+        fabric_collision_domains: dict[str, list[str]] | None = None
+):
+    """
+    Build lab in the worker process, see `run_in_worker`
+    """
+    build_start = time.perf_counter()
+    description = run_in_worker(
+        build_lab_description, ixp_configs_filename, member_selection, fabric_collision_domains
+    )
+
+    # Il processo API ha bisogno delle stesse Settings per deploy, reload e quarantine
+    load_lab_settings(ixp_configs_filename)
+    lab = deserialize_lab(description)
+    net_scenario_manager = NetworkScenarioManager(lab)
+    logging.info(f"Lab built in worker process in {time.perf_counter() - build_start:.2f}s")
+
+    return lab, net_scenario_manager
 
 
 def start_lab(net_scenario_manager):
@@ -0,0 +1,66 @@
+"""
+Profilo del cold start delle API, basato su `python -X importtime`
+
+Importa `backend` in un processo nuovo, misura il tempo totale e mostra i moduli con il tempo di import
+cumulativo più alto. Termina con codice 1 se il budget di cold start viene superato.
+
+Uso: python startup_profile.py [--budget SECONDI] [--top N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Budget di cold start (secondi) per l'import dell'applicazione, prima del bind del server
+COLD_START_BUDGET = 1.5
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, int, str]]:
+    """
+    Parsa l'output di `-X importtime`
+
+    Returns:
+        list: (tempo proprio in us, tempo cumulativo in us, modulo), i moduli annidati mantengono l'indentazione
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        (self_us, cumulative_us, module) = line[len("import time:"):].split("|", 2)
+        entries.append((int(self_us), int(cumulative_us), module.rstrip()))
+
+    return entries
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Profile the cold start of the IXP Digital Twin API")
+    parser.add_argument("--budget", type=float, default=COLD_START_BUDGET, help="Cold start budget in seconds")
+    parser.add_argument("--top", type=int, default=25, help="Number of modules to show")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+
+    entries = parse_importtime(result.stderr)
+    if result.returncode != 0:
+        print("\n".join(line for line in result.stderr.splitlines() if not line.startswith("import time:")))
+        return 2
+
+    print(f"{'cumulative [ms]':>16} {'self [ms]':>10}  module")
+    for (self_us, cumulative_us, module) in sorted(entries, key=lambda x: x[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:16.1f} {self_us / 1000:10.1f}  {module}")
+
+    print(f"\nModules imported: {len(entries)}")
+    print(f"Cold start: {elapsed:.2f}s (budget {args.budget:.2f}s)")
+
+    return 0 if elapsed <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
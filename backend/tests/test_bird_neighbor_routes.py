@@ -0,0 +1,85 @@
+"""
+Test del parser dei RIB dei route server BIRD: ultimo record, path multipli per prefisso e fuzzing a livello di riga.
+Il confronto dei tempi con il parser precedente è in `bird_rib_benchmark.py`
+
+Uso (dalla cartella backend): python -m unittest discover -s tests
+"""
+import ipaddress
+import random
+import unittest
+
+from bird_rib_benchmark import count_routes, legacy_parse_bgp_neighbor_rib, synthetic_bird_output
+from digital_twin.ixp.configuration.rs.bird_vendor_device import BirdVendorDevice
+
+FUZZ_ITERATIONS = 2000
+FUZZ_ALPHABET = "0123456789abcdef:./()\t \x00²" + "BGP.next_hop: BGP.as_path: via"
+
+MULTI_PATH_OUTPUT = """Table master4:
+10.0.0.0/24              via 192.0.2.1 on eth0 [peer_1 12:00:00] * (100) [AS65001i]
+\tType: BGP unicast univ
+\tBGP.origin: IGP
+\tBGP.as_path: 65001 65002
+\tBGP.next_hop: 192.0.2.1
+\tBGP.local_pref: 100
+                         via 192.0.2.3 on eth0 [peer_3 12:00:00] (100) [AS65003i]
+\tType: BGP unicast univ
+\tBGP.origin: IGP
+\tBGP.as_path: 65003 {65004 65005}
+\tBGP.next_hop: 192.0.2.3
+\tBGP.local_pref: 100
+2001:db8::/32            via 2001:db8::1 on eth0 [peer_1 12:00:00] * (100) [AS65001i]
+\tType: BGP unicast univ
+\tBGP.origin: IGP
+\tBGP.as_path: 65001
+\tBGP.next_hop: 2001:db8::1 fe80::1
+\tBGP.local_pref: 100"""
+
+
+class BirdNeighborRoutesTest(unittest.TestCase):
+    def setUp(self):
+        self.device = BirdVendorDevice()
+
+    def test_multi_path_entries(self):
+        rib = self.device.parse_bgp_neighbor_rib(MULTI_PATH_OUTPUT)
+
+        self.assertEqual(rib[ipaddress.ip_network("10.0.0.0/24")], {
+            ipaddress.ip_address("192.0.2.1"): {(65001, 65002)},
+            # L'AS set viene ignorato
+            ipaddress.ip_address("192.0.2.3"): {(65003,)},
+        })
+        self.assertEqual(rib[ipaddress.ip_network("2001:db8::/32")], {ipaddress.ip_address("2001:db8::1"): {(65001,)}})
+
+    def test_final_record(self):
+        # L'ultimo record non è seguito da altri attributi né da una riga vuota
+        output = MULTI_PATH_OUTPUT.rsplit("\n", 1)[0]
+        self.assertIn(ipaddress.ip_network("2001:db8::/32"), self.device.parse_bgp_neighbor_rib(output))
+        # Il parser precedente lo perdeva (e falliva sugli AS set)
+        legacy_output = output.replace("{65004 65005}", "65004")
+        self.assertNotIn(ipaddress.ip_network("2001:db8::/32"), legacy_parse_bgp_neighbor_rib(legacy_output))
+
+    def test_trailing_newline(self):
+        routes = list(self.device.parse_bgp_neighbor_routes(MULTI_PATH_OUTPUT + "\n\n"))
+        self.assertEqual(len(routes), 3)
+
+    def test_synthetic_output(self):
+        rib = self.device.parse_bgp_neighbor_rib(synthetic_bird_output(1000, extra_paths=100))
+        self.assertEqual(len(rib), 1000)
+        self.assertEqual(count_routes(rib), 1100)
+
+    def test_fuzz_never_raises(self):
+        rng = random.Random(39)
+        lines = MULTI_PATH_OUTPUT.splitlines()
+        for _ in range(FUZZ_ITERATIONS):
+            mutated = list(lines)
+            for _ in range(rng.randint(1, 4)):
+                i = rng.randrange(len(mutated))
+                position = rng.randrange(len(mutated[i]) + 1)
+                noise = "".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(0, 5)))
+                mutated[i] = mutated[i][:position] + noise + mutated[i][position + rng.randint(0, 4):]
+                if rng.random() < 0.2:
+                    del mutated[rng.randrange(len(mutated))]
+            self.device.parse_bgp_neighbor_rib("\n".join(mutated))
+
+
+if __name__ == "__main__":
+    unittest.main()
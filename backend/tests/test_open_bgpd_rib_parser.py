@@ -0,0 +1,187 @@
+"""
+Test del parser dei RIB di OpenBGPD (`bgpctl show rib in detail` e `bgpctl -j show rib`): casi limite,
+fuzzing a livello di riga e tempo di parsing di un RIB sintetico di grandi dimensioni
+
+Uso (dalla cartella backend): python -m pytest tests
+"""
+import json
+import random
+import time
+import unittest
+
+from digital_twin.ixp.configuration.rs.open_bgpd_rib_parser import iter_detail_routes, iter_json_routes
+from digital_twin.ixp.model.rib_route import RibRoute, pack_address, pack_prefix, routes_to_rib
+
+# Prefissi del RIB sintetico e tempo massimo (secondi) per parsarlo
+LARGE_RIB_PREFIXES = 100_000
+LARGE_RIB_BUDGET = 10
+FUZZ_ITERATIONS = 2000
+# Caratteri inseriti dalle mutazioni, inclusi quelli che `isdigit` accetta ma `int` rifiuta
+FUZZ_ALPHABET = "0123456789abcdef:./- \t\x00²١" + "BGP routing table entry for Nexthop empty"
+
+
+def synthetic_rib(count: int, seed: int = 0) -> list[tuple[str, str, str]]:
+    """
+    Returns:
+        list: (prefisso, next hop, AS path) di ogni rotta, con path vuoti e prefissi IPv6
+    """
+    rng = random.Random(seed)
+    routes = []
+    for i in range(count):
+        if i % 10 == 9:
+            prefix = f"2001:db8:{i >> 16:x}:{i & 0xffff:x}::/64"
+            next_hop = f"2001:db8::{rng.randint(1, 50):x}"
+        else:
+            prefix = f"{10 + (i >> 16)}.{(i >> 8) & 0xff}.{i & 0xff}.0/24"
+            next_hop = f"192.0.2.{rng.randint(1, 50)}"
+        as_path = "" if i % 50 == 0 else " ".join(str(rng.randint(1, 400000)) for _ in range(rng.randint(1, 6)))
+        routes.append((prefix, next_hop, as_path))
+    return routes
+
+
+def to_detail(routes: list[tuple[str, str, str]]) -> list[str]:
+    lines = []
+    for prefix, next_hop, as_path in routes:
+        lines.extend([
+            f"BGP routing table entry for {prefix}",
+            f"    {as_path or 'empty'}",
+            f"    Nexthop {next_hop} (via {next_hop}) Neighbor {next_hop} (198.51.100.1)",
+            "    Origin IGP, metric 0, localpref 100, weight 0, ovs not-found, avs unknown, external, valid, best",
+            "    Last update: 01:02:03 ago",
+            "    Communities: 65000:1 65000:2 65000:3 65000:4 65000:5 65000:6",
+            "      65000:7 65000:8",
+            "    Large Communities: 65000:1:1 65000:1:2",
+            "      65000:1:3",
+            "",
+        ])
+    return lines
+
+
+def to_json(routes: list[tuple[str, str, str]]) -> dict:
+    return {
+        "rib": [
+            {
+                "prefix": prefix,
+                "aspath": as_path,
+                "exit_nexthop": next_hop,
+                "true_nexthop": next_hop,
+                "neighbor": {"remote_addr": "198.51.100.1"},
+                "communities": ["65000:1", "65000:2"],
+            }
+            for prefix, next_hop, as_path in routes
+        ]
+    }
+
+
+def expected_routes(routes: list[tuple[str, str, str]]) -> list[RibRoute]:
+    return [
+        RibRoute(pack_prefix(prefix), pack_address(next_hop), tuple(int(x) for x in as_path.split()))
+        for prefix, next_hop, as_path in routes
+    ]
+
+
+def mutate(lines: list[str], rng: random.Random) -> list[str]:
+    lines = list(lines)
+    for _ in range(rng.randint(1, 5)):
+        if not lines:
+            break
+        i = rng.randrange(len(lines))
+        operation = rng.randrange(5)
+        if operation == 0:
+            del lines[i]
+        elif operation == 1:
+            lines.insert(i, lines[rng.randrange(len(lines))])
+        elif operation == 2:
+            lines[i] = lines[i][:rng.randrange(len(lines[i]) + 1)]
+        elif operation == 3:
+            j = rng.randrange(len(lines))
+            (lines[i], lines[j]) = (lines[j], lines[i])
+        else:
+            position = rng.randrange(len(lines[i]) + 1)
+            noise = "".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(1, 6)))
+            lines[i] = lines[i][:position] + noise + lines[i][position + rng.randint(0, 3):]
+    return lines
+
+
+class DetailParserTest(unittest.TestCase):
+    def test_multiline_communities(self):
+        routes = synthetic_rib(20)
+        self.assertEqual(list(iter_detail_routes(to_detail(routes))), expected_routes(routes))
+
+    def test_empty_as_path(self):
+        (route,) = iter_detail_routes(to_detail([("10.0.0.0/24", "192.0.2.1", "")]))
+        self.assertEqual(route.as_path, ())
+
+    def test_string_input(self):
+        routes = synthetic_rib(5)
+        self.assertEqual(list(iter_detail_routes("\n".join(to_detail(routes)))), expected_routes(routes))
+
+    def test_entries_without_prefix(self):
+        lines = to_detail(synthetic_rib(3))
+        lines[0] = "BGP routing table entry for "
+        lines[10] = "BGP routing table entry for not-a-prefix"
+
+        routes = list(iter_detail_routes(lines))
+        self.assertEqual(len(routes), 1)
+        self.assertNotIn(None, routes_to_rib(routes))
+
+    def test_truncated_last_record(self):
+        routes = synthetic_rib(3)
+        lines = to_detail(routes)
+        # Senza la riga vuota finale l'ultimo record viene comunque emesso
+        self.assertEqual(list(iter_detail_routes(lines[:-1])), expected_routes(routes))
+        # Troncato prima del next hop l'ultimo record viene scartato
+        self.assertEqual(list(iter_detail_routes(lines[:-8])), expected_routes(routes[:-1]))
+
+    def test_fuzz_never_raises(self):
+        rng = random.Random(40)
+        lines = to_detail(synthetic_rib(8))
+        for _ in range(FUZZ_ITERATIONS):
+            for route in iter_detail_routes(mutate(lines, rng)):
+                self.assertIsNotNone(route.prefix)
+                self.assertIsNotNone(route.next_hop)
+
+    def test_large_rib(self):
+        routes = synthetic_rib(LARGE_RIB_PREFIXES)
+        lines = to_detail(routes)
+
+        start = time.perf_counter()
+        rib = routes_to_rib(iter_detail_routes(lines))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(rib), LARGE_RIB_PREFIXES)
+        self.assertLess(elapsed, LARGE_RIB_BUDGET)
+
+
+class JsonParserTest(unittest.TestCase):
+    def test_same_records_as_detail(self):
+        routes = synthetic_rib(500)
+        self.assertEqual(list(iter_json_routes(to_json(routes))), list(iter_detail_routes(to_detail(routes))))
+
+    def test_malformed_entries(self):
+        result = to_json(synthetic_rib(1))
+        result["rib"].extend([
+            "not an entry",
+            {"prefix": None, "exit_nexthop": "192.0.2.1"},
+            {"prefix": "10.0.0.0/33", "exit_nexthop": "192.0.2.1"},
+            {"prefix": "10.0.0.0/24", "exit_nexthop": ["192.0.2.1"]},
+            {"prefix": "10.0.0.0/24", "exit_nexthop": "192.0.2.1\x00"},
+            {"prefix": "10.0.0.0/24", "exit_nexthop": "192.0.2.1", "aspath": 65000},
+        ])
+        self.assertEqual(len(list(iter_json_routes(result))), 1)
+        self.assertEqual(list(iter_json_routes({"rib": None})), [])
+        self.assertEqual(list(iter_json_routes([])), [])
+
+    def test_fuzz_never_raises(self):
+        rng = random.Random(41)
+        document = json.dumps(to_json(synthetic_rib(4)), indent=1).splitlines()
+        for _ in range(FUZZ_ITERATIONS):
+            try:
+                result = json.loads("\n".join(mutate(document, rng)))
+            except ValueError:
+                continue
+            list(iter_json_routes(result))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import asyncio
+import fnmatch
+import logging
+import math
+import shlex
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import AsyncGenerator, Generator, Iterable, TYPE_CHECKING
+
+from model.command import DeviceSelector
+from utils.lab_utils import (
+    execute_command_on_machine,
+    get_running_machines_names,
+    get_device_role,
+    MEMBER_DEVICE_NAME_REGEX,
+)
+from utils.machine_inventory import get_machine_inventory
+
+if TYPE_CHECKING:
+    from Kathara.model.Lab import Lab
+
+# Numero massimo di comandi brevi (e di comandi in streaming o batch) eseguiti contemporaneamente sui dispositivi
+MAX_COMMAND_WORKERS = 8
+MAX_STREAM_WORKERS = 16
+# Dispositivi di un batch eseguiti contemporaneamente, gli altri attendono il proprio turno nel batch
+MAX_BATCH_WORKERS = 4
+# Limiti di default (e massimi) per i comandi in streaming
+DEFAULT_COMMAND_TIMEOUT = 60
+MAX_COMMAND_TIMEOUT = 600
+DEFAULT_COMMAND_OUTPUT_BYTES = 1024 * 1024
+MAX_COMMAND_OUTPUT_BYTES = 16 * 1024 * 1024
+# Secondi concessi al comando sul dispositivo dopo il timeout di lettura, prima di essere terminato da `timeout`
+REMOTE_TIMEOUT_MARGIN = 2
+
+# Il PID stampato sulla prima riga di stdout consente di terminare il comando sul dispositivo prima del timeout
+_COMMAND_WRAPPER = 'echo $$; exec timeout -s KILL {timeout} "$@"'
+# Con GNU timeout il comando è nel gruppo di processi di `timeout`, con BusyBox ne prende il PID
+_KILL_COMMAND = 'kill -KILL -- -{pid} 2>/dev/null || kill -KILL {pid}'
+
+# Pool dedicati, un comando lento non blocca l'event loop e gli altri endpoint.
+# Streaming e batch occupano un worker per tutta la durata del comando, quindi non usano il pool dei comandi brevi
+_command_executor = ThreadPoolExecutor(max_workers=MAX_COMMAND_WORKERS, thread_name_prefix="command")
+_stream_executor = ThreadPoolExecutor(max_workers=MAX_STREAM_WORKERS, thread_name_prefix="command-stream")
+
+
+def get_command_executor() -> ThreadPoolExecutor:
+    return _command_executor
+
+
+async def run_in_command_pool(func, *args):
+    """
+    Esegue una funzione bloccante (exec, chiamate alle API di Kathara) nel pool dei comandi
+    """
+    return await asyncio.get_running_loop().run_in_executor(_command_executor, func, *args)
+
+
+async def execute_command(machine_name: str, command: str, lab: Lab) -> str:
+    """
+    Versione non bloccante di `execute_command_on_machine`
+    """
+    return await run_in_command_pool(execute_command_on_machine, machine_name, command, lab)
+
+
+async def get_running_machines(lab_hash: str) -> list[str]:
+    """
+    Dispositivi in esecuzione del lab, dall'inventario in memoria se sincronizzato
+    """
+    inventory = get_machine_inventory()
+    if inventory.is_synced():
+        return inventory.get_running_machines(lab_hash)
+    return await run_in_command_pool(get_running_machines_names, lab_hash)
+
+
+def _wrap_command(command: str, timeout: float) -> list[str]:
+    return [
+        "sh", "-c", _COMMAND_WRAPPER.format(timeout=math.ceil(timeout) + REMOTE_TIMEOUT_MARGIN), "sh",
+        *shlex.split(command)
+    ]
+
+
+def _kill_command(machine_name: str, pid: str, lab: Lab) -> None:
+    from Kathara.manager.Kathara import Kathara
+
+    logging.info(f"Killing command with PID {pid} on {machine_name}")
+    try:
+        Kathara.get_instance().exec(
+            machine_name, ["sh", "-c", _KILL_COMMAND.format(pid=pid)], lab=lab, stream=False
+        )
+    except Exception as e:
+        # Il comando viene comunque terminato da `timeout` sul dispositivo
+        logging.warning(f"Cannot kill command with PID {pid} on {machine_name}: {e}")
+
+
+def iter_command_output(
+        machine_name: str, command: str, lab: Lab,
+        timeout: float = DEFAULT_COMMAND_TIMEOUT, max_bytes: int = DEFAULT_COMMAND_OUTPUT_BYTES
+) -> Generator[tuple[str, dict], None, None]:
+    """
+    Esegue un comando sul dispositivo restituendo stdout e stderr riga per riga appena disponibili (bloccante).
+    Il comando viene terminato sul dispositivo se supera i limiti o se il generatore viene chiuso prima della fine
+
+    Args:
+        machine_name: Nome del dispositivo
+        command: Comando da eseguire
+        lab: Lab in esecuzione
+        timeout: Secondi dopo i quali l'output non viene più letto
+        max_bytes: Byte di output dopo i quali l'output non viene più letto
+
+    Returns:
+        Generator: coppie (tipo evento, payload), il tipo è `stdout`, `stderr` oppure `end`.
+            L'evento `end` riporta exit code (se disponibile), troncamento e timeout
+    """
+    from Kathara.manager.Kathara import Kathara
+    from digital_twin.ixp.quarantine.stream_multiplexer import StreamMultiplexer, STDOUT
+
+    logging.info(f"Streaming command on {machine_name}: {command}")
+    stream = Kathara.get_instance().exec(machine_name, _wrap_command(command, timeout), lab=lab, stream=True)
+    multiplexer = StreamMultiplexer({machine_name: stream})
+
+    pid = None
+    sent_bytes = 0
+    truncated = False
+    try:
+        # Il multiplexer termina comunque allo scadere del timeout, quindi il thread chiamante viene sempre liberato
+        for (_, fd, line) in multiplexer.iter_lines(timeout=timeout):
+            if pid is None and fd == STDOUT:
+                pid = line.strip() if line.strip().isdigit() else ""
+                continue
+
+            sent_bytes += len(line) + 1
+            if sent_bytes > max_bytes:
+                truncated = True
+                break
+
+            yield "stdout" if fd == STDOUT else "stderr", {"data": line}
+    finally:
+        if pid and multiplexer.running():
+            _kill_command(machine_name, pid, lab)
+
+    timed_out = bool(multiplexer.running()) and not truncated
+    exit_code = None
+    if not multiplexer.running() and hasattr(stream, "exit_code"):
+        exit_code = stream.exit_code()
+
+    yield "end", {"exit_code": exit_code, "truncated": truncated, "timed_out": timed_out}
+
+
+async def stream_command(
+        machine_name: str, command: str, lab: Lab,
+        timeout: float = DEFAULT_COMMAND_TIMEOUT, max_bytes: int = DEFAULT_COMMAND_OUTPUT_BYTES
+) -> AsyncGenerator[tuple[str, dict], None]:
+    """
+    Versione asincrona di `iter_command_output`, eseguita nel pool dei comandi in streaming
+
+    Returns:
+        AsyncGenerator: gli eventi di `iter_command_output`, più `error` se il comando non può essere eseguito
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def run():
+        try:
+            # Se il client si disconnette il generatore viene chiuso, terminando il comando sul dispositivo
+            with closing(iter_command_output(machine_name, command, lab, timeout, max_bytes)) as events:
+                for event in events:
+                    if cancelled.is_set():
+                        return
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+        except Exception as e:
+            logging.error(f"Error streaming command on {machine_name}: {e}")
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", {"message": str(e)}))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    _stream_executor.submit(run)
+
+    try:
+        while (event := await queue.get()) is not None:
+            yield event
+    finally:
+        # Il client si è disconnesso oppure lo streaming è terminato
+        cancelled.set()
+
+
+def select_devices(machine_names: Iterable[str], selector: DeviceSelector) -> list[str]:
+    """
+    Filtra i dispositivi con il selettore, ogni criterio specificato deve essere soddisfatto
+
+    Args:
+        machine_names: Nomi dei dispositivi del lab
+        selector: Pattern glob sui nomi, ruoli e ASN dei membri
+
+    Returns:
+        list: Nomi dei dispositivi selezionati, ordinati
+    """
+    asns = set(selector.asns) if selector.asns is not None else None
+
+    selected = []
+    for machine_name in machine_names:
+        if selector.names is not None and not any(fnmatch.fnmatchcase(machine_name, p) for p in selector.names):
+            continue
+        if selector.roles is not None and get_device_role(machine_name) not in selector.roles:
+            continue
+        if asns is not None:
+            matches = MEMBER_DEVICE_NAME_REGEX.match(machine_name)
+            if not matches or int(matches.group(1)) not in asns:
+                continue
+        selected.append(machine_name)
+
+    return sorted(selected)
+
+
+def run_command_collect(
+        machine_name: str, command: str, lab: Lab,
+        timeout: float = DEFAULT_COMMAND_TIMEOUT, max_bytes: int = DEFAULT_COMMAND_OUTPUT_BYTES,
+        cancelled: threading.Event | None = None
+) -> dict:
+    """
+    Esegue un comando sul dispositivo e ne raccoglie l'output, con gli stessi limiti di `iter_command_output`.
+    Se `cancelled` viene impostato il comando viene terminato e l'output raccolto fino a quel momento restituito
+    """
+    result = {"device": machine_name, "role": get_device_role(machine_name), "stdout": [], "stderr": []}
+    try:
+        with closing(iter_command_output(machine_name, command, lab, timeout, max_bytes)) as events:
+            for event_type, payload in events:
+                if cancelled is not None and cancelled.is_set():
+                    break
+                if event_type == "end":
+                    result.update(payload)
+                else:
+                    result[event_type].append(payload["data"])
+    except Exception as e:
+        logging.error(f"Error executing command on {machine_name}: {e}")
+        result["error"] = str(e)
+
+    result["stdout"] = "\n".join(result["stdout"])
+    result["stderr"] = "\n".join(result["stderr"])
+    return result
+
+
+async def stream_batch_command(
+        machine_names: list[str], command: str, lab: Lab,
+        timeout: float = DEFAULT_COMMAND_TIMEOUT, max_bytes: int = DEFAULT_COMMAND_OUTPUT_BYTES
+) -> AsyncGenerator[dict, None]:
+    """
+    Esegue il comando su tutti i dispositivi nel pool dei comandi in streaming, al più `MAX_BATCH_WORKERS` alla
+    volta così che un batch non occupi l'intero pool, restituendo i risultati in ordine di completamento
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(MAX_BATCH_WORKERS)
+    cancelled = threading.Event()
+
+    async def run(machine_name: str) -> dict:
+        async with semaphore:
+            return await loop.run_in_executor(
+                _stream_executor, run_command_collect, machine_name, command, lab, timeout, max_bytes, cancelled
+            )
+
+    tasks = [asyncio.ensure_future(run(machine_name)) for machine_name in machine_names]
+
+    try:
+        for future in asyncio.as_completed(tasks):
+            yield await future
+    finally:
+        # Se il client si disconnette i dispositivi in attesa vengono annullati e i comandi in corso terminati
+        cancelled.set()
+        for task in tasks:
+            task.cancel()
@@ -1,4 +1,3 @@
-import docker
 import logging
 
 _docker_client = None
@@ -10,6 +9,8 @@ def get_docker_client():
     """
     global _docker_client
     if _docker_client is None:
+        import docker
+
         _docker_client = docker.from_env()
     return _docker_client
 
@@ -8,9 +8,15 @@ from digital_twin.ixp.settings.settings import Settings
 
 """
 Internal implementation to load settings from disk, specifying the
-filename of the targeted settings file
+filename of the targeted settings file. A new Settings object is loaded
+with the default settings file first, so keys missing from the file never
+keep the value of a previously loaded one. It replaces the singleton only
+once fully loaded: builds and reloads run while quarantine checks and
+commands keep reading the current settings
 """
-def load_settings_from_disk(setting_obj: Settings, filename):
+def load_settings_from_disk(filename) -> Settings:
+    setting_obj = Settings.new_detached()
+    setting_obj.load_from_disk()
 
     settings_path = os.path.abspath(os.path.join(BACKEND_IXPCONFIGS_FOLDER, filename))
     if not os.path.exists(settings_path):
@@ -33,4 +39,7 @@ def load_settings_from_disk(setting_obj: Settings, filename):
         setting_obj.quarantine["probe_ips"]["4"] = ipaddress.ip_address(setting_obj.quarantine["probe_ips"]["4"])
     if setting_obj.quarantine["probe_ips"]["6"]:
         setting_obj.quarantine["probe_ips"]["6"] = ipaddress.ip_address(setting_obj.quarantine["probe_ips"]["6"])
-    
\ No newline at end of file
+
+    Settings.set_instance(setting_obj)
+
+    return setting_obj
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import threading
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+# Numero massimo di job terminati mantenuti in memoria
+MAX_FINISHED_JOBS = 50
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class Job:
+    """
+    Operazione del ciclo di vita del lab (build, deploy, reload, wipe) eseguita in background
+    """
+
+    def __init__(self, job_type: str, depends_on: list["Job"] | None = None):
+        self.id: str = uuid.uuid4().hex
+        self.type: str = job_type
+        self.depends_on: list[Job] = depends_on or []
+        self.status: str = JOB_PENDING
+        self.phase: str | None = None
+        self.progress: dict = {"done": 0, "total": 0}
+        self.error: str | None = None
+        self.created_at: datetime = datetime.now()
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self.future: Future | None = None
+        self._cancel_event = threading.Event()
+
+    def set_phase(self, phase: str, total: int = 0, cancellable: bool = True) -> None:
+        if cancellable:
+            self.check_cancelled()
+        logging.info(f"Job {self.id} ({self.type}): phase `{phase}`")
+        self.phase = phase
+        self.progress = {"done": 0, "total": total}
+
+    def set_progress(self, done: int, total: int) -> None:
+        """
+        Aggiorna il progresso della fase corrente, usato anche come punto di cancellazione
+        """
+        self.progress = {"done": done, "total": total}
+        self.check_cancelled()
+
+    def request_cancel(self) -> None:
+        self._cancel_event.set()
+
+    def is_cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel_event.is_set():
+            raise JobCancelledError(f"Job {self.id} cancelled")
+
+    def is_finished(self) -> bool:
+        return self.status in [JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED]
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "status": self.status,
+            "phase": self.phase,
+            "progress": self.progress,
+            "error": self.error,
+            "depends_on": [job.id for job in self.depends_on],
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class JobManager:
+    """
+    Esegue i job del ciclo di vita del lab uno alla volta, nell'ordine di sottomissione,
+    così operazioni in conflitto (es. wipe e deploy) non si sovrappongono mai
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lab-lifecycle")
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job_type: str, target: Callable[[Job], Any], depends_on: list[Job] | None = None) -> Job:
+        """
+        Accoda un job, `target` riceve il Job per aggiornare fase e progresso
+
+        Args:
+            job_type: Tipo del job
+            target: Funzione eseguita dal job
+            depends_on: Job accodati in precedenza che devono essere completati, altrimenti il job fallisce senza
+                eseguire `target`
+
+        Returns:
+            Job: il job creato, `job.future` contiene il valore restituito da `target`
+        """
+        job = Job(job_type, depends_on)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job, target)
+        logging.info(f"Job {job.id} ({job_type}) submitted")
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def get_all(self) -> list[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.is_finished():
+            return False
+
+        job.request_cancel()
+        # Se non è ancora partito lo rimuoviamo direttamente dalla coda
+        if job.future is not None and job.future.cancel():
+            self._finish(job, JOB_CANCELLED)
+        logging.info(f"Job {job.id} ({job.type}) cancellation requested")
+        return True
+
+    def _run(self, job: Job, target: Callable[[Job], Any]) -> Any:
+        if job.is_cancel_requested():
+            self._finish(job, JOB_CANCELLED)
+            raise JobCancelledError(f"Job {job.id} cancelled")
+
+        job.status = JOB_RUNNING
+        job.started_at = datetime.now()
+        try:
+            # I job sono eseguiti in ordine, le dipendenze accodate prima sono già terminate
+            for dependency in job.depends_on:
+                if dependency.status != JOB_COMPLETED:
+                    raise RuntimeError(f"{dependency.type} job {dependency.id} {dependency.status}")
+            result = target(job)
+        except JobCancelledError:
+            logging.warning(f"Job {job.id} ({job.type}) cancelled during phase `{job.phase}`")
+            self._finish(job, JOB_CANCELLED)
+            raise
+        except Exception as e:
+            logging.error(f"Job {job.id} ({job.type}) failed: {e}")
+            logging.error(traceback.format_exc())
+            job.error = str(e)
+            self._finish(job, JOB_FAILED)
+            raise
+
+        self._finish(job, JOB_COMPLETED)
+        return result
+
+    @staticmethod
+    def _finish(job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = datetime.now()
+        logging.info(f"Job {job.id} ({job.type}) {status}")
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished()]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+
+
+async def wait_for_job(job: Job) -> Any:
+    """
+    Attende il risultato del job dall'event loop
+
+    Returns:
+        Any: il valore restituito dal job, JobCancelledError se il job è stato annullato (in coda o in esecuzione)
+    """
+    try:
+        # Con shield la disconnessione del client non annulla il job in coda
+        return await asyncio.shield(asyncio.wrap_future(job.future))
+    except asyncio.CancelledError:
+        # Un job annullato in coda ha il future cancellato, che non è un'eccezione del job
+        if job.future.cancelled():
+            raise JobCancelledError(f"Job {job.id} cancelled")
+        raise
+
+
+# Singleton
+_job_manager = JobManager()
+
+
+def get_job_manager() -> JobManager:
+    return _job_manager
@@ -0,0 +1,88 @@
+import copy
+import os
+
+from Kathara.model.ExternalLink import ExternalLink
+from Kathara.model.Lab import Lab
+
+
+def serialize_lab(lab: Lab, exclude_machines: set[str] | None = None) -> dict:
+    """
+    Converte un Lab Kathara in una struttura picklable (solo tipi built-in),
+    così può essere restituito da un processo worker
+
+    Args:
+        lab: Lab da serializzare
+        exclude_machines: Macchine da non includere, insieme ai loro file
+
+    Returns:
+        dict: Descrizione di macchine, interfacce, link esterni e file del lab
+    """
+    if exclude_machines is None:
+        exclude_machines = set()
+
+    machines = {}
+    for name, machine in lab.machines.items():
+        if name in exclude_machines:
+            continue
+        machines[name] = {
+            "meta": copy.deepcopy(machine.meta),
+            "interfaces": [
+                (num, interface.link.name, interface.mac_address)
+                for num, interface in sorted(machine.interfaces.items())
+            ],
+        }
+
+    external_links = {
+        name: [(external.interface, external.vlan) for external in link.external]
+        for name, link in lab.links.items()
+        if link.external
+    }
+
+    files = {
+        path: lab.fs.readbytes(path) for path in lab.fs.walk.files()
+        if _file_owner(path) not in exclude_machines
+    }
+
+    return {
+        "name": lab.name,
+        "hash": lab.hash,
+        "machines": machines,
+        "external_links": external_links,
+        "files": files,
+    }
+
+
+def _file_owner(path: str) -> str:
+    # `<machine>/...`, `<machine>.startup` e `<machine>.shutdown` appartengono alla macchina
+    owner = path.lstrip("/").split("/", 1)[0]
+    return owner.removesuffix(".startup").removesuffix(".shutdown")
+
+
+def deserialize_lab(description: dict) -> Lab:
+    """
+    Ricostruisce un Lab Kathara da una descrizione prodotta da `serialize_lab`
+    """
+    lab = Lab(description["name"])
+    lab.hash = description["hash"]
+
+    for name, machine_description in description["machines"].items():
+        machine = lab.new_machine(name)
+        machine.meta.update(machine_description["meta"])
+
+    # Le interfacce vanno create dopo le macchine per mantenere la stessa numerazione
+    for name, machine_description in description["machines"].items():
+        machine = lab.get_machine(name)
+        for num, link_name, mac_address in machine_description["interfaces"]:
+            lab.connect_machine_obj_to_link(machine, link_name, machine_iface_number=num, mac_address=mac_address)
+
+    for link_name, externals in description["external_links"].items():
+        link = lab.get_or_new_link(link_name)
+        link.external.extend(ExternalLink(interface, vlan) for interface, vlan in externals)
+
+    for path, content in description["files"].items():
+        directory = os.path.dirname(path)
+        if directory:
+            lab.fs.makedirs(directory, recreate=True)
+        lab.fs.writebytes(path, content)
+
+    return lab
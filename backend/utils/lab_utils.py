@@ -1,7 +1,19 @@
-from Kathara.manager.Kathara import Kathara, Lab
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+# Kathara e digital_twin vengono importati al primo utilizzo, l'import delle API resta leggero
+if TYPE_CHECKING:
+    from Kathara.model.Lab import Lab
+
+# Nome dei dispositivi dei membri, `as<ASN>_<router id>`
+MEMBER_DEVICE_NAME_REGEX = re.compile(r"^as(\d+)_")
 
 
 def get_running_machines_names(lab_hash: str) -> list[str]:
+    from Kathara.manager.Kathara import Kathara
+
     return list(Kathara.get_instance().get_lab_from_api(lab_hash).machines.keys())
 
 
@@ -18,6 +30,7 @@ def execute_command_on_machine(machine_name: str, command: str, lab: Lab) -> str
         str: Command output
     """
     import logging
+    from Kathara.manager.Kathara import Kathara
     
     try:
         logging.info(f"Executing command on {machine_name}: {command}")
@@ -33,8 +46,8 @@ def execute_command_on_machine(machine_name: str, command: str, lab: Lab) -> str
         # Converti il generatore in lista
         output_lines = list(result)
         
-        # L'output può essere in vari formati
-        output_text = ""
+        # L'output può essere in vari formati, le parti vengono unite alla fine
+        output_parts = []
         exit_code = None
         
         for item in output_lines:
@@ -48,7 +61,7 @@ def execute_command_on_machine(machine_name: str, command: str, lab: Lab) -> str
             
             # Se è bytes, è l'output del comando
             if isinstance(item, bytes):
-                output_text += item.decode("UTF-8", errors='replace')
+                output_parts.append(item.decode("UTF-8", errors='replace'))
                 continue
             
             # Se è una tupla (stdout, stderr)
@@ -58,20 +71,22 @@ def execute_command_on_machine(machine_name: str, command: str, lab: Lab) -> str
                 
                 if stdout_part:
                     if isinstance(stdout_part, bytes):
-                        output_text += stdout_part.decode("UTF-8", errors='replace')
+                        output_parts.append(stdout_part.decode("UTF-8", errors='replace'))
                     else:
-                        output_text += str(stdout_part)
+                        output_parts.append(str(stdout_part))
                 
                 if stderr_part:
                     if isinstance(stderr_part, bytes):
-                        output_text += "\n--- STDERR ---\n" + stderr_part.decode("UTF-8", errors='replace')
+                        output_parts.append("\n--- STDERR ---\n" + stderr_part.decode("UTF-8", errors='replace'))
                     else:
-                        output_text += "\n--- STDERR ---\n" + str(stderr_part)
+                        output_parts.append("\n--- STDERR ---\n" + str(stderr_part))
                 continue
             
             # Altrimenti, prova a convertire in stringa
-            output_text += str(item)
+            output_parts.append(str(item))
         
+        output_text = "".join(output_parts)
+
         # Se l'output è vuoto
         if not output_text or output_text.strip() == "":
             output_text = "(Command executed successfully - no output)"
@@ -104,26 +119,46 @@ def filter_machines_info(machines_info):
     return machines
 
 
-def discover_running_lab():
+def discover_running_lab() -> str | None:
+    """
+    Cerca un lab in esecuzione con una sola query a Docker, filtrata sulle label dei container di Kathara
+
+    Returns:
+        str: Hash del lab trovato, None se non ci sono dispositivi in esecuzione
+    """
+    import logging
+    from utils.docker_utils import get_docker_client
+    from utils.machine_inventory import KATHARA_LABEL_FILTER
+
     try:
-        filtered_machines = filter_machines_info(
-            next(Kathara.get_instance().get_machines_stats())
+        # `sparse` evita la inspect del container, le label sono già nella risposta.
+        # Solo i dispositivi di un lab hanno `lab_hash`, non i container di supporto come il probe della quarantena
+        containers = get_docker_client().containers.list(
+            sparse=True, limit=1, filters={"label": [KATHARA_LABEL_FILTER, "lab_hash"], "status": "running"}
         )
-        lab = None
-        for stats in filtered_machines.values():
-            lab = (
-                stats["network_scenario_id"]
-                if stats["network_scenario_id"] and stats["status"] == "running"
-                else None
-            )
-            if lab:  # Esci non appena trovi un lab
-                break
-        return lab
-    except StopIteration:
-        # Nessuna macchina in esecuzione
+        for container in containers:
+            lab_hash = (container.attrs.get("Labels") or {}).get("lab_hash", None)
+            if lab_hash:
+                return lab_hash
         return None
     except Exception as e:
-        import logging
-
         logging.error(f"Error discovering running lab: {e}")
         return None
+
+
+def get_device_role(machine_name: str) -> str:
+    """
+    Ruolo del dispositivo ricavato dal nome, i membri sono `as<ASN>_<router id>`
+    """
+    from digital_twin.ixp.globals import SWITCH_DEVICE_NAME, GATEWAY_DEVICE_NAME
+    from digital_twin.ixp.settings.settings import Settings
+
+    if machine_name == SWITCH_DEVICE_NAME:
+        return "switch"
+    if machine_name == GATEWAY_DEVICE_NAME:
+        return "gateway"
+    if MEMBER_DEVICE_NAME_REGEX.match(machine_name):
+        return "member"
+    if machine_name in Settings.get_instance().route_servers or "rs" in machine_name:
+        return "rs"
+    return "other"
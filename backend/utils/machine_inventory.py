@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+
+from utils.docker_utils import get_docker_client
+
+# Label applicate da Kathara a tutti i container dei dispositivi
+KATHARA_LABEL_FILTER = "app=kathara"
+# Attesa prima di riconnettersi al flusso di eventi di Docker
+RECONNECT_DELAY = 5
+
+
+class MachineInventory:
+    """
+    Insieme dei dispositivi in esecuzione per ogni lab, mantenuto aggiornato dagli eventi dei container di Docker
+    invece di ricostruire il lab con `get_lab_from_api` ad ogni richiesta
+    """
+
+    def __init__(self):
+        # lab hash -> nomi dei dispositivi in esecuzione
+        self._machines: dict[str, set[str]] = {}
+        self._synced = False
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """
+        Avvia il thread che sincronizza l'inventario e segue gli eventi, non bloccante
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._watch, name="machine-inventory", daemon=True)
+            self._thread.start()
+
+    def is_synced(self) -> bool:
+        return self._synced
+
+    def get_running_machines(self, lab_hash: str) -> list[str]:
+        with self._lock:
+            return sorted(self._machines.get(lab_hash, ()))
+
+    def count_running_machines(self, lab_hash: str) -> int:
+        with self._lock:
+            return len(self._machines.get(lab_hash, ()))
+
+    def get_lab_hashes(self) -> set[str]:
+        with self._lock:
+            return set(self._machines.keys())
+
+    def _watch(self) -> None:
+        while True:
+            try:
+                client = get_docker_client()
+                # Gli eventi vengono letti a partire da prima della sincronizzazione, così nessuno va perso
+                since = int(time.time())
+                self._sync(client)
+                for event in client.events(
+                        since=since, decode=True, filters={"type": "container", "label": KATHARA_LABEL_FILTER}
+                ):
+                    self._apply_event(event)
+            except Exception as e:
+                logging.warning(f"Machine inventory disconnected from Docker events: {e}")
+
+            # Fino alla prossima sincronizzazione le richieste usano le API di Kathara
+            self._synced = False
+            time.sleep(RECONNECT_DELAY)
+
+    def _sync(self, client) -> None:
+        machines = {}
+        # `sparse` evita una inspect per ogni container, le label sono già nella lista
+        for container in client.containers.list(sparse=True, filters={"label": KATHARA_LABEL_FILTER}):
+            labels = container.attrs.get("Labels") or {}
+            if container.attrs.get("State") == "running" and "lab_hash" in labels and "name" in labels:
+                machines.setdefault(labels["lab_hash"], set()).add(labels["name"])
+
+        with self._lock:
+            self._machines = machines
+            self._synced = True
+
+        logging.info(f"Machine inventory synced: {sum(len(x) for x in machines.values())} running devices")
+
+    def _apply_event(self, event: dict) -> None:
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        lab_hash = attributes.get("lab_hash", None)
+        machine_name = attributes.get("name", None)
+        if lab_hash is None or machine_name is None:
+            return
+
+        action = event.get("Action", event.get("status", ""))
+        with self._lock:
+            if action == "start":
+                self._machines.setdefault(lab_hash, set()).add(machine_name)
+            elif action in ("die", "destroy"):
+                lab_machines = self._machines.get(lab_hash, set())
+                lab_machines.discard(machine_name)
+                if not lab_machines:
+                    self._machines.pop(lab_hash, None)
+
+
+# Singleton
+_machine_inventory = MachineInventory()
+
+
+def get_machine_inventory() -> MachineInventory:
+    return _machine_inventory
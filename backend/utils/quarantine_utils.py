@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from globals import BACKEND_RESOURCES_FOLDER
+
+# digital_twin viene importato alla prima verifica, l'import delle API resta leggero
+if TYPE_CHECKING:
+    from digital_twin.ixp.foundation.quarantine.action_result import ActionResult
+    from digital_twin.ixp.model.bgp_neighbour import BGPNeighbour
+
+
+class MemberDumpCache:
+    """
+    Mantiene in memoria il member dump del lab corrente, ricaricandolo solo se cambia
+    il file (tipo, percorso o data di modifica)
+    """
+
+    def __init__(self):
+        self._key: tuple | None = None
+        self._entries: dict[str, BGPNeighbour] | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> dict[str, BGPNeighbour]:
+        from digital_twin.ixp.foundation.dumps.member_dump.member_dump_factory import MemberDumpFactory
+        from digital_twin.ixp.settings.settings import Settings
+
+        settings = Settings.get_instance()
+        dump_type = settings.peering_configuration["type"]
+        dump_path = os.path.join(BACKEND_RESOURCES_FOLDER, settings.peering_configuration["path"])
+        key = (dump_type, dump_path, os.path.getmtime(dump_path))
+
+        with self._lock:
+            if self._key != key:
+                logging.info(f"Loading member dump from: {dump_path}")
+                member_dump_class = MemberDumpFactory(submodule_package="digital_twin").get_class_from_name(dump_type)
+                self._entries = member_dump_class().load_from_file(dump_path)
+                self._key = key
+
+            return self._entries
+
+    def clear(self):
+        with self._lock:
+            self._key = None
+            self._entries = None
+
+
+def is_quarantine_configured() -> bool:
+    from digital_twin.ixp.settings.settings import Settings
+
+    return bool(Settings.get_instance().quarantine)
+
+
+def action_result_to_dict(action_result: ActionResult) -> dict:
+    """
+    Converte un ActionResult in un dizionario serializzabile in JSON
+    """
+    from digital_twin.ixp.foundation.quarantine.action_result import ERROR, SUCCESS, WARNING
+
+    status_names = {ERROR: "error", SUCCESS: "success", WARNING: "warning"}
+    return {
+        "check": action_result.action.name(),
+        "display_name": action_result.action.display_name(),
+        "passed": action_result.passed(),
+        "results": [
+            {
+                "status": status_names.get(result["status"], result["status"]),
+                "reason": result["reason"],
+                "data": str(result["data"]) if result["data"] is not None else None,
+            }
+            for result in action_result.results
+        ],
+    }
+
+
+# Singleton
+_member_dump_cache = MemberDumpCache()
+
+
+def get_member_dump_cache():
+    return _member_dump_cache
@@ -1,41 +1,167 @@
-from Kathara.model.Lab import Lab
-from Kathara.model.Machine import Machine
+from __future__ import annotations
+
+import threading
+from types import MappingProxyType
+from typing import Mapping, TYPE_CHECKING
+
+from utils.lab_utils import get_device_role
+
+if TYPE_CHECKING:
+    from Kathara.model.Lab import Lab
+    from Kathara.model.Machine import Machine
+
+_UNSET = object()
+
+
+class ContextSnapshot:
+    """
+    Stato immutabile del server in un certo istante, i dati derivati dal lab sono calcolati una sola volta.
+    Un handler legge lo snapshot una volta per richiesta e non vede mai uno stato parziale
+    """
+
+    __slots__ = (
+        "version", "lab", "ixpconf_filename", "is_lab_discovered", "total_machines",
+        "machine_names", "machines_by_role", "_container_index", "_lock"
+    )
+
+    def __init__(
+            self, version: int, lab: Lab | None, ixpconf_filename: str | None, is_lab_discovered: bool | None,
+            total_machines: dict[str, Machine] | None, previous: "ContextSnapshot | None" = None
+    ):
+        self.version: int = version
+        self.lab: Lab | None = lab
+        self.ixpconf_filename: str | None = ixpconf_filename
+        self.is_lab_discovered: bool | None = is_lab_discovered
+        self.total_machines: Mapping[str, Machine] | None = (
+            total_machines if total_machines is None or isinstance(total_machines, MappingProxyType)
+            else MappingProxyType(dict(total_machines))
+        )
+
+        self._lock = threading.Lock()
+
+        # I dati derivati dipendono dall'insieme dei dispositivi e non dall'identità del lab, che può essere
+        # modificato dopo la pubblicazione: vengono riutilizzati solo se hash e dispositivi sono invariati
+        machine_names = frozenset(lab.machines.keys()) if lab is not None else frozenset()
+        if previous is not None and previous.lab_hash == self.lab_hash and previous.machine_names == machine_names:
+            self.machine_names: frozenset[str] = previous.machine_names
+            self.machines_by_role: Mapping[str, tuple[str, ...]] = previous.machines_by_role
+            # Un lab ricostruito con gli stessi dispositivi (es. riconciliato) può averne ricreato i container
+            self._container_index: Mapping[str, str] | None = (
+                previous._container_index if previous.lab is lab else None
+            )
+            return
+
+        self.machine_names = machine_names
+        roles = {}
+        for name in sorted(self.machine_names):
+            roles.setdefault(get_device_role(name), []).append(name)
+        self.machines_by_role = MappingProxyType({role: tuple(names) for role, names in roles.items()})
+
+        self._container_index = None
+
+    @property
+    def lab_hash(self) -> str | None:
+        return self.lab.hash if self.lab is not None else None
+
+    def container_index(self) -> Mapping[str, str]:
+        """
+        Nome del dispositivo -> id del container, da una sola query a Docker filtrata sull'hash del lab.
+        Viene mantenuto solo quando copre tutti i dispositivi, durante il deploy viene ricalcolato
+        """
+        if self.lab is None:
+            return MappingProxyType({})
+
+        with self._lock:
+            if self._container_index is not None:
+                return self._container_index
+
+            from utils.docker_utils import get_docker_client
+
+            index = {}
+            for container in get_docker_client().containers.list(
+                    sparse=True, filters={"label": f"lab_hash={self.lab.hash}"}
+            ):
+                machine_name = (container.attrs.get("Labels") or {}).get("name", None)
+                if machine_name is not None:
+                    index[machine_name] = container.id
+
+            index = MappingProxyType(index)
+            if self.machine_names <= index.keys():
+                self._container_index = index
+
+            return index
 
 
 class ServerContext:
-    lab: Lab | None
-    ixpconf_filename: str | None
-    is_lab_discovered: bool | None
-    total_machines: dict[str, Machine] | None
+    """
+    Contesto del server, sostituito atomicamente ad ogni modifica con un nuovo snapshot versionato
+    """
+
+    _lock = threading.Lock()
+    _snapshot: ContextSnapshot = ContextSnapshot(0, None, None, None, None)
+
+    @staticmethod
+    def snapshot() -> ContextSnapshot:
+        return ServerContext._snapshot
+
+    @staticmethod
+    def update(
+            lab: Lab | None = _UNSET, ixpconf_filename: str | None = _UNSET, is_lab_discovered: bool | None = _UNSET,
+            total_machines: dict[str, Machine] | None = _UNSET, expected_version: int | None = None
+    ) -> ContextSnapshot | None:
+        """
+        Applica insieme tutte le modifiche indicate, i campi non specificati restano invariati
+
+        Args:
+            expected_version: Se specificata, la modifica è applicata solo se il contesto è ancora a questa versione
+
+        Returns:
+            ContextSnapshot: il nuovo snapshot, None se la versione attesa non corrisponde
+        """
+        with ServerContext._lock:
+            current = ServerContext._snapshot
+            if expected_version is not None and current.version != expected_version:
+                return None
+
+            ServerContext._snapshot = ContextSnapshot(
+                current.version + 1,
+                current.lab if lab is _UNSET else lab,
+                current.ixpconf_filename if ixpconf_filename is _UNSET else ixpconf_filename,
+                current.is_lab_discovered if is_lab_discovered is _UNSET else is_lab_discovered,
+                current.total_machines if total_machines is _UNSET else total_machines,
+                previous=current,
+            )
+
+            return ServerContext._snapshot
 
     @staticmethod
     def get_lab() -> Lab | None:
-        return ServerContext.lab
+        return ServerContext._snapshot.lab
 
     @staticmethod
     def set_lab(lab: Lab | None) -> None:
-        ServerContext.lab = lab
+        ServerContext.update(lab=lab)
 
     @staticmethod
     def get_ixpconf_filename() -> str | None:
-        return ServerContext.ixpconf_filename
+        return ServerContext._snapshot.ixpconf_filename
 
     @staticmethod
     def set_ixpconf_filename(ixpconf_filename: str | None) -> None:
-        ServerContext.ixpconf_filename = ixpconf_filename
+        ServerContext.update(ixpconf_filename=ixpconf_filename)
 
     @staticmethod
-    def get_total_machines() -> dict[str, Machine]:
-        return ServerContext.total_machines
+    def get_total_machines() -> Mapping[str, Machine] | None:
+        return ServerContext._snapshot.total_machines
 
     @staticmethod
     def set_total_machines(total_machines: dict[str, Machine]) -> None:
-        ServerContext.total_machines = total_machines
+        ServerContext.update(total_machines=total_machines)
 
     @staticmethod
     def get_is_lab_discovered() -> bool | None:
-        return ServerContext.is_lab_discovered
+        return ServerContext._snapshot.is_lab_discovered
 
     @staticmethod
     def set_is_lab_discovered(is_discovered: bool | None) -> None:
-        ServerContext.is_lab_discovered = is_discovered
+        ServerContext.update(is_lab_discovered=is_discovered)
@@ -0,0 +1,139 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.docker_utils import get_docker_client
+from utils.job_manager import Job
+from utils.machine_inventory import KATHARA_LABEL_FILTER
+
+# Container e reti rimossi contemporaneamente
+WIPE_WORKERS = 16
+# Attesa massima (secondi) del rilascio delle reti prima di consentire un nuovo deploy
+NETWORK_RELEASE_TIMEOUT = 30
+NETWORK_RELEASE_POLL = 0.5
+
+
+def _remove_container(container) -> None:
+    from docker.errors import NotFound
+
+    try:
+        container.remove(force=True, v=True)
+    except NotFound:
+        pass
+
+
+def _remove_network(network) -> None:
+    from docker.errors import NotFound
+
+    try:
+        network.remove()
+    except NotFound:
+        pass
+
+
+def _label_filters(networks: bool = False) -> list[str]:
+    """
+    Filtri per label delle risorse da rimuovere: come il wipe di Kathara, solo quelle dell'utente corrente.
+    Con i collision domain condivisi tra gli utenti le reti non hanno la label dell'utente
+    """
+    from Kathara import utils
+    from Kathara.setting.Setting import Setting
+    from Kathara.types import SharedCollisionDomainsOption
+
+    filters = [KATHARA_LABEL_FILTER]
+    if not networks or Setting.get_instance().shared_cds != SharedCollisionDomainsOption.USERS:
+        filters.append(f"user={utils.get_current_user_name()}")
+    return filters
+
+
+def _remove_all(job: Job, phase: str, resources: list, remove) -> list:
+    """
+    Rimuove le risorse nel pool aggiornando il progresso del job
+
+    Returns:
+        list: le risorse che non è stato possibile rimuovere
+    """
+    from docker.errors import APIError
+
+    # Un wipe lasciato a metà bloccherebbe il deploy successivo, si può annullare solo prima di iniziare
+    job.set_phase(phase, total=len(resources), cancellable=phase == "wipe_containers")
+    if not resources:
+        return []
+
+    failed = []
+    done = 0
+    with ThreadPoolExecutor(max_workers=min(WIPE_WORKERS, len(resources)), thread_name_prefix="wipe") as executor:
+        futures = {executor.submit(remove, resource): resource for resource in resources}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except APIError as e:
+                logging.warning(f"Cannot remove {futures[future].id[:12]}: {e}")
+                failed.append(futures[future])
+            done += 1
+            job.progress = {"done": done, "total": len(resources)}
+
+    return failed
+
+
+def wipe_lab_resources(job: Job) -> dict:
+    """
+    Rimuove i container e le reti di Kathara dell'utente corrente in parallelo e attende che le reti siano rilasciate.
+    Essendo eseguito come job, build e deploy accodati dopo partono solo a reti rilasciate
+
+    Returns:
+        dict: numero di container e reti rimossi, durata di ogni fase in secondi
+
+    Raises:
+        RuntimeError: se restano container o reti anche dopo il wipe di Kathara
+    """
+    client = get_docker_client()
+    container_filters = {"label": _label_filters()}
+    network_filters = {"label": _label_filters(networks=True)}
+    timings = {}
+
+    phase_start = time.perf_counter()
+    containers = client.containers.list(all=True, sparse=True, filters=container_filters)
+    failed_containers = _remove_all(job, "wipe_containers", containers, _remove_container)
+    timings["containers"] = round(time.perf_counter() - phase_start, 2)
+    logging.info(f"Removed {len(containers) - len(failed_containers)}/{len(containers)} containers "
+                 f"in {timings['containers']}s")
+
+    phase_start = time.perf_counter()
+    networks = client.networks.list(filters=network_filters)
+    failed_networks = _remove_all(job, "wipe_networks", networks, _remove_network)
+    timings["networks"] = round(time.perf_counter() - phase_start, 2)
+    logging.info(f"Removed {len(networks) - len(failed_networks)}/{len(networks)} networks in {timings['networks']}s")
+
+    # Un deploy con le vecchie reti ancora presenti fallirebbe per conflitto di nomi o subnet
+    phase_start = time.perf_counter()
+    job.set_phase("release_networks", cancellable=False)
+    end_time = time.monotonic() + NETWORK_RELEASE_TIMEOUT
+    remaining = networks
+    while remaining and time.monotonic() < end_time:
+        remaining = client.networks.list(filters=network_filters)
+        if remaining:
+            time.sleep(NETWORK_RELEASE_POLL)
+    timings["release_networks"] = round(time.perf_counter() - phase_start, 2)
+
+    if failed_containers or remaining:
+        # Le risorse rimaste vengono rimosse dal wipe di Kathara, che gestisce anche i casi particolari
+        logging.warning(f"{len(failed_containers)} containers and {len(remaining)} networks left, "
+                        f"falling back to Kathara wipe...")
+        from Kathara.manager.Kathara import Kathara
+
+        job.set_phase("kathara_wipe", cancellable=False)
+        Kathara.get_instance().wipe()
+
+        # Il job deve terminare fallito se restano risorse, i job che dipendono dal wipe non partono
+        containers_left = client.containers.list(all=True, sparse=True, filters=container_filters)
+        networks_left = client.networks.list(filters=network_filters)
+        if containers_left or networks_left:
+            raise RuntimeError(f"Wipe incomplete: {len(containers_left)} containers and {len(networks_left)} "
+                               f"networks left after Kathara wipe")
+
+    return {
+        "containers": len(containers) - len(failed_containers),
+        "networks": len(networks) - len(failed_networks),
+        "timings": timings,
+    }
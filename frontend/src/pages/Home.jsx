@@ -60,7 +60,9 @@ const Home = () => {
             }
             const data = await res.json();
 
-            if (data.info && data.info.hash) {
+            if (data.info && data.info.loading && !data.info.hash) {
+                setLabStatus('starting');
+            } else if (data.info && data.info.hash) {
                 setLabStatus('running');
                 setMessage(`Lab active. Hash: ${data.info.hash}`);
             } else {
@@ -136,7 +138,7 @@ const Home = () => {
             }
 
             const data = await res.json();
-            setMessage(`Digital Twin started! Hash: ${data.lab_hash}`);
+            setMessage(`Digital Twin starting... Job: ${data.job_id}`);
         } catch (error) {
             console.error('Error starting lab:', error);
             setLabStatus('stopped');